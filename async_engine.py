@@ -0,0 +1,370 @@
+'''
+An asyncio engine core that plays many matches at once from a single event loop.
+
+engine.Player talks to its bot with blocking makefile('rw') I/O and reads the bot's stdout on
+a thread, so 32 parallel matches need 32 engine processes and 64 threads. Here each bot
+connection and stdout pipe is a non-blocking asyncio stream instead. AsyncGame reuses
+engine.Game's dealing, logging and bookkeeping unchanged and only awaits the queries, so the
+game logs and bankrolls follow exactly the same rules as the classic engine. Every match keeps
+its own game clocks.
+
+Run it from the directory holding config.py, like engine.py:
+
+    python3 async_engine.py --matches 32 --seed 1
+'''
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+import time
+
+import engine
+import tournament
+
+OUTPUT_CHUNK_SIZE = 1 << 16  # bytes of bot output read at a time
+
+
+class AsyncPlayer(engine.Player):
+    '''
+    Handles one pokerbot subprocess over asyncio streams.
+    '''
+
+    def __init__(self, name, path, log_filename=None):
+        super().__init__(name, path, log_filename)
+        self.reader = None
+        self.writer = None
+        self.output_task = None
+
+    def is_connected(self):
+        return self.writer is not None
+
+    async def capture_output(self, stdout):
+        '''
+        Collects the bot's stdout as it arrives.
+
+        The output is read in chunks rather than lines: a line longer than the stream's buffer
+        would make readline raise, and a bot left with a full pipe would block.
+        '''
+        try:
+            while True:
+                output = await stdout.read(OUTPUT_CHUNK_SIZE)
+                if not output:
+                    break
+                self.bot_log.write(output)
+        except (OSError, ValueError) as error:
+            print('Lost the output of', self.name + ':', repr(error))
+
+    async def launch(self, address, bot_socket=None):
+        cpu, limits = self.confinement()
+        proc = await asyncio.create_subprocess_exec(*self.commands['run'], address,
+                                                    stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                                    cwd=self.path, pass_fds=[bot_socket.fileno()] if bot_socket else [],
+                                                    preexec_fn=engine.preexec(cpu, limits))
+        self.bot_subprocess = proc
+        self.confine(proc.pid, cpu, limits)
+        self.output_task = asyncio.create_task(self.capture_output(proc.stdout))
+
+    async def run(self):
+        '''
+        Runs the pokerbot and waits for it to connect, over engine.TRANSPORT.
+        '''
+        if self.commands is None or len(self.commands['run']) == 0 or not self.supports_transport():
+            return
+        if engine.TRANSPORT == 'socketpair':
+            try:
+                start_time = time.perf_counter()
+                engine_socket, bot_socket = socket.socketpair()
+                with bot_socket:
+                    await self.launch('fd:' + str(bot_socket.fileno()), bot_socket)
+                reader, writer = await asyncio.open_connection(sock=engine_socket)
+                # there is nothing to accept, so the runner writes a ready line once its imports are done
+                line = await asyncio.wait_for(reader.readline(), engine.CONNECT_TIMEOUT)
+                if line.strip() != b'ready':
+                    writer.close()
+                    raise ConnectionError('no ready line')
+                self.reader, self.writer = reader, writer
+                self.startup['connect_ms'] = 1e3 * (time.perf_counter() - start_time)
+                self.report_connect('connected successfully', engine.CONNECT_TIMEOUT)
+            except (TypeError, ValueError):
+                print(self.name, 'run command misformatted')
+                return
+            except asyncio.TimeoutError:
+                print('Timed out waiting for', self.name, 'to connect')
+                return
+            except OSError:
+                print(self.name, 'run failed - check "run" in commands.json')
+                return
+            if engine.WARMUP_TIMEOUT:
+                await self.warm_up()
+            return
+        connected = asyncio.get_running_loop().create_future()
+
+        def on_connect(reader, writer):
+            if not connected.done():
+                connected.set_result((reader, writer))
+        socket_dir = None
+        try:
+            if engine.TRANSPORT == 'unix':
+                socket_dir = tempfile.mkdtemp(prefix='pokerbots-')
+                path = os.path.join(socket_dir, self.name + '.sock')
+                server = await asyncio.start_unix_server(on_connect, path)
+                address = 'unix:' + path
+            else:
+                server = await asyncio.start_server(on_connect, '', 0, family=socket.AF_INET)
+                address = str(server.sockets[0].getsockname()[1])
+        except OSError:
+            print(self.name, 'could not open a server socket')
+            if socket_dir is not None:
+                shutil.rmtree(socket_dir, ignore_errors=True)
+            return
+        try:
+            start_time = time.perf_counter()
+            await self.launch(address)
+            self.reader, self.writer = await asyncio.wait_for(connected, engine.CONNECT_TIMEOUT)
+            self.startup['connect_ms'] = 1e3 * (time.perf_counter() - start_time)
+            self.report_connect('connected successfully', engine.CONNECT_TIMEOUT)
+        except (TypeError, ValueError):
+            print(self.name, 'run command misformatted')
+        except asyncio.TimeoutError:
+            print('Timed out waiting for', self.name, 'to connect')
+        except OSError:
+            print(self.name, 'run failed - check "run" in commands.json')
+        finally:
+            server.close()
+            if socket_dir is not None:
+                shutil.rmtree(socket_dir, ignore_errors=True)
+        if self.is_connected() and engine.WARMUP_TIMEOUT:
+            await self.warm_up()
+
+    async def warm_up(self):
+        '''
+        Awaits the pokerbot's warmup; the asyncio counterpart of engine.Player.warm_up.
+        '''
+        start_time = time.perf_counter()
+        try:
+            clause = await self.exchange(['W'], engine.WARMUP_TIMEOUT)
+        except OSError:
+            clause = None
+        self.startup['warmup_ms'] = 1e3 * (time.perf_counter() - start_time)
+        if clause != 'K':
+            self.drop(' failed to warm up within {:g}s'.format(engine.WARMUP_TIMEOUT), [])
+        else:
+            print('{} warmed up in {:.0f} ms'.format(self.name, self.startup['warmup_ms']))
+
+    async def exchange(self, packet, timeout=None):
+        '''
+        Sends one message to the pokerbot and awaits its response clause, for up to timeout
+        seconds (CONNECT_TIMEOUT by default).
+        '''
+        self.writer.write((' '.join(packet) + '\n').encode())
+        await self.writer.drain()
+        try:
+            line = await asyncio.wait_for(self.reader.readline(), timeout or engine.CONNECT_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise socket.timeout
+        if not line:
+            raise ConnectionResetError
+        return line.decode().strip()
+
+    async def query(self, round_state, player_message, game_log):
+        '''
+        Awaits one action from the pokerbot; the asyncio counterpart of engine.Player.query.
+        '''
+        legal_actions = {engine.CheckAction} if isinstance(round_state, engine.TerminalState) else round_state.legal_actions()
+        if self.is_connected() and self.game_clock > 0.:
+            clause = ''
+            try:
+                packet = self.next_packet(player_message)
+                start_time = time.perf_counter()
+                clause = await self.exchange(packet)
+                end_time = time.perf_counter()
+                if 'first_decision_ms' not in self.startup and not isinstance(round_state, engine.TerminalState):
+                    self.startup['first_decision_ms'] = 1e3 * (end_time - start_time)
+                return self.decode_action(round_state, legal_actions, clause, end_time - start_time, game_log)
+            except socket.timeout:
+                self.drop(' ran out of time', game_log)
+            except OSError:
+                self.drop(' disconnected', game_log)
+            except (IndexError, KeyError, ValueError):
+                game_log.append(self.name + ' response misformatted: ' + str(clause))
+        return engine.CheckAction() if engine.CheckAction in legal_actions else engine.FoldAction()
+
+    async def stop(self):
+        '''
+        Closes the connection, waits for the pokerbot to quit, writes its log and gives up its core.
+        '''
+        try:
+            if self.writer is not None:
+                try:
+                    self.writer.write(b'Q\n')
+                    await self.writer.drain()
+                    self.writer.close()
+                except OSError:
+                    print('Could not close socket connection with', self.name)
+            if self.bot_subprocess is not None:
+                try:
+                    await asyncio.wait_for(self.bot_subprocess.wait(), engine.CONNECT_TIMEOUT)
+                except asyncio.TimeoutError:
+                    print('Timed out waiting for', self.name, 'to quit')
+                    self.bot_subprocess.kill()
+                    await self.bot_subprocess.wait()
+                await self.output_task
+            self.bot_log.close()
+        finally:
+            self.release_cpu()  # matches share the process, so a held core would stay taken
+
+
+def check_settings():
+    '''
+    Refuses the engine settings that the asyncio engine does not implement: PIPELINE_ACKS,
+    IN_PROCESS and ZYGOTE, as its bots always start as plain subprocesses with their run command.
+    '''
+    if engine.PIPELINE_ACKS or engine.IN_PROCESS or engine.ZYGOTE:
+        raise ValueError('async_engine.py supports none of PIPELINE_ACKS, IN_PROCESS and ZYGOTE - '
+                         'turn them off in config.py')
+
+
+class AsyncGame(engine.Game):
+    '''
+    engine.Game with the queries awaited, so that many games can share one event loop.
+
+    The rounds are played by engine.Game.round_steps and ended by engine.Game.finish_round, so
+    checkpoints, running statistics, early stopping and ranges of rounds work as in engine.py.
+    Bots always run as subprocesses, and acks are not pipelined.
+    '''
+
+    def __init__(self, *args, **kwargs):
+        check_settings()
+        super().__init__(*args, **kwargs)
+
+    def make_players(self):
+        return [AsyncPlayer(name, path, os.path.join(self.directory, name + '.txt')) for name, path in self.players]
+
+    async def run_round(self, players, bounties):
+        '''
+        Runs one round of poker.
+        '''
+        steps = self.round_steps(players, bounties)
+        action = None
+        try:
+            while True:
+                player, round_state, player_message = steps.send(action)
+                action = await player.query(round_state, player_message, self.log)
+        except StopIteration:
+            pass
+
+    async def run(self):
+        '''
+        Runs one game of poker.
+
+        Returns:
+            dict: The final bankroll of each player, keyed by name.
+        '''
+        loop = asyncio.get_running_loop()
+        players = self.make_players()
+        try:
+            for player in players:
+                await loop.run_in_executor(None, player.build)
+            # let both bots finish starting before raising, so that neither is left behind running
+            started = await asyncio.gather(*[player.run() for player in players], return_exceptions=True)
+            for outcome in started:
+                if isinstance(outcome, BaseException):
+                    raise outcome
+            first_round, players, bounties = self.begin(players)
+            try:
+                for round_num in range(first_round, self.num_rounds + 1):
+                    bounties = self.start_round(round_num, players, bounties)
+                    await self.run_round(players, bounties)
+                    players, bounties, stop = self.finish_round(round_num, players, bounties)
+                    if stop:
+                        break
+            finally:
+                self.close_logs(players)
+        finally:
+            # run_matches keeps the event loop going after a failed match, so its bots must quit now
+            for player in players:
+                player.report_usage()
+            await asyncio.gather(*[player.stop() for player in players])
+        if engine.LATENCY_REPORT:
+            self.report_latency(players)
+        return {player.name: player.bankroll for player in players}
+
+
+async def run_match(job, semaphore):
+    '''
+    Plays one tournament job (see tournament.make_jobs) on the shared event loop.
+    '''
+    settings = job['settings']
+    players = [(settings['PLAYER_1_NAME'], settings['PLAYER_1_PATH']),
+               (settings['PLAYER_2_NAME'], settings['PLAYER_2_PATH'])]
+    async with semaphore:
+        os.makedirs(job['directory'], exist_ok=True)
+        game = AsyncGame(seed=job['seed'], players=players, directory=job['directory'],
+                         first_round=job.get('first_round', 1), last_round=job.get('last_round'),
+                         keep_deltas=True)
+        start_time = time.perf_counter()
+        bankrolls = await game.run()
+        end_time = time.perf_counter()
+    print('Match {}{} finished in {:.1f}s: {}'.format(job['match'], ' (mirrored)' if job['mirrored'] else '',
+                                                    end_time - start_time, bankrolls))
+    return {'match': job['match'], 'seed': job['seed'], 'mirrored': job['mirrored'],
+            'directory': job['directory'], 'bankrolls': bankrolls, 'deltas': game.round_deltas,
+            'seconds': end_time - start_time}
+
+
+async def run_matches(jobs, concurrency):
+    '''
+    Plays all jobs concurrently, at most `concurrency` at a time.
+    '''
+    semaphore = asyncio.Semaphore(concurrency)
+    # one match that fails must not abort the others, so exceptions come back as results
+    outcomes = await asyncio.gather(*[run_match(job, semaphore) for job in jobs], return_exceptions=True)
+    results = []
+    for job, outcome in zip(jobs, outcomes):
+        if isinstance(outcome, Exception):
+            print('Match {}{} failed: {!r}'.format(job['match'], ' (mirrored)' if job['mirrored'] else '', outcome))
+        else:
+            results.append(outcome)
+    return sorted(results, key=lambda result: (result['match'], result['mirrored']))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(prog='python3 async_engine.py')
+    parser.add_argument('--matches', type=int, default=32, help='Number of matches to play')
+    parser.add_argument('--concurrency', type=int, default=32, help='Matches in flight at once')
+    parser.add_argument('--seed', type=int, default=None, help='Seed for reproducible deals')
+    parser.add_argument('--rounds', type=int, default=engine.NUM_ROUNDS, help='Rounds per match')
+    parser.add_argument('--bot1', default=engine.PLAYER_1_PATH, help='Path to the first pokerbot')
+    parser.add_argument('--bot2', default=engine.PLAYER_2_PATH, help='Path to the second pokerbot')
+    parser.add_argument('--duplicate', action='store_true', help='Replay every seed with the seats swapped')
+    parser.add_argument('--out', default='async_matches', help='Directory for match logs and the summary')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    check_settings()
+    engine.NUM_ROUNDS = args.rounds
+    out_dir = os.path.abspath(args.out)
+    settings = {
+        'PLAYER_1_NAME': engine.PLAYER_1_NAME,
+        'PLAYER_2_NAME': engine.PLAYER_2_NAME,
+        'PLAYER_1_PATH': os.path.abspath(args.bot1),
+        'PLAYER_2_PATH': os.path.abspath(args.bot2),
+    }
+    jobs = tournament.make_jobs(args.matches, args.seed, out_dir, settings, args.duplicate)
+    start_time = time.perf_counter()
+    results = asyncio.run(run_matches(jobs, args.concurrency))
+    summary = tournament.summarize(results, [engine.PLAYER_1_NAME, engine.PLAYER_2_NAME])
+    summary['seconds'] = time.perf_counter() - start_time
+    summary['results'] = [{key: value for key, value in result.items() if key != 'deltas'} for result in results]
+    with open(os.path.join(out_dir, 'summary.json'), 'w') as summary_file:
+        json.dump(summary, summary_file, indent=2)
+    for name, stats in summary['players'].items():
+        print('{}: total {}, mean {:.1f} per match, 95% CI [{:.1f}, {:.1f}]'.format(
+            name, stats['total'], stats['mean'], stats['ci95'][0], stats['ci95'][1]))
+    print('{} matches in {:.1f}s'.format(summary['matches'], summary['seconds']))
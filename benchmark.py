@@ -0,0 +1,192 @@
+'''
+Measures the engine's throughput with the reference bots in benchmark_bots/.
+
+The reference bots do no work of their own (check/call, a random legal action, fold at once),
+so a match measures the engine: dealing, the betting logic, logging and the transport. Every
+engine mode in MODES plays every matchup in MATCHUPS with the same deal seed, each match in a
+fresh worker process, one match at a time. Run it from the directory holding config.py, like
+engine.py:
+
+    python3 benchmark.py --rounds 2000 --out benchmark.json
+    python3 benchmark.py --modes tcp unix socketpair --baseline benchmark.json
+
+For every mode and matchup the results hold the hands per second, the CPU seconds of the engine
+process (which includes in-process bots) and of the bot processes, and the per-query overhead:
+the mean round trip of a query to a bot as seen by the engine, and the engine CPU per query.
+Timings cover whole matches, bot startup included, so use enough rounds to amortize it. With
+--repeat, the median of each metric is reported.
+'''
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout, redirect_stderr
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import time
+
+import engine
+
+BOTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_bots')
+
+# engine settings common to every mode, so that the user's config.py does not skew the comparison
+BASE_SETTINGS = {
+    'IN_PROCESS': False,
+    'TRANSPORT': 'tcp',
+    'PIPELINE_ACKS': False,
+    'ZYGOTE': False,
+    'GAME_LOG_COMPRESS': False,
+    'EVENT_LOG': False,
+    'LOG_LEVEL': 'full',
+    'LATENCY_REPORT': True,
+    'CHECKPOINT_INTERVAL': 0,
+    'STATS_INTERVAL': 0,
+    'DEAL_CORPUS': None,
+}
+MODES = {
+    'in_process': {'IN_PROCESS': True},
+    'in_process_log_summary': {'IN_PROCESS': True, 'LOG_LEVEL': 'summary'},
+    'in_process_log_off': {'IN_PROCESS': True, 'LOG_LEVEL': 'off'},
+    'tcp': {},
+    'unix': {'TRANSPORT': 'unix'},
+    'socketpair': {'TRANSPORT': 'socketpair'},
+    'tcp_pipelined_acks': {'PIPELINE_ACKS': True},
+    'tcp_gzip_log': {'GAME_LOG_COMPRESS': True},
+    'tcp_event_log': {'EVENT_LOG': True},
+    'tcp_log_off': {'LOG_LEVEL': 'off'},
+}
+MATCHUPS = {
+    'check_call': ('check_call', 'check_call'),
+    'random': ('random_legal', 'random_legal'),
+    'fold': ('fold', 'check_call'),
+}
+METRICS = ['seconds', 'hands_per_second', 'engine_cpu_seconds', 'bot_cpu_seconds',
+           'queries', 'query_latency_us', 'engine_cpu_us_per_query']
+
+
+def cpu_seconds(who):
+    usage = resource.getrusage(who)
+    return usage.ru_utime + usage.ru_stime
+
+
+def run_benchmark(job):
+    '''
+    Plays one benchmark match inside a fresh worker process.
+
+    Returns:
+        dict: The metrics of the match (see METRICS).
+    '''
+    os.makedirs(job['directory'], exist_ok=True)
+    os.chdir(job['directory'])
+    for name, value in job['settings'].items():
+        setattr(engine, name, value)
+    engine_cpu = cpu_seconds(resource.RUSAGE_SELF)
+    bot_cpu = cpu_seconds(resource.RUSAGE_CHILDREN)
+    start_time = time.perf_counter()
+    with open('engine.txt', 'w') as output, redirect_stdout(output), redirect_stderr(output):
+        engine.Game(seed=job['seed']).run()
+    seconds = time.perf_counter() - start_time
+    engine_cpu = cpu_seconds(resource.RUSAGE_SELF) - engine_cpu
+    bot_cpu = cpu_seconds(resource.RUSAGE_CHILDREN) - bot_cpu  # bot processes are reaped by Player.stop
+    with open(engine.GAME_LOG_FILENAME + '_latency.json') as report_file:
+        streets = [summary for report in json.load(report_file).values() for summary in report['streets'].values()]
+    queries = sum(summary['count'] for summary in streets)
+    query_seconds = sum(summary['count'] * summary['mean_ms'] for summary in streets) / 1e3
+    return {
+        'seconds': seconds,
+        'hands_per_second': engine.NUM_ROUNDS / seconds,
+        'engine_cpu_seconds': engine_cpu,
+        'bot_cpu_seconds': bot_cpu,
+        'queries': queries,
+        'query_latency_us': 1e6 * query_seconds / queries if queries else 0.,
+        'engine_cpu_us_per_query': 1e6 * engine_cpu / queries if queries else 0.,
+    }
+
+
+def make_jobs(modes, matchups, rounds, seed, repeat, out_dir):
+    '''
+    Builds one job per mode, matchup and repetition.
+    '''
+    jobs = []
+    for mode in modes:
+        for matchup in matchups:
+            first, second = MATCHUPS[matchup]
+            settings = dict(BASE_SETTINGS, **MODES[mode])
+            settings.update({
+                'PLAYER_1_NAME': 'A',
+                'PLAYER_2_NAME': 'B',
+                'PLAYER_1_PATH': os.path.join(BOTS_DIR, first),
+                'PLAYER_2_PATH': os.path.join(BOTS_DIR, second),
+                'NUM_ROUNDS': rounds,
+            })
+            for run in range(repeat):
+                jobs.append({'mode': mode, 'matchup': matchup, 'seed': seed, 'settings': settings,
+                             'directory': os.path.join(out_dir, '{}_{}_{}'.format(mode, matchup, run))})
+    return jobs
+
+
+def git_commit():
+    '''
+    Returns the commit of the engine being measured, if it is in a git checkout.
+    '''
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=os.path.dirname(BOTS_DIR),
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(prog='python3 benchmark.py')
+    parser.add_argument('--modes', nargs='+', choices=list(MODES), default=list(MODES), help='Engine modes to measure')
+    parser.add_argument('--matchups', nargs='+', choices=list(MATCHUPS), default=list(MATCHUPS), help='Reference bot matchups')
+    parser.add_argument('--rounds', type=int, default=1000, help='Rounds per match')
+    parser.add_argument('--seed', type=int, default=1, help='Deal seed of every match')
+    parser.add_argument('--repeat', type=int, default=1, help='Matches per mode and matchup, reporting the median')
+    parser.add_argument('--work-dir', default='benchmark_runs', help='Directory for the match logs')
+    parser.add_argument('--out', default='benchmark.json', help='File for the results')
+    parser.add_argument('--baseline', default=None, help='Earlier results to compare hands per second against')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    jobs = make_jobs(args.modes, args.matchups, args.rounds, args.seed, args.repeat, os.path.abspath(args.work_dir))
+    # one match at a time, each in a new process, so that matches neither compete for the CPU
+    # nor share warm caches, zygotes or CPU counters
+    with ProcessPoolExecutor(max_workers=1, max_tasks_per_child=1) as executor:
+        runs = list(executor.map(run_benchmark, jobs))
+    results = []
+    for index in range(0, len(jobs), args.repeat):
+        job, samples = jobs[index], runs[index:index + args.repeat]
+        result = {'mode': job['mode'], 'matchup': job['matchup']}
+        result.update({metric: statistics.median(sample[metric] for sample in samples) for metric in METRICS})
+        results.append(result)
+    report = {
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'rounds': args.rounds,
+        'seed': args.seed,
+        'repeat': args.repeat,
+        'results': results,
+    }
+    with open(args.out, 'w') as results_file:
+        json.dump(report, results_file, indent=2)
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = {(result['mode'], result['matchup']): result for result in json.load(baseline_file)['results']}
+    print('{:<24}{:<12}{:>10}{:>12}{:>10}{:>12}{:>14}{}'.format(
+        'mode', 'matchup', 'hands/s', 'engine cpu', 'bot cpu', 'query us', 'cpu us/query', '  vs baseline' if baseline else ''))
+    for result in results:
+        previous = baseline.get((result['mode'], result['matchup']))
+        change = '  {:+.1%}'.format(result['hands_per_second'] / previous['hands_per_second'] - 1) if previous else ''
+        print('{:<24}{:<12}{:>10.0f}{:>11.2f}s{:>9.2f}s{:>12.1f}{:>14.1f}{}'.format(
+            result['mode'], result['matchup'], result['hands_per_second'], result['engine_cpu_seconds'],
+            result['bot_cpu_seconds'], result['query_latency_us'], result['engine_cpu_us_per_query'], change))
+    print('Writing', args.out)
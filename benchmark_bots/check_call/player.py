@@ -0,0 +1,28 @@
+"""
+Reference pokerbot for engine benchmarks: always checks, or calls when it cannot check.
+"""
+
+from skeleton.actions import CallAction, CheckAction
+from skeleton.bot import Bot
+from skeleton.runner import parse_args, run_bot
+
+
+class Player(Bot):
+    """
+    A check/call pokerbot. It does no work, so a match measures the engine and the transport.
+    """
+
+    def handle_new_round(self, game_state, round_state, active):
+        pass
+
+    def handle_round_over(self, game_state, terminal_state, active):
+        pass
+
+    def get_action(self, game_state, round_state, active):
+        if CheckAction in round_state.legal_actions():
+            return CheckAction()
+        return CallAction()
+
+
+if __name__ == "__main__":
+    run_bot(Player(), parse_args())
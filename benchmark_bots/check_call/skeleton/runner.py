@@ -0,0 +1,238 @@
+"""
+The infrastructure for interacting with the engine.
+"""
+
+import argparse
+import socket
+from .actions import FoldAction, CallAction, CheckAction, RaiseAction
+from .states import GameState, TerminalState, RoundState
+from .states import STARTING_STACK, BIG_BLIND, SMALL_BLIND
+from .bot import Bot
+
+
+class Runner:
+    """
+    Interacts with the engine.
+    """
+
+    def __init__(self, pokerbot, socketfile):
+        self.pokerbot = pokerbot
+        self.socketfile = socketfile
+
+    def receive(self):
+        """
+        Generator for incoming messages from the engine.
+        """
+        while True:
+            packet = self.socketfile.readline().strip().split(" ")
+            if not packet:
+                break
+            yield packet
+
+    def send(self, action):
+        """
+        Encodes an action and sends it to the engine.
+        """
+        if isinstance(action, FoldAction):
+            code = "F"
+        elif isinstance(action, CallAction):
+            code = "C"
+        elif isinstance(action, CheckAction):
+            code = "K"
+        else:  # isinstance(action, RaiseAction)
+            code = "R" + str(action.amount)
+        self.socketfile.write(code + "\n")
+        self.socketfile.flush()
+
+    def run(self):
+        """
+        Reconstructs the game tree based on the action history received from the engine.
+        """
+        game_state = GameState(0, 0.0, 1)
+        round_state = None
+        active = 0
+        round_flag = True
+        new_game = False
+        for packet in self.receive():
+            for clause in packet:
+                if clause[0] == "T":
+                    game_state = GameState(
+                        game_state.bankroll, float(clause[1:]), game_state.round_num
+                    )
+                elif clause[0] == "P":
+                    active = int(float(clause[1:]))
+                elif clause[0] == "H":
+                    hands = [[], []]
+
+                    hands[active] = clause[1:].split(",")
+                    pips = [SMALL_BLIND, BIG_BLIND]
+                    stacks = [STARTING_STACK - SMALL_BLIND, STARTING_STACK - BIG_BLIND]
+                    round_state = RoundState(0, 0, pips, stacks, hands, None, [], None)
+                elif clause[0] == "G":
+                    bounties = ["-1", "-1"]
+                    bounties[active] = clause[1:]
+                    round_state = RoundState(
+                        round_state.button,
+                        round_state.street,
+                        round_state.pips,
+                        round_state.stacks,
+                        round_state.hands,
+                        bounties,
+                        round_state.deck,
+                        round_state.previous_state,
+                    )
+                    if round_flag:
+                        self.pokerbot.handle_new_round(game_state, round_state, active)
+                        round_flag = False
+                elif clause[0] == "F":
+                    round_state = round_state.proceed(FoldAction())
+                elif clause[0] == "C":
+                    round_state = round_state.proceed(CallAction())
+                elif clause[0] == "K":
+                    round_state = round_state.proceed(CheckAction())
+                elif clause[0] == "R":
+                    round_state = round_state.proceed(
+                        RaiseAction(int(float(clause[1:])))
+                    )
+                elif clause[0] == "B":
+                    round_state = RoundState(
+                        round_state.button,
+                        round_state.street,
+                        round_state.pips,
+                        round_state.stacks,
+                        round_state.hands,
+                        round_state.bounties,
+                        clause[1:].split(","),
+                        round_state.previous_state,
+                    )
+                elif clause[0] == "O":
+                    # backtrack
+                    round_state = round_state.previous_state
+                    revised_hands = list(round_state.hands)
+                    revised_hands[1 - active] = clause[1:].split(",")
+                    # rebuild history
+                    round_state = RoundState(
+                        round_state.button,
+                        round_state.street,
+                        round_state.pips,
+                        round_state.stacks,
+                        revised_hands,
+                        round_state.bounties,
+                        round_state.deck,
+                        round_state.previous_state,
+                    )
+                    round_state = TerminalState([0, 0], None, round_state)
+                elif clause[0] == "D":
+                    assert isinstance(round_state, TerminalState)
+                    delta = int(float(clause[1:]))
+                    deltas = [-delta, -delta]
+                    deltas[active] = delta
+                    round_state = TerminalState(
+                        deltas, None, round_state.previous_state
+                    )
+                    game_state = GameState(
+                        game_state.bankroll + delta,
+                        game_state.game_clock,
+                        game_state.round_num,
+                    )
+                elif clause[0] == "Y":
+                    assert isinstance(round_state, TerminalState)
+                    hero_hit_bounty, opponent_hit_bounty = (clause[1] == "1"), (
+                        clause[2] == "1"
+                    )
+                    if active == 1:
+                        hero_hit_bounty, opponent_hit_bounty = (
+                            opponent_hit_bounty,
+                            hero_hit_bounty,
+                        )
+                    round_state = TerminalState(
+                        round_state.deltas,
+                        [hero_hit_bounty, opponent_hit_bounty],
+                        round_state.previous_state,
+                    )
+                    self.pokerbot.handle_round_over(game_state, round_state, active)
+                    game_state = GameState(
+                        game_state.bankroll,
+                        game_state.game_clock,
+                        game_state.round_num + 1,
+                    )
+                    round_flag = True
+                elif clause[0] == "N":
+                    game_state = GameState(0, 0.0, 1)
+                    round_state = None
+                    round_flag = True
+                    new_game = True
+                    self.pokerbot.handle_new_game()
+                elif clause[0] == "W":
+                    self.pokerbot.handle_warmup()
+                elif clause[0] == "Q":
+                    return
+            if new_game:  # confirm the reset, which older runners would ack with a plain K
+                self.socketfile.write("N\n")
+                self.socketfile.flush()
+                new_game = False
+            elif round_flag:  # ack the engine
+                self.send(CheckAction())
+            else:
+                assert active == round_state.button % 2
+                action = self.pokerbot.get_action(game_state, round_state, active)
+                self.send(action)
+
+
+def parse_args():
+    """
+    Parses arguments corresponding to socket connection information.
+    """
+    parser = argparse.ArgumentParser(prog="python3 player.py")
+    parser.add_argument(
+        "--host",
+        type=str,
+        default="localhost",
+        help="Host to connect to, defaults to localhost",
+    )
+    parser.add_argument(
+        "port",
+        type=str,
+        help="Port on host to connect to, or unix:PATH or fd:N for a local transport",
+    )
+    return parser.parse_args()
+
+
+def connect(host, port):
+    """
+    Connects to the engine: over TCP, over the Unix domain socket at unix:PATH,
+    or through the already connected socket fd:N inherited from the engine.
+    """
+    port = str(port)
+    if port.startswith("fd:"):
+        return socket.socket(fileno=int(port[3:]))
+    if port.startswith("unix:"):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(port[5:])
+        except OSError:
+            sock.close()
+            raise
+        return sock
+    return socket.create_connection((host, int(port)))
+
+
+def run_bot(pokerbot, args):
+    """
+    Runs the pokerbot.
+    """
+    assert isinstance(pokerbot, Bot)
+    try:
+        sock = connect(args.host, args.port)
+    except OSError:
+        print("Could not connect to {}:{}".format(args.host, args.port))
+        return
+    socketfile = sock.makefile("rw")
+    if str(args.port).startswith("fd:"):
+        # an inherited connection has no accept to tell the engine that we are up
+        socketfile.write("ready\n")
+        socketfile.flush()
+    runner = Runner(pokerbot, socketfile)
+    runner.run()
+    socketfile.close()
+    sock.close()
@@ -0,0 +1,29 @@
+"""
+Reference pokerbot for engine benchmarks: folds whenever it can, and checks otherwise.
+"""
+
+from skeleton.actions import CheckAction, FoldAction
+from skeleton.bot import Bot
+from skeleton.runner import parse_args, run_bot
+
+
+class Player(Bot):
+    """
+    An instant-fold pokerbot. Its rounds end at the first decision, so a match measures the
+    per-round cost of the engine: dealing, logging and the end-of-round messages.
+    """
+
+    def handle_new_round(self, game_state, round_state, active):
+        pass
+
+    def handle_round_over(self, game_state, terminal_state, active):
+        pass
+
+    def get_action(self, game_state, round_state, active):
+        if FoldAction in round_state.legal_actions():
+            return FoldAction()
+        return CheckAction()
+
+
+if __name__ == "__main__":
+    run_bot(Player(), parse_args())
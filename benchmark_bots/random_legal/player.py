@@ -0,0 +1,41 @@
+"""
+Reference pokerbot for engine benchmarks: picks a uniformly random legal action.
+"""
+
+from skeleton.actions import RaiseAction
+from skeleton.bot import Bot
+from skeleton.runner import parse_args, run_bot
+
+import random
+
+
+class Player(Bot):
+    """
+    A random pokerbot. Raises are uniform between the raise bounds, so its rounds reach every
+    street and exercise the whole betting logic of the engine. Its generator has a fixed seed,
+    so a fixed-seed match is the same every time.
+    """
+
+    def __init__(self):
+        self.rng = random.Random(0)
+
+    def handle_new_game(self):
+        self.rng.seed(0)
+
+    def handle_new_round(self, game_state, round_state, active):
+        pass
+
+    def handle_round_over(self, game_state, terminal_state, active):
+        pass
+
+    def get_action(self, game_state, round_state, active):
+        legal_actions = sorted(round_state.legal_actions(), key=lambda action: action.__name__)
+        action = self.rng.choice(legal_actions)
+        if action is RaiseAction:
+            min_raise, max_raise = round_state.raise_bounds()
+            return RaiseAction(self.rng.randint(min_raise, max_raise))
+        return action()
+
+
+if __name__ == "__main__":
+    run_bot(Player(), parse_args())
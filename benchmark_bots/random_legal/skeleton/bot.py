@@ -0,0 +1,78 @@
+"""
+This file contains the base class that you should implement for your pokerbot.
+"""
+
+
+class Bot:
+    """
+    The base class for a pokerbot.
+    """
+
+    def handle_new_game(self):
+        """
+        Called when the engine reuses this bot process for another game, before its first round.
+        Reset any state that should not carry over from the previous game.
+
+        Arguments:
+        Nothing.
+
+        Returns:
+        Nothing.
+        """
+        pass
+
+    def handle_warmup(self):
+        """
+        Called once before the first round when the engine grants a warmup (WARMUP_TIMEOUT),
+        without charging your game clock. Load tables or warm caches here.
+
+        Arguments:
+        Nothing.
+
+        Returns:
+        Nothing.
+        """
+        pass
+
+    def handle_new_round(self, game_state, round_state, active):
+        """
+        Called when a new round starts. Called NUM_ROUNDS times.
+
+        Arguments:
+        game_state: the GameState object.
+        round_state: the RoundState object.
+        active: your player's index.
+
+        Returns:
+        Nothing.
+        """
+        raise NotImplementedError("handle_new_round")
+
+    def handle_round_over(self, game_state, terminal_state, active):
+        """
+        Called when a round ends. Called NUM_ROUNDS times.
+
+        Arguments:
+        game_state: the GameState object.
+        terminal_state: the TerminalState object.
+        active: your player's index.
+
+        Returns:
+        Nothing.
+        """
+        raise NotImplementedError("handle_round_over")
+
+    def get_action(self, game_state, round_state, active):
+        """
+        Where the magic happens - your code should implement this function.
+        Called any time the engine needs an action from your bot.
+
+        Arguments:
+        game_state: the GameState object.
+        round_state: the RoundState object.
+        active: your player's index.
+
+        Returns:
+        Your action.
+        """
+        raise NotImplementedError("get_action")
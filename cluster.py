@@ -0,0 +1,579 @@
+'''
+Spreads a tournament over several machines: a coordinator hands out match jobs to worker
+agents over plain TCP, and the workers send back the results and the match logs.
+
+The coordinator holds the bots and config.py; workers need only a checkout of the engine and
+receive everything else over the connection, so no filesystem is shared. Every pair of the
+given bots plays --matches matches with the deal seeds of tournament.make_jobs (so all pairings
+see the same cards), each match an engine.Game run by tournament.run_match on a worker. Start
+the coordinator from the directory holding config.py, like engine.py:
+
+    python3 cluster.py serve frijol_5 frijol_6 --matches 200 --seed 1 --port 5900
+
+and a worker on every machine, with as many matches at a time as it has cores to spare:
+
+    python3 cluster.py work coordinator-host:5900 --slots 8
+
+To try it on one machine, let the coordinator start its own workers on localhost:
+
+    python3 cluster.py serve frijol_5 frijol_6 --matches 20 --seed 1 --local-workers 2
+
+Jobs are scheduled with work stealing. A worker that runs out of jobs takes a chunk of the
+unassigned ones, a shrinking share of what is left, in pairing order, so that it keeps playing
+the same bots; once none are left it steals the newer half of the queue of the worker with the
+most jobs still queued. Jobs of a worker that disconnects go back to the unassigned queue, and
+a match that fails MAX_ATTEMPTS times, or is running on a worker MAX_ATTEMPTS times when it
+disconnects, is given up. While a match runs, its worker sends what has been added to its
+logs (game log, event stream, player logs, engine output) every UPLOAD_INTERVAL seconds, in
+chunks; once it finishes, the worker sends the rest and the other files, such as the latency
+report, and deletes its copy. The coordinator writes them to the match's directory under --out,
+laid out like round_robin.py's.
+
+Every message is one line of JSON followed by 'size' bytes of payload.
+'''
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from itertools import combinations
+from threading import Event, Lock, Thread
+import argparse
+import gzip
+import hashlib
+import io
+import json
+import math
+import os
+import shutil
+import socket
+import socketserver
+import subprocess
+import sys
+import tarfile
+import time
+
+CHUNK_SIZE = 1 << 20  # bytes of a log file per message
+MAX_ATTEMPTS = 3  # times a match may fail before it is given up
+WAIT_SECONDS = 1.  # how long a worker waits before asking again when no job is free
+UPLOAD_INTERVAL = 5.  # seconds between uploads of the logs of running matches
+STREAMED_SUFFIXES = ('.txt', '.txt.gz', '.jsonl', '.jsonl.gz')  # the logs the engine only appends to
+
+
+def send_message(connection, message, payload=b''):
+    '''
+    Writes one message and its payload to a binary socket file.
+    '''
+    connection.write(json.dumps(dict(message, size=len(payload))).encode() + b'\n' + payload)
+    connection.flush()
+
+
+def receive_message(connection):
+    '''
+    Reads one message from a binary socket file.
+
+    Returns:
+        tuple: The message dict and its payload bytes.
+    '''
+    line = connection.readline()
+    if not line:
+        raise ConnectionError('connection closed')
+    message = json.loads(line)
+    size = message.pop('size', 0)
+    payload = connection.read(size) if size else b''
+    if len(payload) < size:
+        raise ConnectionError('connection closed')
+    return message, payload
+
+
+def pack_bot(path):
+    '''
+    Packs a bot directory into a gzipped tarball that is the same for the same files, so that
+    workers can keep it across tournaments.
+
+    Returns:
+        tuple: The tarball's sha256 hex digest and its bytes.
+    '''
+    def normalize(info):
+        if os.path.basename(info.name) == '__pycache__' or info.name.endswith('.pyc'):
+            return None
+        info.mtime, info.uid, info.gid, info.uname, info.gname = 0, 0, 0, '', ''
+        return info
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode='wb', mtime=0) as gzip_file:
+        with tarfile.open(fileobj=gzip_file, mode='w') as tar:
+            tar.add(path, arcname='.', filter=normalize)  # tarfile adds directory entries in sorted order
+    data = buffer.getvalue()
+    return hashlib.sha256(data).hexdigest(), data
+
+
+class WorkerState():
+    '''
+    The coordinator's view of one connected worker.
+    '''
+
+    def __init__(self, name, slots):
+        self.name = name
+        self.slots = slots
+        self.queue = deque()  # jobs assigned to this worker and not handed out yet
+        self.running = {}  # job id -> job handed out and not finished
+        self.finished = 0
+
+
+class Coordinator():
+    '''
+    The job queues and results of a distributed tournament. All methods are thread-safe; the
+    server runs one handler thread per worker connection.
+    '''
+
+    def __init__(self, jobs, bots, config_source):
+        self.jobs = {job['id']: job for job in jobs}
+        self.bots = bots  # digest -> tarball
+        self.config_source = config_source
+        self.lock = Lock()
+        self.unassigned = deque(jobs)
+        self.workers = []
+        self.attempts = {}  # job id -> failed attempts
+        self.results = []
+        self.abandoned = []
+        self.done = Event()
+        if not jobs:
+            self.done.set()
+
+    def add_worker(self, name, slots):
+        with self.lock:
+            worker = WorkerState(name, slots)
+            self.workers.append(worker)
+        print('Worker', name, 'joined with', slots, 'slots')
+        return worker
+
+    def remove_worker(self, worker):
+        '''
+        Forgets a worker that disconnected, and requeues the jobs it had not finished.
+
+        The matches it was running count as failed attempts: a match that kills the worker agent
+        would otherwise be handed out forever.
+        '''
+        with self.lock:
+            self.workers.remove(worker)
+            lost = [job for job in worker.running.values() if not self.count_failure(job)] + list(worker.queue)
+            worker.running, worker.queue = {}, deque()
+            self.unassigned.extendleft(reversed(lost))
+            self.check_done()
+        if lost:
+            print('Worker', worker.name, 'left, requeueing', len(lost), 'jobs')
+
+    def next_job(self, worker):
+        '''
+        Hands the worker its next job: its own queue first, then a chunk of the unassigned jobs,
+        then half of the longest queue of another worker.
+
+        Returns:
+            dict: The job, or None if there is no job to hand out right now.
+        '''
+        with self.lock:
+            if not worker.queue and self.unassigned:
+                chunk = math.ceil(len(self.unassigned) / (2 * len(self.workers)))
+                worker.queue.extend(self.unassigned.popleft() for _ in range(chunk))
+            if not worker.queue:
+                victim = max(self.workers, key=lambda other: len(other.queue))
+                for _ in range((len(victim.queue) + 1) // 2):
+                    worker.queue.appendleft(victim.queue.pop())
+            if not worker.queue:
+                return None
+            job = worker.queue.popleft()
+            worker.running[job['id']] = job
+            return job
+
+    def write_file(self, worker, job_id, name, offset, data):
+        '''
+        Writes one chunk of a log file of a match the worker is running.
+        '''
+        if job_id not in worker.running:
+            raise ValueError('{} is not running {}'.format(worker.name, job_id))
+        directory = self.jobs[job_id]['directory']
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, os.path.basename(name)), 'r+b' if offset else 'wb') as log_file:
+            log_file.seek(offset)
+            log_file.write(data)
+
+    def finish(self, worker, job_id, result):
+        with self.lock:
+            job = worker.running.pop(job_id)
+            worker.finished += 1
+            result.update(directory=job['directory'], pairing=job['pairing'], worker=worker.name)
+            self.results.append(result)
+            self.check_done()
+        print('Match {}{} finished on {} in {:.1f}s: {}'.format(result['match'], ' (mirrored)' if result['mirrored'] else '',
+                                                             worker.name, result['seconds'], result['bankrolls']))
+
+    def fail(self, worker, job_id, error):
+        '''
+        Requeues a match that raised on the worker, or gives it up after MAX_ATTEMPTS tries.
+        '''
+        with self.lock:
+            job = worker.running.pop(job_id)
+            if not self.count_failure(job):
+                self.unassigned.append(job)
+            self.check_done()
+        print('Match', job_id, 'failed on', worker.name + ':', error)
+
+    def count_failure(self, job):
+        '''
+        Counts a failed attempt at a job, and gives the job up after MAX_ATTEMPTS. Call it with
+        the lock held.
+
+        Returns:
+            bool: True if the job was given up.
+        '''
+        self.attempts[job['id']] = self.attempts.get(job['id'], 0) + 1
+        if self.attempts[job['id']] < MAX_ATTEMPTS:
+            return False
+        print('Giving up on match', job['id'], 'after', MAX_ATTEMPTS, 'attempts')
+        self.abandoned.append(job['id'])
+        return True
+
+    def check_done(self):
+        if len(self.results) + len(self.abandoned) == len(self.jobs):
+            self.done.set()
+
+
+class CoordinatorHandler(socketserver.StreamRequestHandler):
+    '''
+    Serves one worker connection: every request the worker sends gets exactly one reply.
+    '''
+
+    def setup(self):
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)  # notice workers whose machine died
+
+    def handle(self):
+        coordinator = self.server.coordinator
+        worker = None
+        try:
+            while True:
+                message, payload = receive_message(self.rfile)
+                reply, reply_payload = {'type': 'ok'}, b''
+                if worker is None and message['type'] != 'hello':
+                    raise ValueError('a worker must say hello first')
+                if message['type'] == 'hello':
+                    worker = coordinator.add_worker(message['worker'], message['slots'])
+                    reply, reply_payload = {'type': 'welcome'}, coordinator.config_source.encode()
+                elif message['type'] == 'job':
+                    job = coordinator.next_job(worker)
+                    if job is not None:
+                        reply = {'type': 'job', 'job': job}
+                    elif coordinator.done.is_set():
+                        reply = {'type': 'done'}
+                    else:
+                        reply = {'type': 'wait', 'seconds': WAIT_SECONDS}
+                elif message['type'] == 'bot':
+                    reply, reply_payload = {'type': 'bot'}, coordinator.bots[message['digest']]
+                elif message['type'] == 'file':
+                    coordinator.write_file(worker, message['id'], message['name'], message['offset'], payload)
+                elif message['type'] == 'result':
+                    coordinator.finish(worker, message['id'], message['result'])
+                elif message['type'] == 'failed':
+                    coordinator.fail(worker, message['id'], message['error'])
+                send_message(self.wfile, reply, reply_payload)
+        except (OSError, ValueError, KeyError) as error:  # including ConnectionError and bad JSON
+            if not isinstance(error, ConnectionError):
+                print('Dropping worker', worker.name if worker else self.client_address, 'after a bad request:', repr(error))
+        finally:
+            if worker is not None:
+                coordinator.remove_worker(worker)
+
+
+class CoordinatorServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, coordinator):
+        super().__init__(address, CoordinatorHandler)
+        self.coordinator = coordinator
+
+
+def make_jobs(paths, names, matches, seed, duplicate, rounds, in_process, out_dir, bots):
+    '''
+    Builds the jobs of every pairing of the bots, pairing by pairing.
+
+    Each job is a tournament job plus its id (its directory relative to out_dir), its pairing
+    index and the digests of its bots' tarballs, keyed by the bot paths in its settings.
+    '''
+    import tournament  # imports the engine, which reads config.py from the working directory
+    jobs = []
+    for pairing, (first, second) in enumerate(combinations(range(len(paths)), 2)):
+        settings = {
+            'PLAYER_1_NAME': names[first],
+            'PLAYER_2_NAME': names[second],
+            'PLAYER_1_PATH': paths[first],
+            'PLAYER_2_PATH': paths[second],
+            'NUM_ROUNDS': rounds,
+            'IN_PROCESS': in_process,
+        }
+        pairing_dir = os.path.join(out_dir, '{}_vs_{}'.format(names[first], names[second]))
+        for job in tournament.make_jobs(matches, seed, pairing_dir, settings, duplicate):
+            job.update(id=os.path.relpath(job['directory'], out_dir), pairing=pairing,
+                       bots={path: bots[path] for path in (paths[first], paths[second])})
+            jobs.append(job)
+    return jobs
+
+
+def start_local_workers(port, count, slots, out_dir):
+    '''
+    Starts worker agents on this machine, each with its own working directory.
+    '''
+    return [subprocess.Popen([sys.executable, os.path.abspath(__file__), 'work', '127.0.0.1:{}'.format(port),
+                              '--slots', str(slots), '--work-dir', os.path.join(out_dir, 'worker_{}'.format(index))])
+            for index in range(count)]
+
+
+def serve(args):
+    '''
+    Runs the coordinator until every match has finished or been given up.
+
+    Returns:
+        dict: The summary of every pairing (see tournament.summarize), the workers' match
+        counts and the matches given up.
+    '''
+    import engine
+    import tournament
+    out_dir = os.path.abspath(args.out)
+    paths = [os.path.abspath(bot) for bot in args.bots]
+    names = [os.path.basename(path) for path in paths]
+    if len(set(names)) < len(names):
+        names = ['{}_{}'.format(index, name) for index, name in enumerate(names)]
+    tarballs = {path: pack_bot(path) for path in set(paths)}
+    jobs = make_jobs(paths, names, args.matches, args.seed, args.duplicate, args.rounds,
+                     args.in_process or engine.IN_PROCESS, out_dir,
+                     {path: digest for path, (digest, _) in tarballs.items()})
+    with open('config.py') as config_file:
+        coordinator = Coordinator(jobs, dict(tarballs.values()), config_file.read())
+    server = CoordinatorServer((args.host, args.port), coordinator)
+    Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+    print('Coordinating {} matches on port {}'.format(len(jobs), port))
+    start_time = time.perf_counter()
+    local_workers = start_local_workers(port, args.local_workers, args.slots, out_dir) if args.local_workers else []
+    while not coordinator.done.wait(1.):
+        if local_workers and all(proc.poll() is not None for proc in local_workers) and not coordinator.workers:
+            print('Every local worker exited with matches left')
+            break
+    seconds = time.perf_counter() - start_time
+    for proc in local_workers:
+        try:
+            proc.wait(timeout=10 * WAIT_SECONDS)  # they leave at their next request for a job
+        except subprocess.TimeoutExpired:
+            proc.kill()
+    server.shutdown()
+    server.server_close()
+    pairings = []
+    for pairing, (first, second) in enumerate(combinations(names, 2)):
+        results = sorted((result for result in coordinator.results if result['pairing'] == pairing),
+                         key=lambda result: (result['match'], result['mirrored']))
+        summary = tournament.summarize(results, [first, second]) if results else {'matches': 0}
+        summary['results'] = [{key: value for key, value in result.items() if key != 'deltas'} for result in results]
+        pairings.append(dict(summary, bots=[first, second]))
+    workers = {}
+    for result in coordinator.results:
+        workers[result['worker']] = workers.get(result['worker'], 0) + 1
+    return {'seconds': seconds, 'matches': len(coordinator.results), 'abandoned': coordinator.abandoned,
+            'workers': workers, 'pairings': pairings}
+
+
+class WorkerAgent():
+    '''
+    Plays the coordinator's jobs on this machine, up to `slots` matches at a time.
+    '''
+
+    def __init__(self, address, slots, work_dir):
+        host, _, port = address.rpartition(':')
+        self.slots = slots
+        self.work_dir = os.path.abspath(work_dir)
+        self.name = '{}:{}'.format(socket.gethostname(), os.getpid())
+        sock = socket.create_connection((host or 'localhost', int(port)))
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.connection = sock.makefile('rwb')
+        sock.close()  # the socket file keeps the connection open
+        self.offsets = {}  # job id -> {file name: bytes of it sent so far}
+
+    def request(self, message, payload=b''):
+        send_message(self.connection, message, payload)
+        return receive_message(self.connection)
+
+    def fetch_bot(self, digest):
+        '''
+        Returns the local directory of a bot, downloading and unpacking it the first time.
+        '''
+        path = os.path.join(self.work_dir, 'bots', digest[:16])
+        if not os.path.isdir(path):
+            _, data = self.request({'type': 'bot', 'digest': digest})
+            if hashlib.sha256(data).hexdigest() != digest:
+                raise ValueError('bot {} arrived corrupted'.format(digest[:16]))
+            partial = path + '.partial'
+            shutil.rmtree(partial, ignore_errors=True)
+            with tarfile.open(fileobj=io.BytesIO(data), mode='r:gz') as tar:
+                if hasattr(tarfile, 'data_filter'):
+                    tar.extractall(partial, filter='data')
+                else:
+                    tar.extractall(partial)
+            os.rename(partial, path)
+        return path
+
+    def localize(self, job):
+        '''
+        Rewrites a job for this machine: its bots' paths and its working directory.
+        '''
+        settings = dict(job['settings'])
+        for key in ('PLAYER_1_PATH', 'PLAYER_2_PATH'):
+            settings[key] = self.fetch_bot(job['bots'][settings[key]])
+        return dict(job, settings=settings, directory=os.path.join(self.work_dir, 'matches', job['id']))
+
+    def send_logs(self, job, final=False):
+        '''
+        Sends what has been added to a match's logs since the last call, a chunk at a time.
+
+        While the match runs only the logs the engine appends to are sent. Once it has finished
+        (final) every file is, and the files that are written whole rather than appended to,
+        such as the latency report, are sent from the start.
+        '''
+        directory = os.path.join(self.work_dir, 'matches', job['id'])
+        offsets = self.offsets.setdefault(job['id'], {})
+        if not os.path.isdir(directory):
+            return
+        for name in sorted(os.listdir(directory)):
+            streamed = name.endswith(STREAMED_SUFFIXES)
+            if not (streamed or final):
+                continue
+            offset = offsets.get(name, 0) if streamed else 0
+            with open(os.path.join(directory, name), 'rb') as log_file:
+                log_file.seek(offset)
+                while True:
+                    data = log_file.read(CHUNK_SIZE)
+                    if data or (offset == 0 and name not in offsets):  # an empty file is sent once
+                        self.request({'type': 'file', 'id': job['id'], 'name': name, 'offset': offset}, data)
+                    offset += len(data)
+                    if len(data) < CHUNK_SIZE:
+                        break
+            if streamed:
+                offsets[name] = offset
+
+    def upload(self, job, result):
+        '''
+        Sends the rest of the files of a finished match and then its result, and deletes the
+        local copy.
+        '''
+        self.send_logs(job, final=True)
+        self.request({'type': 'result', 'id': job['id'], 'result': result})
+        self.offsets.pop(job['id'], None)
+        shutil.rmtree(os.path.join(self.work_dir, 'matches', job['id']), ignore_errors=True)
+
+    def run(self):
+        '''
+        Asks for jobs while a slot is free, and reports every match as it finishes, until the
+        coordinator has no more jobs or goes away.
+        '''
+        welcome, config_source = self.request({'type': 'hello', 'worker': self.name, 'slots': self.slots})
+        os.makedirs(self.work_dir, exist_ok=True)
+        with open(os.path.join(self.work_dir, 'config.py'), 'wb') as config_file:
+            config_file.write(config_source)
+        os.chdir(self.work_dir)
+        import tournament  # the engine reads the coordinator's config.py from the working directory
+        running = {}  # future -> job
+        done = False
+        executor = ProcessPoolExecutor(max_workers=self.slots)
+        try:
+            while running or not done:
+                pause = 0.
+                while len(running) < self.slots and not done:
+                    reply, _ = self.request({'type': 'job'})
+                    if reply['type'] == 'done':
+                        done = True
+                    elif reply['type'] == 'wait':
+                        pause = reply['seconds']
+                        break
+                    else:
+                        job = self.localize(reply['job'])
+                        try:
+                            future = executor.submit(tournament.run_match, job)
+                        except BrokenProcessPool:  # broke after the last wait
+                            executor = self.replace_executor(executor)
+                            future = executor.submit(tournament.run_match, job)
+                        running[future] = reply['job']
+                if not running:
+                    time.sleep(pause)
+                    continue
+                finished, _ = wait(running, timeout=min(pause or UPLOAD_INTERVAL, UPLOAD_INTERVAL),
+                                   return_when=FIRST_COMPLETED)
+                broken = False
+                for future in finished:
+                    job = running.pop(future)
+                    if future.exception() is not None:
+                        self.offsets.pop(job['id'], None)
+                        self.request({'type': 'failed', 'id': job['id'], 'error': repr(future.exception())})
+                        broken = broken or isinstance(future.exception(), BrokenProcessPool)
+                    else:
+                        self.upload(job, future.result())
+                if broken:
+                    # a match took its worker process down, e.g. an in-process bot crashing the
+                    # interpreter, and the pool fails every match it was running
+                    for future, job in running.items():
+                        self.offsets.pop(job['id'], None)
+                        self.request({'type': 'failed', 'id': job['id'], 'error': repr(BrokenProcessPool())})
+                    running = {}
+                    executor = self.replace_executor(executor)
+                for job in running.values():
+                    self.send_logs(job)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def replace_executor(self, executor):
+        print('A match broke the process pool - starting a new one')
+        executor.shutdown(wait=False, cancel_futures=True)
+        return ProcessPoolExecutor(max_workers=self.slots)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(prog='python3 cluster.py')
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve = commands.add_parser('serve', help='Coordinate a tournament')
+    serve.add_argument('bots', nargs='+', help='Paths to the pokerbots; every pair plays --matches matches')
+    serve.add_argument('--matches', type=int, default=10, help='Matches per pairing')
+    serve.add_argument('--seed', type=int, default=None, help='Tournament seed, for reproducible deals')
+    serve.add_argument('--rounds', type=int, default=None, help='Rounds per match, NUM_ROUNDS by default')
+    serve.add_argument('--duplicate', action='store_true', help='Replay every seed with the seats swapped')
+    serve.add_argument('--in-process', action='store_true', help='Load the bots into the engine process')
+    serve.add_argument('--host', default='', help='Interface to listen on, all by default')
+    serve.add_argument('--port', type=int, default=0, help='Port to listen on, any free one by default')
+    serve.add_argument('--local-workers', type=int, default=0, help='Worker agents to start on this machine')
+    serve.add_argument('--slots', type=int, default=1, help='Matches at a time per local worker')
+    serve.add_argument('--out', default='cluster', help='Directory for match logs and the summary')
+    work = commands.add_parser('work', help='Play matches for a coordinator')
+    work.add_argument('address', help='HOST:PORT of the coordinator')
+    work.add_argument('--slots', type=int, default=os.cpu_count(), help='Matches at a time')
+    work.add_argument('--work-dir', default='cluster_work', help='Directory for the bots and running matches')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    if args.command == 'work':
+        try:
+            WorkerAgent(args.address, args.slots, args.work_dir).run()
+        except ConnectionError:
+            print('The coordinator went away')
+    else:
+        if args.rounds is None:
+            import engine
+            args.rounds = engine.NUM_ROUNDS
+        summary = serve(args)
+        os.makedirs(args.out, exist_ok=True)
+        with open(os.path.join(args.out, 'summary.json'), 'w') as summary_file:
+            json.dump(summary, summary_file, indent=2)
+        for pairing in summary['pairings']:
+            if pairing['matches']:
+                first = pairing['players'][pairing['bots'][0]]
+                print('{} vs {}: {} matches, {} {:+.1f} per match, 95% CI [{:.1f}, {:.1f}]'.format(
+                    *pairing['bots'], pairing['matches'], pairing['bots'][0], first['mean'], *first['ci95']))
+        if summary['abandoned']:
+            print('Gave up on', len(summary['abandoned']), 'matches:', ', '.join(summary['abandoned']))
+        print('{} matches in {:.1f}s on {} workers'.format(summary['matches'], summary['seconds'], len(summary['workers'])))
@@ -0,0 +1,119 @@
+'''
+Pre-generated deals, so that every bot version can be benchmarked on the same hands.
+
+A corpus file holds, for every round, the order of the 52 cards after the shuffle and the
+bounty pair the engine draws for that round when a new bounty period starts:
+
+    header   8 bytes  MAGIC
+             8 bytes  number of rounds, unsigned little-endian
+    round   52 bytes  card indices into the unshuffled eval7.Deck().cards, top of the deck first
+             2 bytes  bounty rank indices into RANKS, in the round's seat order
+
+The engine reads a corpus when DEAL_CORPUS names one in config.py. The file is memory-mapped
+and each round is decoded only when it is dealt, so a corpus of millions of rounds costs no
+memory up front. A corpus written with a seed deals exactly what the engine deals with that
+master seed (see round_rng):
+
+    python3 deal_corpus.py write deals.bin --rounds 1000000 --seed 1
+    python3 deal_corpus.py show deals.bin --round 17
+'''
+import argparse
+import mmap
+import random
+import struct
+
+import eval7
+
+MAGIC = b'PBDEALS1'
+HEADER = struct.Struct('<8sQ')
+RECORD_SIZE = 54
+RANKS = '23456789TJQKA'
+CARDS = eval7.Deck().cards  # index -> card, in the order of an unshuffled deck
+
+
+def round_rng(seed, round_num, stream):
+    '''
+    Returns the random generator of one round's deck ('deck') or bounty draw ('bounty'),
+    derived from the master seed and the round number alone.
+    '''
+    return random.Random('{}:{}:{}'.format(seed, round_num, stream))
+
+
+def write_corpus(filename, num_rounds, seed):
+    '''
+    Writes the deals of rounds 1 to num_rounds of a match with the given master seed.
+    '''
+    with open(filename, 'wb') as corpus_file:
+        corpus_file.write(HEADER.pack(MAGIC, num_rounds))
+        for round_num in range(1, num_rounds + 1):
+            order = list(range(len(CARDS)))
+            round_rng(seed, round_num, 'deck').shuffle(order)
+            bounty_rng = round_rng(seed, round_num, 'bounty')
+            bounties = [bounty_rng.randint(0, 12), bounty_rng.randint(0, 12)]
+            corpus_file.write(bytes(order + bounties))
+
+
+class DealCorpus():
+    '''
+    A memory-mapped corpus file. Rounds are numbered from 1, like the engine's.
+    '''
+
+    def __init__(self, filename):
+        self.filename = filename
+        with open(filename, 'rb') as corpus_file:
+            self.data = mmap.mmap(corpus_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.num_rounds = HEADER.unpack_from(self.data)
+        if magic != MAGIC or len(self.data) < HEADER.size + self.num_rounds * RECORD_SIZE:
+            self.data.close()
+            raise ValueError(filename + ' is not a complete deal corpus')
+
+    def __len__(self):
+        return self.num_rounds
+
+    def record(self, round_num):
+        if not 1 <= round_num <= self.num_rounds:
+            raise IndexError('{} holds rounds 1 to {}, not {}'.format(self.filename, self.num_rounds, round_num))
+        offset = HEADER.size + (round_num - 1) * RECORD_SIZE
+        return self.data[offset:offset + RECORD_SIZE]
+
+    def cards(self, round_num):
+        '''
+        Returns the round's shuffled deck as a list of eval7 cards, top of the deck first.
+        '''
+        return [CARDS[index] for index in self.record(round_num)[:52]]
+
+    def bounties(self, round_num):
+        '''
+        Returns the round's bounty ranks, in seat order.
+        '''
+        return [RANKS[index] for index in self.record(round_num)[52:]]
+
+    def close(self):
+        self.data.close()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(prog='python3 deal_corpus.py')
+    commands = parser.add_subparsers(dest='command', required=True)
+    write = commands.add_parser('write', help='Write a corpus')
+    write.add_argument('filename', help='Corpus file to write')
+    write.add_argument('--rounds', type=int, required=True, help='Number of rounds')
+    write.add_argument('--seed', type=int, required=True, help='Master seed, as in SEED in config.py')
+    show = commands.add_parser('show', help='Print the deals of a corpus')
+    show.add_argument('filename', help='Corpus file to read')
+    show.add_argument('--round', type=int, default=None, help='Print only this round')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    if args.command == 'write':
+        write_corpus(args.filename, args.rounds, args.seed)
+    else:
+        corpus = DealCorpus(args.filename)
+        print(args.filename, 'holds', len(corpus), 'rounds')
+        for round_num in [args.round] if args.round else range(1, len(corpus) + 1):
+            cards = corpus.cards(round_num)
+            print('Round #{}: hands [{} {}] [{} {}], board [{}], bounties {}'.format(
+                round_num, *cards[:4], ' '.join(map(str, cards[4:9])), ' '.join(corpus.bounties(round_num))))
+        corpus.close()
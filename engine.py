@@ -2,9 +2,12 @@
 6.9630 MIT POKERBOTS GAME ENGINE
 DO NOT REMOVE, RENAME, OR EDIT THIS FILE
 '''
-from collections import namedtuple
-from threading import Thread
-from queue import Queue
+from collections import deque, namedtuple
+from contextlib import redirect_stdout
+from threading import Lock, Thread
+import functools
+import gzip
+import importlib
 import time
 import math
 import json
@@ -14,12 +17,43 @@ import eval7
 import sys
 import os
 import random
+import shutil
+import tempfile
+import traceback
 
 from tqdm import tqdm
 
+import deal_corpus
+import match_stats
+import zygote
+
 sys.path.append(os.getcwd())
 from config import *
 
+# Optional settings. Older config.py files do not define these, so fall back to the defaults.
+IN_PROCESS = globals().get('IN_PROCESS', False)  # load both bots into the engine process
+GAME_LOG_BUFFER_SIZE = globals().get('GAME_LOG_BUFFER_SIZE', 1 << 16)  # bytes of log buffered before a write
+GAME_LOG_FLUSH_INTERVAL = globals().get('GAME_LOG_FLUSH_INTERVAL', 5.)  # seconds between log writes
+GAME_LOG_COMPRESS = globals().get('GAME_LOG_COMPRESS', False)  # gzip the game log
+EVENT_LOG = globals().get('EVENT_LOG', False)  # also write a JSONL event stream next to the game log
+LOG_LEVEL = globals().get('LOG_LEVEL', 'full')  # 'full' text game log, 'structured' (event stream only), 'summary' or 'off'
+LATENCY_REPORT = globals().get('LATENCY_REPORT', True)  # report per-decision latencies at the end of the game
+PLAYER_LOG_MODE = globals().get('PLAYER_LOG_MODE', 'head')  # 'head' keeps the start of a long bot log, 'ring' the start and the end
+PLAYER_LOG_COMPRESS = globals().get('PLAYER_LOG_COMPRESS', False)  # gzip the player logs
+ZYGOTE = globals().get('ZYGOTE', False)  # fork bots that list "preload" modules in commands.json from a zygote
+SEED = globals().get('SEED', None)  # master seed for the deals and bounties, None for a random one
+WARMUP_TIMEOUT = globals().get('WARMUP_TIMEOUT', 0.)  # seconds each bot may spend in Bot.handle_warmup before its game clock starts, 0 to skip
+BOT_CPUS = globals().get('BOT_CPUS', None)  # pin each bot to a core of its own, from 'auto' (all cores) or a list; None to not pin
+BOT_MEMORY_LIMIT = globals().get('BOT_MEMORY_LIMIT', None)  # RLIMIT_AS of each bot in bytes, None for no limit
+BOT_CPU_LIMIT = globals().get('BOT_CPU_LIMIT', None)  # RLIMIT_CPU of each bot in seconds, None for no limit
+DEAL_CORPUS = globals().get('DEAL_CORPUS', None)  # read the deals and bounties from this corpus file (see deal_corpus.py)
+TRANSPORT = globals().get('TRANSPORT', 'tcp')  # 'tcp', 'unix' (AF_UNIX socket) or 'socketpair' (inherited fd), for bots that list it in "transports" in commands.json
+PIPELINE_ACKS = globals().get('PIPELINE_ACKS', False)  # send round results without waiting for the end-of-round acks
+CHECKPOINT_INTERVAL = globals().get('CHECKPOINT_INTERVAL', 0)  # rounds between checkpoints to resume from, 0 for none
+STATS_INTERVAL = globals().get('STATS_INTERVAL', 0)  # rounds between running confidence intervals, 0 for none
+EARLY_STOP = globals().get('EARLY_STOP', False)  # end the match at a report once the interval excludes zero, widened for repeated reports
+EARLY_STOP_PRECISION = globals().get('EARLY_STOP_PRECISION', 0.)  # or once its half-width is below this, in chips per round
+
 FoldAction = namedtuple('FoldAction', [])
 CallAction = namedtuple('CallAction', [])
 CheckAction = namedtuple('CheckAction', [])
@@ -28,6 +62,8 @@ RaiseAction = namedtuple('RaiseAction', ['amount'])
 TerminalState = namedtuple('TerminalState', ['deltas', 'bounty_hits', 'previous_state'])
 
 STREET_NAMES = ['Flop', 'Turn', 'River']
+LOG_LEVELS = ('full', 'structured', 'summary', 'off')
+STATS_SPLITS = ['button', 'big blind', 'no bounty', 'own bounty', 'opponent bounty', 'both bounties']
 DECODE = {'F': FoldAction, 'C': CallAction, 'K': CheckAction, 'R': RaiseAction}
 CCARDS = lambda cards: ','.join(map(str, cards))
 PCARDS = lambda cards: '[{}]'.format(' '.join(map(str, cards)))
@@ -241,12 +277,291 @@ class RoundState(namedtuple('_RoundState', ['button', 'street', 'pips', 'stacks'
         return RoundState(self.button + 1, self.street, new_pips, new_stacks, self.hands, self.deck, self.bounties, self)
 
 
+class MutableRoundState():
+    '''
+    A RoundState that applies actions in place and keeps an undo log.
+
+    proceed() mutates this object instead of allocating a new state plus fresh pips/stacks
+    lists for every action, and undo() reverts the most recent action. The rules themselves
+    (legal_actions, raise_bounds, the bounty payout and showdown) are RoundState's own methods.
+
+    Note that a TerminalState returned by proceed() refers to this object as its previous_state,
+    so it changes along with any later undo().
+    '''
+    __slots__ = ['button', 'street', 'pips', 'stacks', 'hands', 'deck', 'bounties', 'undo_log']
+
+    def __init__(self, button, street, pips, stacks, hands, deck, bounties):
+        self.button = button
+        self.street = street
+        self.pips = list(pips)
+        self.stacks = list(stacks)
+        self.hands = hands
+        self.deck = deck
+        self.bounties = bounties
+        self.undo_log = []
+
+    get_bounty_hits = RoundState.get_bounty_hits
+    get_delta = RoundState.get_delta
+    showdown = RoundState.showdown
+    legal_actions = RoundState.legal_actions
+    raise_bounds = RoundState.raise_bounds
+
+    def proceed_street(self):
+        '''
+        Resets the players' pips and advances to the next round of betting, in place.
+        '''
+        if self.street == 5:
+            return self.showdown()
+        self.button = 1
+        self.street = 3 if self.street == 0 else self.street + 1
+        self.pips[0] = self.pips[1] = 0
+        return self
+
+    def proceed(self, action):
+        '''
+        Applies one action by the active player, in place.
+
+        Returns:
+            This state, or a TerminalState if the action ends the hand.
+        '''
+        self.undo_log.append((self.button, self.street, self.pips[0], self.pips[1], self.stacks[0], self.stacks[1]))
+        active = self.button % 2
+        if isinstance(action, FoldAction):
+            delta = self.get_delta((1 - active) % 2)  # if active folds, the other player (1 - active) wins
+            return TerminalState([delta, -delta], self.get_bounty_hits(), self)
+        if isinstance(action, CallAction):
+            if self.button == 0:  # sb calls bb
+                self.button = 1
+                self.pips[0] = self.pips[1] = BIG_BLIND
+                self.stacks[0] = self.stacks[1] = STARTING_STACK - BIG_BLIND
+                return self
+            # both players acted
+            contribution = self.pips[1-active] - self.pips[active]
+            self.stacks[active] -= contribution
+            self.pips[active] += contribution
+            self.button += 1
+            return self.proceed_street()
+        if isinstance(action, CheckAction):
+            if (self.street == 0 and self.button > 0) or self.button > 1:  # both players acted
+                return self.proceed_street()
+            # let opponent act
+            self.button += 1
+            return self
+        # isinstance(action, RaiseAction)
+        contribution = action.amount - self.pips[active]
+        self.stacks[active] -= contribution
+        self.pips[active] += contribution
+        self.button += 1
+        return self
+
+    def undo(self):
+        '''
+        Reverts the most recent action.
+        '''
+        self.button, self.street, self.pips[0], self.pips[1], self.stacks[0], self.stacks[1] = self.undo_log.pop()
+
+
+class LatencyHistogram():
+    '''
+    An HDR-style latency histogram with log-linear buckets over whole microseconds.
+
+    Each power of two is split into 2 ** (SUB_BUCKET_BITS - 1) linear buckets, so a recorded
+    value is known to within about 3% while memory stays bounded by the dynamic range rather
+    than by the number of decisions.
+    '''
+    SUB_BUCKET_BITS = 6
+
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.total = 0.
+        self.max = 0.
+
+    def bucket(self, micros):
+        '''
+        Returns the bucket index for a value in microseconds.
+        '''
+        shift = max(micros.bit_length() - self.SUB_BUCKET_BITS, 0)
+        return (shift << (self.SUB_BUCKET_BITS - 1)) + (micros >> shift)
+
+    def bucket_high(self, index):
+        '''
+        Returns the highest value in microseconds that falls into the given bucket.
+        '''
+        if index < 1 << self.SUB_BUCKET_BITS:
+            return index
+        shift = (index >> (self.SUB_BUCKET_BITS - 1)) - 1
+        mantissa = index - (shift << (self.SUB_BUCKET_BITS - 1))
+        return ((mantissa + 1) << shift) - 1
+
+    def record(self, seconds):
+        '''
+        Records one latency, in seconds.
+        '''
+        index = self.bucket(int(seconds * 1e6))
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def merge(self, other):
+        '''
+        Adds the values recorded by another histogram to this one.
+        '''
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, percent):
+        '''
+        Returns the latency in seconds at or below which the given percentage of values fall.
+        '''
+        threshold = percent / 100 * self.count
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= threshold:
+                return min(self.bucket_high(index) / 1e6, self.max)
+        return self.max
+
+    def summary(self):
+        '''
+        Returns the count, mean, p50/p90/p99 and max, with latencies in milliseconds.
+        '''
+        return {
+            'count': self.count,
+            'mean_ms': 1e3 * self.total / self.count if self.count else 0.,
+            'p50_ms': 1e3 * self.percentile(50),
+            'p90_ms': 1e3 * self.percentile(90),
+            'p99_ms': 1e3 * self.percentile(99),
+            'max_ms': 1e3 * self.max,
+        }
+
+
+class BotLog():
+    '''
+    Streams a pokerbot's output to its log file as it arrives, capped at PLAYER_LOG_SIZE_LIMIT bytes.
+
+    In 'head' mode everything past the limit is dropped. In 'ring' mode the first half of the
+    limit goes straight to disk and only the most recent half is held in memory, so a log that
+    overflows keeps both its start and its end. Either way a one-line marker records how much
+    was left out. Writes may come from the stdout reader thread and the engine thread at once.
+    '''
+
+    def __init__(self, filename, size_limit=None, mode=None, compress=None):
+        self.compress = PLAYER_LOG_COMPRESS if compress is None else compress
+        self.filename = filename + ('.gz' if self.compress else '')
+        self.size_limit = PLAYER_LOG_SIZE_LIMIT if size_limit is None else size_limit
+        self.mode = PLAYER_LOG_MODE if mode is None else mode
+        self.head_limit = self.size_limit // 2 if self.mode == 'ring' else self.size_limit
+        self.tail_limit = self.size_limit - self.head_limit
+        self.log_file = None
+        self.head_bytes = 0
+        self.tail = deque()
+        self.tail_bytes = 0
+        self.dropped_bytes = 0
+        self.closed = False
+        self.lock = Lock()
+
+    def open(self):
+        if self.log_file is None:
+            self.log_file = gzip.open(self.filename, 'wb') if self.compress else open(self.filename, 'wb')
+
+    def write(self, output):
+        '''
+        Adds some of the pokerbot's output, as bytes or as text.
+        '''
+        if not output or self.closed:
+            return
+        if isinstance(output, str):
+            output = output.encode()
+        with self.lock:
+            if self.head_bytes < self.head_limit:
+                self.open()
+                head = output[:self.head_limit - self.head_bytes]
+                self.log_file.write(head)
+                self.head_bytes += len(head)
+                output = output[len(head):]
+                if not output:
+                    return
+            if self.tail_limit == 0:
+                self.dropped_bytes += len(output)
+                return
+            self.tail.append(output)
+            self.tail_bytes += len(output)
+            while self.tail_bytes - len(self.tail[0]) >= self.tail_limit:
+                self.tail_bytes -= len(self.tail[0])
+                self.dropped_bytes += len(self.tail.popleft())
+            if self.tail_bytes > self.tail_limit:
+                excess = self.tail_bytes - self.tail_limit
+                self.tail[0] = self.tail[0][excess:]
+                self.tail_bytes -= excess
+                self.dropped_bytes += excess
+
+    def flush(self):
+        with self.lock:
+            if self.log_file is not None:
+                self.log_file.flush()
+
+    def close(self):
+        '''
+        Writes the truncation marker and the kept tail, then closes the log file.
+        '''
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+            self.open()
+            if self.dropped_bytes > 0:
+                self.log_file.write('\n[{} bytes of output omitted]\n'.format(self.dropped_bytes).encode())
+            for output in self.tail:
+                self.log_file.write(output)
+            self.log_file.close()
+
+
+def claim_cpu():
+    '''
+    Claims a core from BOT_CPUS that no other pokerbot on this machine holds.
+
+    A claim is an flock on a file per core, so claims hold across engine processes, such as
+    parallel tournament workers, and are released when the holder closes the file or dies.
+
+    Returns:
+        tuple: The core and the open lock file, or (None, None) if every core is taken.
+    '''
+    import fcntl  # POSIX only, like pinning itself
+    cpus = sorted(os.sched_getaffinity(0)) if BOT_CPUS == 'auto' else list(BOT_CPUS)
+    lock_dir = os.path.join(tempfile.gettempdir(), 'pokerbots-cpus')
+    os.makedirs(lock_dir, exist_ok=True)
+    for cpu in cpus:
+        lock_file = open(os.path.join(lock_dir, 'cpu{}.lock'.format(cpu)), 'w')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            continue
+        return cpu, lock_file
+    return None, None
+
+
+def preexec(cpu, limits):
+    '''
+    Returns the preexec_fn that confines a pokerbot started with subprocess before it runs, or
+    None if there is nothing to confine (subprocess forks faster without one).
+    '''
+    if cpu is None and not limits:
+        return None
+    return functools.partial(zygote.confine, cpu, limits)
+
+
 class Player():
     '''
     Handles subprocess and socket interactions with one player's pokerbot.
     '''
 
-    def __init__(self, name, path):
+    def __init__(self, name, path, log_filename=None):
         self.name = name
         self.path = path
         self.game_clock = STARTING_GAME_CLOCK
@@ -254,7 +569,15 @@ class Player():
         self.commands = None
         self.bot_subprocess = None
         self.socketfile = None
-        self.bytes_queue = Queue()
+        self.latencies = {}  # (street, action code) -> LatencyHistogram
+        self.pending_ack = None  # the TerminalState whose ack has not been read yet
+        self.cpu = None  # the core the pokerbot is pinned to
+        self.cpu_lock = None
+        self.resource_usage = None  # the pokerbot's peak RSS and CPU seconds in the last game
+        self.usage_baseline = None  # what it had used when the game started
+        self.startup = {}  # milliseconds from launch to connection, in warmup and for the first decision
+        self.log_filename = log_filename or name + '.txt'
+        self.bot_log = BotLog(self.log_filename)
 
     def build(self):
         '''
@@ -278,12 +601,12 @@ class Player():
                 proc = subprocess.run(self.commands['build'],
                                       stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
                                       cwd=self.path, timeout=BUILD_TIMEOUT, check=False)
-                self.bytes_queue.put(proc.stdout)
+                self.bot_log.write(proc.stdout)
             except subprocess.TimeoutExpired as timeout_expired:
                 error_message = 'Timed out waiting for ' + self.name + ' to build'
                 print(error_message)
-                self.bytes_queue.put(timeout_expired.stdout)
-                self.bytes_queue.put(error_message.encode())
+                self.bot_log.write(timeout_expired.stdout)
+                self.bot_log.write(error_message.encode())
             except (TypeError, ValueError):
                 print(self.name, 'build command misformatted')
             except OSError:
@@ -293,51 +616,250 @@ class Player():
         '''
         Runs the pokerbot and establishes the socket connection.
         '''
-        if self.commands is not None and len(self.commands['run']) > 0:
+        if self.commands is not None and len(self.commands['run']) > 0 and self.supports_transport():
+            socket_dir = None
             try:
-                server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                with server_socket:
-                    server_socket.bind(('', 0))
-                    server_socket.settimeout(CONNECT_TIMEOUT)
-                    server_socket.listen()
-                    port = server_socket.getsockname()[1]
-                    proc = subprocess.Popen(self.commands['run'] + [str(port)],
-                                            stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
-                                            cwd=self.path)
+                start_time = time.perf_counter()
+                if TRANSPORT == 'socketpair':
+                    # the bot inherits its end of an already connected pair, so there is nothing to
+                    # accept; the runner writes a ready line instead once its imports are done
+                    client_socket, bot_socket = socket.socketpair()
+                    with bot_socket:
+                        proc = self.launch('fd:' + str(bot_socket.fileno()), bot_socket)
                     self.bot_subprocess = proc
-                    # function for bot listening
-                    def enqueue_output(out, queue):
-                        try:
-                            for line in out:
-                                if self.path == r"./player_chatbot":
-                                    print(line.strip().decode("utf-8"))
-                                else:
-                                    queue.put(line)
-                        except ValueError:
-                            pass
-                    # start a separate bot listening thread which dies with the program
-                    Thread(target=enqueue_output, args=(proc.stdout, self.bytes_queue), daemon=True).start()
-                    # block until we timeout or the player connects
-                    client_socket, _ = server_socket.accept()
-                    with client_socket:
-                        if self.path == r"./player_chatbot":
-                            client_socket.settimeout(PLAYER_TIMEOUT)
-                        else:
-                            client_socket.settimeout(CONNECT_TIMEOUT)
-                        sock = client_socket.makefile('rw')
-                        self.socketfile = sock
-                        print(self.name, 'connected successfully')
+                    self.capture_output(proc)
+                else:
+                    if TRANSPORT == 'unix':
+                        socket_dir = tempfile.mkdtemp(prefix='pokerbots-')
+                        server_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                        server_socket.bind(os.path.join(socket_dir, self.name + '.sock'))
+                        address = 'unix:' + server_socket.getsockname()
+                    else:
+                        server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                        server_socket.bind(('', 0))
+                        address = str(server_socket.getsockname()[1])
+                    with server_socket:
+                        server_socket.settimeout(CONNECT_TIMEOUT)
+                        server_socket.listen()
+                        proc = self.launch(address)
+                        self.bot_subprocess = proc
+                        self.capture_output(proc)
+                        # block until we timeout or the player connects
+                        client_socket, _ = server_socket.accept()
+                        self.startup['connect_ms'] = 1e3 * (time.perf_counter() - start_time)
+                with client_socket:
+                    timeout = PLAYER_TIMEOUT if self.path == r"./player_chatbot" else CONNECT_TIMEOUT
+                    sock = client_socket.makefile('rw')
+                    if TRANSPORT == 'socketpair':
+                        client_socket.settimeout(CONNECT_TIMEOUT)
+                        # block until we timeout or the player is ready
+                        if sock.readline().strip() != 'ready':
+                            raise ConnectionError('no ready line')
+                        self.startup['connect_ms'] = 1e3 * (time.perf_counter() - start_time)
+                    self.socketfile = sock
+                    self.report_connect('connected successfully', CONNECT_TIMEOUT)
+                    if WARMUP_TIMEOUT:
+                        client_socket.settimeout(WARMUP_TIMEOUT)
+                        self.warm_up()
+                    client_socket.settimeout(timeout)
             except (TypeError, ValueError):
                 print(self.name, 'run command misformatted')
+            except socket.timeout:  # an OSError, so it goes first
+                print('Timed out waiting for', self.name, 'to connect')
             except OSError:
                 print(self.name, 'run failed - check "run" in commands.json')
-            except socket.timeout:
-                print('Timed out waiting for', self.name, 'to connect')
+            finally:
+                if socket_dir is not None:
+                    shutil.rmtree(socket_dir, ignore_errors=True)
+
+    def supports_transport(self):
+        '''
+        Returns True if the pokerbot's runner can connect over TRANSPORT, and prints why not
+        otherwise.
+
+        Runners older than the unix and socketpair transports take only a TCP port, so a bot
+        lists the transports its runner supports under "transports" in commands.json; a bot
+        that lists none is assumed to support only 'tcp'.
+        '''
+        if TRANSPORT == 'tcp' or TRANSPORT in self.commands.get('transports', []):
+            return True
+        print('{} cannot connect over TRANSPORT={!r} - its commands.json does not list it under "transports"'.format(
+            self.name, TRANSPORT))
+        return False
+
+    def report_connect(self, message, limit):
+        '''
+        Prints that the pokerbot is up, with the time it took against its limit in seconds.
+        '''
+        if 'connect_ms' not in self.startup:
+            print(self.name, message)
+            return
+        print('{} {} in {:.0f} ms ({:.0%} of the {:g}s limit)'.format(
+            self.name, message, self.startup['connect_ms'], self.startup['connect_ms'] / 1e3 / limit, limit))
+
+    def warm_up(self):
+        '''
+        Gives the pokerbot up to WARMUP_TIMEOUT seconds in Bot.handle_warmup to precompute, before
+        its game clock starts. A bot that does not finish in time is dropped from the game.
+        '''
+        start_time = time.perf_counter()
+        try:
+            clause = self.exchange(['W'])
+        except OSError:  # including socket.timeout
+            clause = None
+        self.startup['warmup_ms'] = 1e3 * (time.perf_counter() - start_time)
+        if clause != 'K':
+            self.drop(' failed to warm up within {:g}s'.format(WARMUP_TIMEOUT), [])
+        else:
+            print('{} warmed up in {:.0f} ms'.format(self.name, self.startup['warmup_ms']))
+
+    def launch(self, address, bot_socket=None):
+        '''
+        Starts the pokerbot process with the address to connect to: a TCP port, unix:PATH,
+        or fd:N for the inherited bot_socket.
+
+        With ZYGOTE set, a bot whose commands.json lists modules to preload is forked from its
+        zygote instead (see zygote.py), falling back to the run command if that fails.
+        '''
+        cpu, limits = self.confinement()
+        proc = None
+        if ZYGOTE and self.commands.get('preload'):
+            try:
+                proc = zygote.get_zygote(self.path, self.commands).spawn(address, bot_socket, cpu, limits)
+            except OSError:
+                print(self.name, 'zygote failed - starting the bot with its run command')
+        if proc is None:
+            proc = subprocess.Popen(self.commands['run'] + [address],
+                                    stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                    cwd=self.path, pass_fds=[bot_socket.fileno()] if bot_socket else [],
+                                    preexec_fn=preexec(cpu, limits))
+        self.confine(proc.pid, cpu, limits)
+        return proc
+
+    def confinement(self):
+        '''
+        Claims a core for a pokerbot about to start and lists the caps on its address space and
+        CPU time, as set by BOT_CPUS, BOT_MEMORY_LIMIT and BOT_CPU_LIMIT. Linux only.
+
+        The bot's process applies them itself before the bot's code runs (see zygote.confine).
+        A bot over its memory limit fails to allocate, and a bot over its CPU limit is killed;
+        either way the engine sees it disconnect.
+
+        Returns:
+            tuple: The core, or None not to pin, and a list of (resource.RLIMIT_*, value) pairs.
+        '''
+        limits = []
+        try:
+            if BOT_CPUS is not None:
+                self.cpu, self.cpu_lock = claim_cpu()
+                if self.cpu is None:
+                    print(self.name, 'not pinned - every core in BOT_CPUS is taken')
+            if BOT_MEMORY_LIMIT is not None or BOT_CPU_LIMIT is not None:
+                import resource  # POSIX only, and imported here rather than in the forked child
+                if BOT_MEMORY_LIMIT is not None:
+                    limits.append((resource.RLIMIT_AS, BOT_MEMORY_LIMIT))
+                if BOT_CPU_LIMIT is not None:
+                    limits.append((resource.RLIMIT_CPU, BOT_CPU_LIMIT))
+        except (AttributeError, OSError) as error:
+            print(self.name, 'could not be pinned or limited:', error)
+        return self.cpu, limits
+
+    def confine(self, pid, cpu, limits):
+        '''
+        Checks from outside that a started pokerbot is on its core and under its rlimits, and
+        applies with sched_setaffinity and prlimit whatever its process did not. Linux only.
+
+        A child forked by a zygote may not have got to its own zygote.confine yet; setting the
+        same values twice is harmless.
+        '''
+        try:
+            if cpu is not None and os.sched_getaffinity(pid) != {cpu}:
+                os.sched_setaffinity(pid, {cpu})
+            if limits:
+                import resource  # POSIX only
+                for limit, value in limits:
+                    if resource.prlimit(pid, limit) != (value, value):
+                        resource.prlimit(pid, limit, (value, value))
+        except (AttributeError, OSError) as error:
+            print(self.name, 'could not be pinned or limited:', error)
+
+    def measure(self):
+        '''
+        Reads the pokerbot's peak RSS and the CPU seconds it has used from /proc. Linux only.
+
+        Returns:
+            dict: peak_rss_mb and cpu_seconds, or None if the bot is gone or there is no /proc.
+        '''
+        pid = self.bot_subprocess.pid
+        try:
+            with open('/proc/{}/status'.format(pid)) as status_file:
+                peak_rss = next(int(line.split()[1]) for line in status_file if line.startswith('VmHWM:'))
+            with open('/proc/{}/stat'.format(pid)) as stat_file:
+                fields = stat_file.read().rsplit(')', 1)[1].split()  # the fields after the command name
+            cpu_seconds = (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')  # utime + stime
+        except (OSError, StopIteration, ValueError, IndexError):
+            return None
+        return {'peak_rss_mb': peak_rss / 1024, 'cpu_seconds': cpu_seconds}
+
+    def start_usage(self):
+        '''
+        Starts measuring the pokerbot for a new game: the CPU seconds it has used so far become the
+        baseline, and its peak RSS is reset to its current RSS where the kernel allows it.
+        '''
+        self.resource_usage = None
+        self.usage_baseline = None
+        if self.bot_subprocess is None:
+            return
+        try:
+            with open('/proc/{}/clear_refs'.format(self.bot_subprocess.pid), 'w') as clear_refs_file:
+                clear_refs_file.write('5')
+        except OSError:
+            pass
+        self.usage_baseline = self.measure()
+
+    def report_usage(self):
+        '''
+        Measures what the pokerbot used in the game that just ended, and prints it.
+        '''
+        if self.bot_subprocess is None:
+            return
+        self.resource_usage = self.measure()
+        if self.resource_usage is not None and self.usage_baseline is not None:
+            self.resource_usage['cpu_seconds'] = round(
+                self.resource_usage['cpu_seconds'] - self.usage_baseline['cpu_seconds'], 2)  # /proc counts in ticks of 10 ms
+        if self.resource_usage is not None:
+            print('{} used {:.2f} CPU seconds, peak RSS {:.1f} MB{}'.format(
+                self.name, self.resource_usage['cpu_seconds'], self.resource_usage['peak_rss_mb'],
+                '' if self.cpu is None else ', pinned to core {}'.format(self.cpu)))
+
+    def release_cpu(self):
+        if self.cpu_lock is not None:
+            self.cpu_lock.close()
+            self.cpu, self.cpu_lock = None, None
+
+    def capture_output(self, proc):
+        '''
+        Starts a thread that reads the pokerbot's output into its log as it arrives.
+        '''
+        # function for bot listening
+        def enqueue_output(out):
+            try:
+                for line in out:
+                    if self.path == r"./player_chatbot":
+                        print(line.strip().decode("utf-8"))
+                    else:
+                        self.bot_log.write(line)  # a pooled bot gets a new log every game
+            except ValueError:
+                pass
+        # start a separate bot listening thread which dies with the program
+        Thread(target=enqueue_output, args=(proc.stdout,), daemon=True).start()
 
     def stop(self):
         '''
         Closes the socket connection and stops the pokerbot.
         '''
+        if self.pending_ack is not None:
+            self.collect_ack([])
         if self.socketfile is not None:
             try:
                 self.socketfile.write('Q\n')
@@ -352,21 +874,94 @@ class Player():
                     outs, _ = self.bot_subprocess.communicate(timeout=PLAYER_TIMEOUT)
                 else:
                     outs, _ = self.bot_subprocess.communicate(timeout=CONNECT_TIMEOUT)
-                self.bytes_queue.put(outs)
+                self.bot_log.write(outs)
             except subprocess.TimeoutExpired:
                 print('Timed out waiting for', self.name, 'to quit')
                 self.bot_subprocess.kill()
                 outs, _ = self.bot_subprocess.communicate()
-                self.bytes_queue.put(outs)
-        with open(self.name + '.txt', 'wb') as log_file:
-            bytes_written = 0
-            for output in self.bytes_queue.queue:
-                try:
-                    bytes_written += log_file.write(output)
-                    if bytes_written >= PLAYER_LOG_SIZE_LIMIT:
-                        break
-                except TypeError:
-                    pass
+                self.bot_log.write(outs)
+        self.release_cpu()
+        self.bot_log.close()
+
+    def is_connected(self):
+        '''
+        Returns True if the pokerbot can still be queried.
+        '''
+        return self.socketfile is not None
+
+    def reset(self, log_filename):
+        '''
+        Readies a pooled pokerbot for another game.
+
+        The engine-side state (game clock, bankroll, latencies and log) starts over, and the bot
+        gets an N message so that its Runner and Bot.handle_new_game can do the same. A runner
+        that reset confirms with N; older runners answer every unknown clause with K and keep
+        their state, so anything but N counts as a failed reset.
+
+        Returns:
+            bool: True if the pokerbot confirmed the new game.
+        '''
+        if self.pending_ack is not None:
+            self.collect_ack([])  # charged to the game that just ended, before its clock is reset
+        self.game_clock = STARTING_GAME_CLOCK
+        self.bankroll = 0
+        self.latencies = {}
+        self.log_filename = log_filename
+        self.bot_log = BotLog(log_filename)
+        if not self.is_connected():
+            return False
+        try:
+            return self.exchange(['N']) == 'N'
+        except OSError:
+            return False
+
+    def post(self, packet):
+        '''
+        Sends one message to the pokerbot without waiting for its response.
+        '''
+        self.socketfile.write(' '.join(packet) + '\n')
+        self.socketfile.flush()
+
+    def read_response(self):
+        '''
+        Waits for the pokerbot's response to the last message posted and returns its clause.
+        '''
+        return self.socketfile.readline().strip()
+
+    def exchange(self, packet):
+        '''
+        Sends one message to the pokerbot and returns its response clause.
+        '''
+        self.post(packet)
+        return self.read_response()
+
+    def record_latency(self, round_state, clause, latency):
+        '''
+        Records one decision latency, tagged by street and action code.
+
+        End-of-round acks are tagged with the street 'Ack'.
+        '''
+        if isinstance(round_state, TerminalState):
+            street = 'Ack'
+        else:
+            street = 'Preflop' if round_state.street == 0 else STREET_NAMES[round_state.street - 3]
+        key = (street, clause[:1] or '?')
+        if key not in self.latencies:
+            self.latencies[key] = LatencyHistogram()
+        self.latencies[key].record(latency)
+
+    def latency_report(self):
+        '''
+        Summarizes the recorded latencies per street, and per street and action.
+        '''
+        streets = {}
+        for (street, _), histogram in self.latencies.items():
+            streets.setdefault(street, LatencyHistogram()).merge(histogram)
+        return {
+            'streets': {street: histogram.summary() for street, histogram in streets.items()},
+            'actions': {street + ' ' + code: histogram.summary()
+                        for (street, code), histogram in self.latencies.items()},
+        }
 
     def query(self, round_state, player_message, game_log):
         '''
@@ -393,81 +988,543 @@ class Player():
             - Invalid or illegal actions are logged but not executed
             - Bot disconnections or timeouts result in game clock being set to 0
             - At the end of a round, only CheckAction is considered legal
+            - With PIPELINE_ACKS, the end-of-round message is sent without waiting for the ack,
+              which is read by the next query instead (see collect_ack)
         '''
-        legal_actions = round_state.legal_actions() if isinstance(round_state, RoundState) else {CheckAction}
-        if self.socketfile is not None and self.game_clock > 0.:
+        if self.pending_ack is not None:
+            self.collect_ack(game_log)
+        legal_actions = round_state.legal_actions() if not isinstance(round_state, TerminalState) else {CheckAction}
+        if self.is_connected() and self.game_clock > 0.:
             clause = ''
             try:
-                player_message[0] = 'T{:.3f}'.format(self.game_clock)
-                message = ' '.join(player_message) + '\n'
-                del player_message[1:]  # do not send redundant action history
+                packet = self.next_packet(player_message)
+                if PIPELINE_ACKS and isinstance(round_state, TerminalState):
+                    self.post(packet)
+                    self.pending_ack = round_state
+                    return CheckAction()
                 start_time = time.perf_counter()
-                self.socketfile.write(message)
-                self.socketfile.flush()
-                clause = self.socketfile.readline().strip()
+                clause = self.exchange(packet)
                 end_time = time.perf_counter()
-                if ENFORCE_GAME_CLOCK and self.path != r"./player_chatbot":
-                    self.game_clock -= end_time - start_time
-                if self.game_clock <= 0.:
-                    raise socket.timeout
-                action = DECODE[clause[0]]
-                if action in legal_actions:
-                    if clause[0] == 'R':
-                        amount = int(clause[1:])
-                        min_raise, max_raise = round_state.raise_bounds()
-                        if min_raise <= amount <= max_raise:
-                            return action(amount)
-                    else:
-                        return action()
-                game_log.append(self.name + ' attempted illegal ' + action.__name__)
+                if 'first_decision_ms' not in self.startup and not isinstance(round_state, TerminalState):
+                    self.startup['first_decision_ms'] = 1e3 * (end_time - start_time)
+                return self.decode_action(round_state, legal_actions, clause, end_time - start_time, game_log)
             except socket.timeout:
-                error_message = self.name + ' ran out of time'
-                game_log.append(error_message)
-                print(error_message)
-                self.game_clock = 0.
+                self.drop(' ran out of time', game_log)
             except OSError:
-                error_message = self.name + ' disconnected'
-                game_log.append(error_message)
-                print(error_message)
-                self.game_clock = 0.
+                self.drop(' disconnected', game_log)
             except (IndexError, KeyError, ValueError):
                 game_log.append(self.name + ' response misformatted: ' + str(clause))
         return CheckAction() if CheckAction in legal_actions else FoldAction()
 
+    def collect_ack(self, game_log):
+        '''
+        Reads the end-of-round ack that a pipelined query left pending.
+
+        Only the time spent waiting here is charged to the game clock: the part of the bot's
+        end-of-round work that overlaps with the engine's own is free.
+        '''
+        round_state, self.pending_ack = self.pending_ack, None
+        if not self.is_connected() or self.game_clock <= 0.:
+            return
+        clause = ''
+        try:
+            start_time = time.perf_counter()
+            clause = self.read_response()
+            end_time = time.perf_counter()
+            self.decode_action(round_state, {CheckAction}, clause, end_time - start_time, game_log)
+        except socket.timeout:
+            self.drop(' ran out of time', game_log)
+        except OSError:
+            self.drop(' disconnected', game_log)
+        except (IndexError, KeyError, ValueError):
+            game_log.append(self.name + ' response misformatted: ' + str(clause))
+
+    def next_packet(self, player_message):
+        '''
+        Stamps the game clock on the pending player message and returns it as the packet to send.
+        '''
+        player_message[0] = 'T{:.3f}'.format(self.game_clock)
+        packet = list(player_message)
+        del player_message[1:]  # do not send redundant action history
+        return packet
+
+    def decode_action(self, round_state, legal_actions, clause, latency, game_log):
+        '''
+        Charges the response time to the game clock and decodes the response into an action.
+
+        Raises socket.timeout if the game clock ran out, and IndexError/KeyError/ValueError
+        if the response is misformatted. Illegal actions are logged and replaced.
+        '''
+        self.record_latency(round_state, clause, latency)
+        if ENFORCE_GAME_CLOCK and self.path != r"./player_chatbot":
+            self.game_clock -= latency
+        if self.game_clock <= 0.:
+            raise socket.timeout
+        action = DECODE[clause[0]]
+        if action in legal_actions:
+            if clause[0] == 'R':
+                amount = int(clause[1:])
+                min_raise, max_raise = round_state.raise_bounds()
+                if min_raise <= amount <= max_raise:
+                    return action(amount)
+            else:
+                return action()
+        game_log.append(self.name + ' attempted illegal ' + action.__name__)
+        return CheckAction() if CheckAction in legal_actions else FoldAction()
+
+    def drop(self, reason, game_log):
+        '''
+        Stops querying a pokerbot that ran out of time or disconnected.
+        '''
+        error_message = self.name + reason
+        game_log.append(error_message)
+        print(error_message)
+        self.game_clock = 0.
+
+
+def load_pokerbot(path, module_name='player', class_name='Player'):
+    '''
+    Imports a Python pokerbot from its directory and instantiates it, as `python3 player.py` would.
+
+    Every bot directory ships its own `skeleton`, `utils`, etc. under the same module names, so the
+    bot's own modules are dropped from sys.modules once it is constructed. The bot keeps references
+    to them, and a second bot loaded afterwards imports its own copies instead of reusing these.
+
+    Returns:
+        tuple: The pokerbot instance and the bot's `skeleton.actions` and `skeleton.states` modules.
+    '''
+    path = os.path.abspath(path)
+    def is_bot_module(module):
+        files = [getattr(module, '__file__', None)] + list(getattr(module, '__path__', []))
+        return any(file is not None and file.startswith(path + os.sep) for file in files)
+    cwd = os.getcwd()
+    sys.path.insert(0, path)
+    try:
+        os.chdir(path)  # bots load their tables with paths relative to their own directory
+        module = importlib.import_module(module_name)
+        pokerbot = getattr(module, class_name)()
+        actions = sys.modules['skeleton.actions']
+        states = sys.modules['skeleton.states']
+    finally:
+        os.chdir(cwd)
+        sys.path.remove(path)
+        for name, module in list(sys.modules.items()):
+            if is_bot_module(module):
+                del sys.modules[name]
+    return pokerbot, actions, states
+
+
+NEW_GAME = object()  # what InProcessPlayer.receive returns for a confirmed reset
+
+
+class InProcessPlayer(Player):
+    '''
+    Runs one player's Python pokerbot inside the engine process.
+
+    The engine builds exactly the same player messages as for a socket match; this class decodes
+    them into the bot's own GameState/RoundState objects the way skeleton/runner.py does and calls
+    the Bot methods directly, so a headless match produces the same game log and bankrolls without
+    the subprocess, the socket round-trips or the readline latency.
+    '''
+
+    def __init__(self, name, path, log_filename=None):
+        super().__init__(name, path, log_filename)
+        self.pokerbot = None
+        self.actions = None
+        self.states = None
+        self.game_state = None
+        self.round_state = None
+        self.active = 0
+        self.round_flag = True
+        self.response = None  # the clause of the last message posted
+
+    def run(self):
+        '''
+        Imports the pokerbot and constructs its Player, as `python3 player.py` would.
+        '''
+        try:
+            start_time = time.perf_counter()
+            with redirect_stdout(self.bot_log):
+                self.pokerbot, self.actions, self.states = load_pokerbot(self.path)
+            self.startup['connect_ms'] = 1e3 * (time.perf_counter() - start_time)
+            self.game_state = self.states.GameState(0, 0., 1)
+        except Exception:
+            self.bot_log.write(traceback.format_exc())
+            print(self.name, 'failed to load - check player.py in', self.path)
+            return
+        self.report_connect('loaded in-process', CONNECT_TIMEOUT)
+        if WARMUP_TIMEOUT:
+            self.warm_up()  # in-process, the limit is not enforced
+
+    def stop(self):
+        '''
+        Releases the pokerbot and closes its log file.
+        '''
+        self.pokerbot = None
+        super().stop()
+
+    def is_connected(self):
+        '''
+        Returns True if the pokerbot is loaded and has not crashed.
+        '''
+        return self.pokerbot is not None
+
+    def exchange(self, packet):
+        '''
+        Feeds one message to the pokerbot and returns its response clause.
+
+        A bot that raises is treated like a bot that disconnected.
+        '''
+        try:
+            with redirect_stdout(self.bot_log):
+                action = self.receive(packet)
+        except Exception:
+            self.bot_log.write(traceback.format_exc())
+            self.pokerbot = None
+            raise OSError('pokerbot raised an exception')
+        if action is NEW_GAME:
+            return 'N'
+        if isinstance(action, self.actions.FoldAction):
+            return 'F'
+        if isinstance(action, self.actions.CallAction):
+            return 'C'
+        if isinstance(action, self.actions.CheckAction):
+            return 'K'
+        return 'R' + str(action.amount)  # isinstance(action, RaiseAction)
+
+    def post(self, packet):
+        '''
+        Feeds one message to the pokerbot and keeps its response for read_response.
+        '''
+        self.response = self.exchange(packet)
+
+    def read_response(self):
+        return self.response
+
+    def receive(self, packet):
+        '''
+        Updates the bot's view of the game from one message, mirroring skeleton Runner.run.
+
+        Returns:
+            The bot's action, CheckAction as the end-of-round ack, or NEW_GAME for a reset.
+        '''
+        actions, states = self.actions, self.states
+        game_state, round_state, active = self.game_state, self.round_state, self.active
+        new_game = False
+        for clause in packet:
+            if clause[0] == 'T':
+                game_state = game_state._replace(game_clock=float(clause[1:]))
+            elif clause[0] == 'P':
+                active = int(clause[1:])
+            elif clause[0] == 'H':
+                hands = [[], []]
+                hands[active] = clause[1:].split(',')
+                pips = [states.SMALL_BLIND, states.BIG_BLIND]
+                stacks = [states.STARTING_STACK - states.SMALL_BLIND, states.STARTING_STACK - states.BIG_BLIND]
+                round_state = states.RoundState(button=0, street=0, pips=pips, stacks=stacks, hands=hands,
+                                                bounties=None, deck=[], previous_state=None)
+            elif clause[0] == 'G':
+                bounties = ['-1', '-1']
+                bounties[active] = clause[1:]
+                round_state = round_state._replace(bounties=bounties)
+                if self.round_flag:
+                    self.pokerbot.handle_new_round(game_state, round_state, active)
+                    self.round_flag = False
+            elif clause[0] == 'F':
+                round_state = round_state.proceed(actions.FoldAction())
+            elif clause[0] == 'C':
+                round_state = round_state.proceed(actions.CallAction())
+            elif clause[0] == 'K':
+                round_state = round_state.proceed(actions.CheckAction())
+            elif clause[0] == 'R':
+                round_state = round_state.proceed(actions.RaiseAction(int(clause[1:])))
+            elif clause[0] == 'B':
+                round_state = round_state._replace(deck=clause[1:].split(','))
+            elif clause[0] == 'O':
+                # backtrack and reveal the opponent's hand
+                round_state = round_state.previous_state
+                revised_hands = list(round_state.hands)
+                revised_hands[1 - active] = clause[1:].split(',')
+                round_state = states.TerminalState([0, 0], None, round_state._replace(hands=revised_hands))
+            elif clause[0] == 'D':
+                delta = int(clause[1:])
+                deltas = [-delta, -delta]
+                deltas[active] = delta
+                round_state = states.TerminalState(deltas, None, round_state.previous_state)
+                game_state = game_state._replace(bankroll=game_state.bankroll + delta)
+            elif clause[0] == 'N':
+                game_state, round_state = states.GameState(0, 0., 1), None
+                self.round_flag = True
+                if hasattr(self.pokerbot, 'handle_new_game'):  # older skeletons cannot reset
+                    self.pokerbot.handle_new_game()
+                    new_game = True
+            elif clause[0] == 'W':
+                if hasattr(self.pokerbot, 'handle_warmup'):  # older skeletons predate warmup
+                    self.pokerbot.handle_warmup()
+            elif clause[0] == 'Y':
+                hero_hit_bounty, opponent_hit_bounty = clause[1] == '1', clause[2] == '1'
+                if active == 1:
+                    hero_hit_bounty, opponent_hit_bounty = opponent_hit_bounty, hero_hit_bounty
+                round_state = states.TerminalState(round_state.deltas, [hero_hit_bounty, opponent_hit_bounty],
+                                                   round_state.previous_state)
+                self.pokerbot.handle_round_over(game_state, round_state, active)
+                game_state = game_state._replace(round_num=game_state.round_num + 1)
+                self.round_flag = True
+        self.game_state, self.round_state, self.active = game_state, round_state, active
+        if new_game:
+            return NEW_GAME
+        if self.round_flag:  # ack the engine
+            return actions.CheckAction()
+        return self.pokerbot.get_action(game_state, round_state, active)
+
+
+class PlayerPool():
+    '''
+    Keeps pokerbots running and connected from one game to the next.
+
+    Starting a Python bot means a fresh interpreter, its imports and whatever tables it loads
+    before the first hand. A Game given a pool borrows its players from here instead of
+    building and running them, and hands them back afterwards; between games each bot gets an
+    N message and resets itself in Bot.handle_new_game. A bot that does not confirm the reset
+    with N, such as one built on an older skeleton, is stopped and started again.
+    '''
+
+    def __init__(self):
+        self.players = {}  # (name, path) -> Player
+
+    def acquire(self, name, path, log_filename):
+        '''
+        Returns a connected player for a new game, starting its pokerbot if needed.
+        '''
+        player = self.players.pop((name, path), None)
+        if player is not None and not player.reset(log_filename):
+            player.stop()
+            player = None
+        if player is None:
+            player = (InProcessPlayer if IN_PROCESS else Player)(name, path, log_filename)
+            player.build()
+            player.run()
+        self.players[(name, path)] = player
+        return player
+
+    def release(self, player):
+        '''
+        Ends a player's game without stopping its pokerbot.
+        '''
+        player.bot_log.close()
+
+    def discard(self, player):
+        '''
+        Stops a player's pokerbot and drops it from the pool, so that the next game starts a new one.
+        '''
+        if self.players.get((player.name, player.path)) is player:
+            del self.players[(player.name, player.path)]
+        player.stop()
+
+    def close(self):
+        '''
+        Stops every pooled pokerbot.
+        '''
+        for player in self.players.values():
+            player.stop()
+        self.players = {}
+
+
+class GameLog():
+    '''
+    Streams game log lines to disk through a bounded buffer.
+
+    Lines are buffered and written out once the buffer holds GAME_LOG_BUFFER_SIZE bytes or
+    GAME_LOG_FLUSH_INTERVAL seconds have passed since the last write, so memory stays constant
+    however many rounds are played and a crashed match still leaves its log behind.
+    The file content is identical to joining all the lines with newlines.
+    '''
+
+    def __init__(self, filename, extension='.txt', buffer_size=None, flush_interval=None, compress=None):
+        self.compress = GAME_LOG_COMPRESS if compress is None else compress
+        self.filename = filename + extension + ('.gz' if self.compress else '')
+        self.buffer_size = GAME_LOG_BUFFER_SIZE if buffer_size is None else buffer_size
+        self.flush_interval = GAME_LOG_FLUSH_INTERVAL if flush_interval is None else flush_interval
+        self.log_file = None
+        self.buffer = []
+        self.buffered_bytes = 0
+        self.separator = ''
+        self.last_flush = time.monotonic()
+
+    def append(self, line):
+        '''
+        Adds one line to the log.
+        '''
+        self.buffer.append(self.separator + line)
+        self.buffered_bytes += len(line) + 1
+        self.separator = '\n'
+        if self.buffered_bytes >= self.buffer_size or time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        '''
+        Writes the buffered lines out, opening the log file on first use.
+        '''
+        if self.log_file is None:
+            if self.compress:
+                self.log_file = gzip.open(self.filename, 'wt')
+            else:
+                self.log_file = open(self.filename, 'w')
+        self.log_file.write(''.join(self.buffer))
+        self.log_file.flush()  # a sync flush for gzip, so partial logs stay readable
+        self.buffer = []
+        self.buffered_bytes = 0
+        self.last_flush = time.monotonic()
+
+    def checkpoint(self):
+        '''
+        Writes the buffered lines out and returns the size of the log file, to resume from.
+
+        A gzip log ends its current member here, so the file cut at that size is complete.
+        '''
+        self.flush()
+        if self.compress:
+            self.log_file.close()
+            self.log_file = gzip.open(self.filename, 'at')
+        return os.path.getsize(self.filename)
+
+    def resume(self, offset):
+        '''
+        Cuts the log file back to a size returned by checkpoint and appends from there on,
+        dropping any lines buffered so far.
+        '''
+        with open(self.filename, 'r+b') as log_file:
+            log_file.truncate(offset)
+        self.log_file = gzip.open(self.filename, 'at') if self.compress else open(self.filename, 'a')
+        self.buffer = []
+        self.buffered_bytes = 0
+        self.separator = '\n' if offset > 0 else ''
+
+    def close(self):
+        '''
+        Flushes the remaining lines and closes the log file.
+        '''
+        self.flush()
+        self.log_file.close()
+
+
+class NullLog():
+    '''
+    Stands in for the game log at the LOG_LEVELs that write none, dropping every line.
+    '''
+
+    filename = None
+
+    def append(self, line):
+        pass
+
+    def checkpoint(self):
+        return 0
+
+    def resume(self, offset):
+        pass
+
+    def close(self):
+        pass
+
 
 class Game():
     '''
     Manages logging and the high-level game procedure.
     '''
 
-    def __init__(self):
-        self.log = ['6.9630 MIT Pokerbots - ' + PLAYER_1_NAME + ' vs ' + PLAYER_2_NAME]
+    def __init__(self, seed=None, players=None, directory='', pool=None, resume=False, first_round=1, last_round=None,
+                 keep_deltas=False):
+        '''
+        Args:
+            seed: Master seed for the deals and bounties; a random one if None.
+            players: (name, path) for each player; defaults to PLAYER_1/PLAYER_2 from config.py.
+            directory: Where the game log and player logs are written; defaults to the working directory.
+            pool: A PlayerPool to borrow already running pokerbots from.
+            resume: Continue from the last checkpoint in the directory, if there is one.
+            first_round, last_round: Play only these rounds of the match, for a shard (see shards.py).
+            keep_deltas: Keep every player's delta round by round in round_deltas, for the callers
+                that pair or merge matches (see tournament.py); otherwise round_deltas is None.
+        '''
+        if LOG_LEVEL not in LOG_LEVELS:
+            raise ValueError('LOG_LEVEL must be one of {}, not {!r}'.format(', '.join(LOG_LEVELS), LOG_LEVEL))
+        self.players = players or [(PLAYER_1_NAME, PLAYER_1_PATH), (PLAYER_2_NAME, PLAYER_2_PATH)]
+        self.pool = pool
+        self.resume = resume
+        self.checkpoint_filename = os.path.join(directory, GAME_LOG_FILENAME + '_checkpoint.json')
+        self.first_round = first_round
+        self.num_rounds = last_round or NUM_ROUNDS
+        names = [name for name, _ in self.players]
+        self.directory = directory
+        # below 'full', the text log skips every round and only the protocol messages are built
+        self.text_log = LOG_LEVEL == 'full'
+        if LOG_LEVEL in ('full', 'summary'):
+            self.log = GameLog(os.path.join(directory, GAME_LOG_FILENAME))
+        else:
+            self.log = NullLog()
+        self.log.append('6.9630 MIT Pokerbots - ' + names[0] + ' vs ' + names[1])
         self.player_messages = [[], []]
+        self.round_deltas = {name: [] for name in names} if keep_deltas else None
+        if EVENT_LOG or LOG_LEVEL == 'structured':
+            self.events = GameLog(os.path.join(directory, GAME_LOG_FILENAME), extension='.jsonl')
+        else:
+            self.events = None
+        self.folded = False  # whether the last action logged was a fold
+        self.round_num = 0
+        self.clock_samples = {name: [] for name in names}  # (round, game clock left) every 100 rounds
+        # the first player's deltas, overall, by position and by who hit their bounty
+        self.stats = {split: match_stats.RunningStats() for split in ['all'] + STATS_SPLITS}
+        self.seed = seed if seed is not None else random.SystemRandom().getrandbits(63)
+        self.rng = None  # the deck shuffler of the current round, see round_rng
+        self.corpus = deal_corpus.DealCorpus(DEAL_CORPUS) if DEAL_CORPUS else None
+        if self.corpus is not None and len(self.corpus) < self.num_rounds:
+            raise ValueError('{} holds only {} rounds'.format(DEAL_CORPUS, len(self.corpus)))
+
+    def log_event(self, event, **fields):
+        '''
+        Appends one record to the structured event stream.
+
+        Every record carries the event type and the round number. Seats are indices into the
+        round's player order: seat 0 is the small blind, as in the player messages.
+        '''
+        record = {'event': event, 'round': self.round_num}
+        record.update(fields)
+        self.events.append(json.dumps(record, separators=(',', ':')))
 
     def log_round_state(self, players, round_state):
         '''
         Incorporates RoundState information into the game log and player messages.
         '''
         if round_state.street == 0 and round_state.button == 0:
-            self.log.append('{} posts the blind of {}'.format(players[0].name, SMALL_BLIND))
-            self.log.append('{} posts the blind of {}'.format(players[1].name, BIG_BLIND))
-            self.log.append('{} dealt {}'.format(players[0].name, PCARDS(round_state.hands[0])))
-            self.log.append('{} dealt {}'.format(players[1].name, PCARDS(round_state.hands[1])))
+            if self.text_log:
+                self.log.append('{} posts the blind of {}'.format(players[0].name, SMALL_BLIND))
+                self.log.append('{} posts the blind of {}'.format(players[1].name, BIG_BLIND))
+                self.log.append('{} dealt {}'.format(players[0].name, PCARDS(round_state.hands[0])))
+                self.log.append('{} dealt {}'.format(players[1].name, PCARDS(round_state.hands[1])))
             self.player_messages[0] = ['T0.', 'P0', 'H' + CCARDS(round_state.hands[0]), 'G' + round_state.bounties[0]]
             self.player_messages[1] = ['T0.', 'P1', 'H' + CCARDS(round_state.hands[1]), 'G' + round_state.bounties[1]]
+            if self.events is not None:
+                self.log_event('deal', hands=[list(map(str, hand)) for hand in round_state.hands],
+                               pips=round_state.pips, stacks=round_state.stacks)
         elif round_state.street > 0 and round_state.button == 1:
             board = round_state.deck.peek(round_state.street)
-            self.log.append(STREET_NAMES[round_state.street - 3] + ' ' + PCARDS(board) +
-                            PVALUE(players[0].name, STARTING_STACK-round_state.stacks[0]) +
-                            PVALUE(players[1].name, STARTING_STACK-round_state.stacks[1]))
-            self.log.append(f"Current stacks: {round_state.stacks[0]}, {round_state.stacks[1]}")
+            if self.text_log:
+                self.log.append(STREET_NAMES[round_state.street - 3] + ' ' + PCARDS(board) +
+                                PVALUE(players[0].name, STARTING_STACK-round_state.stacks[0]) +
+                                PVALUE(players[1].name, STARTING_STACK-round_state.stacks[1]))
+                self.log.append(f"Current stacks: {round_state.stacks[0]}, {round_state.stacks[1]}")
             compressed_board = 'B' + CCARDS(board)
             self.player_messages[0].append(compressed_board)
             self.player_messages[1].append(compressed_board)
+            if self.events is not None:
+                self.log_event('street', street=round_state.street, board=list(map(str, board)),
+                               pips=round_state.pips, stacks=round_state.stacks)
 
-    def log_action(self, name, action, bet_override):
+    def log_action(self, name, action, bet_override, round_state=None):
         '''
         Incorporates action information into the game log and player messages.
+
+        The event stream records the pips and stacks of round_state, i.e. before the action.
         '''
         if isinstance(action, FoldAction):
             phrasing = ' folds'
@@ -479,24 +1536,33 @@ class Game():
             phrasing = ' checks'
             code = 'K'
         else:  # isinstance(action, RaiseAction)
-            phrasing = (' bets ' if bet_override else ' raises to ') + str(action.amount)
             code = 'R' + str(action.amount)
-        self.log.append(name + phrasing)
+            phrasing = (' bets ' if bet_override else ' raises to ') + code[1:]
+        if self.text_log:
+            self.log.append(name + phrasing)
+        self.folded = code == 'F'
         self.player_messages[0].append(code)
         self.player_messages[1].append(code)
+        if self.events is not None and round_state is not None:
+            fields = {'amount': action.amount} if code[0] == 'R' else {}
+            self.log_event('action', seat=round_state.button % 2, street=round_state.street, action=code[0],
+                           pips=round_state.pips, stacks=round_state.stacks, **fields)
 
     def log_terminal_state(self, players, round_state):
         '''
         Incorporates TerminalState information into the game log and player messages.
         '''
         previous_state = round_state.previous_state
-        if not self.log[-1].endswith(' folds'):
-            self.log.append('{} shows {}'.format(players[0].name, PCARDS(previous_state.hands[0])))
-            self.log.append('{} shows {}'.format(players[1].name, PCARDS(previous_state.hands[1])))
+        showdown = not self.folded
+        if showdown:
+            if self.text_log:
+                self.log.append('{} shows {}'.format(players[0].name, PCARDS(previous_state.hands[0])))
+                self.log.append('{} shows {}'.format(players[1].name, PCARDS(previous_state.hands[1])))
             self.player_messages[0].append('O' + CCARDS(previous_state.hands[1]))
             self.player_messages[1].append('O' + CCARDS(previous_state.hands[0]))
-        self.log.append('{} awarded {}'.format(players[0].name, round_state.deltas[0]))
-        self.log.append('{} awarded {}'.format(players[1].name, round_state.deltas[1]))
+        if self.text_log:
+            self.log.append('{} awarded {}'.format(players[0].name, round_state.deltas[0]))
+            self.log.append('{} awarded {}'.format(players[1].name, round_state.deltas[1]))
         self.player_messages[0].append('D' + str(round_state.deltas[0]))
         self.player_messages[1].append('D' + str(round_state.deltas[1]))
 
@@ -517,69 +1583,361 @@ class Game():
             hit_chars[0] = '#'
         self.player_messages[0].append('Y' + hit_chars[0] + hit_chars[1])
         self.player_messages[1].append('Y' + hit_chars[1] + hit_chars[0])
+        if self.events is not None:
+            board = previous_state.deck.peek(previous_state.street) if previous_state.street > 0 else []
+            self.log_event('end', street=previous_state.street, board=list(map(str, board)), showdown=showdown,
+                           deltas=round_state.deltas, bounty_hits=list(round_state.bounty_hits),
+                           stacks=previous_state.stacks)
 
-    def run_round(self, players, bounties):
+    def round_rng(self, round_num, stream):
         '''
-        Runs one round of poker.
+        Returns a random generator for one round, derived from the master seed alone.
+
+        Every round's deck ('deck') and bounty draw ('bounty') get their own stream, so any
+        range of rounds can be played on its own with the same cards as in the whole match.
+        Private generators also keep in-process bots that draw from `random` from shifting them.
+        '''
+        return deal_corpus.round_rng(self.seed, round_num, stream)
+
+    def deal(self, bounties):
+        '''
+        Shuffles a fresh deck, or takes the round's deck from the corpus, deals both hands and
+        posts the blinds.
         '''
         deck = eval7.Deck()
-        deck.shuffle()
+        if self.corpus is not None:
+            deck.cards = self.corpus.cards(self.round_num)
+        else:
+            self.rng.shuffle(deck.cards)
         hands = [deck.deal(2), deck.deal(2)]
         pips = [SMALL_BLIND, BIG_BLIND]
         stacks = [STARTING_STACK - SMALL_BLIND, STARTING_STACK - BIG_BLIND]
-        round_state = RoundState(0, 0, pips, stacks, hands, deck, bounties, None)
+        return MutableRoundState(0, 0, pips, stacks, hands, deck, bounties)
+
+    def round_steps(self, players, bounties):
+        '''
+        Plays one round of poker as a generator, so that the synchronous and the asyncio engines
+        share it: every query is yielded as (player, round_state, player_message), and the
+        player's action is sent back in. The end-of-round acks are yielded the same way and
+        their actions ignored.
+        '''
+        round_state = self.deal(bounties)
         while not isinstance(round_state, TerminalState):
             self.log_round_state(players, round_state)
             active = round_state.button % 2
             player = players[active]
-            action = player.query(round_state, self.player_messages[active], self.log)
+            action = yield player, round_state, self.player_messages[active]
             bet_override = (round_state.pips == [0, 0])
-            self.log_action(player.name, action, bet_override)
+            self.log_action(player.name, action, bet_override, round_state)
             round_state = round_state.proceed(action)
         self.log_terminal_state(players, round_state)
         for player, player_message, delta in zip(players, self.player_messages, round_state.deltas):
-            player.query(round_state, player_message, self.log)
+            yield player, round_state, player_message
             player.bankroll += delta
+            if self.round_deltas is not None:
+                self.round_deltas[player.name].append(delta)
+        self.update_stats(players, round_state)
 
-    def run(self):
+    def run_round(self, players, bounties):
         '''
-        Runs one game of poker.
+        Runs one round of poker.
         '''
-        print('   __  _____________  ___       __           __        __    ')
-        print('  /  |/  /  _/_  __/ / _ \\___  / /_____ ____/ /  ___  / /____')
-        print(' / /|_/ // /  / /   / ___/ _ \\/  \'_/ -_) __/ _ \\/ _ \\/ __(_-<')
-        print('/_/  /_/___/ /_/   /_/   \\___/_/\\_\\\\__/_/ /_.__/\\___/\\__/___/')
+        steps = self.round_steps(players, bounties)
+        action = None
+        try:
+            while True:
+                player, round_state, player_message = steps.send(action)
+                action = player.query(round_state, player_message, self.log)
+        except StopIteration:
+            pass
+
+    def update_stats(self, players, round_state):
+        '''
+        Adds a finished round to the running statistics, from the first player's point of view.
+        '''
+        seat = 0 if players[0].name == self.players[0][0] else 1
+        own_hit, opponent_hit = round_state.bounty_hits[seat], round_state.bounty_hits[1 - seat]
+        bounty_split = STATS_SPLITS[2 + own_hit + 2 * opponent_hit]
+        for split in ('all', STATS_SPLITS[seat], bounty_split):
+            self.stats[split].add(round_state.deltas[seat])
+
+    def report_stats(self, round_num):
+        '''
+        Prints the first player's mean delta per round with its confidence interval, overall and
+        per split, and logs whether the match can stop early.
+
+        The same match is tested at every report, and a 95% interval checked twenty times
+        excludes zero by chance in about a quarter of even matches. So EARLY_STOP widens the
+        interval by a Bonferroni correction for the number of reports the match has planned,
+        which keeps the chance of stopping an even match early within 5%.
+
+        Returns:
+            bool: True if the match should stop here.
+        '''
+        name = self.players[0][0]
         print()
-        print('Starting the Pokerbots engine...')
-        players = [
-            Player(PLAYER_1_NAME, PLAYER_1_PATH),
-            Player(PLAYER_2_NAME, PLAYER_2_PATH)
-        ]
-        bounties = [-1, -1]
+        print('{} after round {}, chips per round (95% CI):'.format(name, round_num))
+        for split in ['all'] + STATS_SPLITS:
+            mean, _, (low, high) = self.stats[split].mean_ci()
+            print('  {:<16}n={:<8}mean={:<+10.3f}[{:+.3f}, {:+.3f}]'.format(split, self.stats[split].count, mean, low, high))
+        mean, _, (low, high) = self.stats['all'].mean_ci()
+        checks = self.num_rounds // STATS_INTERVAL - (self.first_round - 1) // STATS_INTERVAL
+        z = match_stats.repeated_z(checks)
+        _, _, (stop_low, stop_high) = self.stats['all'].mean_ci(z)
+        reason = None
+        if EARLY_STOP and (stop_low > 0 or stop_high < 0):
+            reason = 'the confidence interval excludes zero (z={:.2f} over {} reports)'.format(z, checks)
+        elif 0 < (high - low) / 2 < EARLY_STOP_PRECISION:
+            reason = 'the confidence interval is narrower than +-{}'.format(EARLY_STOP_PRECISION)
+        if reason is None:
+            return False
+        message = 'Match stopped after round {}: {}'.format(round_num, reason)
+        print(message)
+        self.log.append(message)
+        return True
+
+    def report_latency(self, players):
+        '''
+        Prints each player's decision latencies per street and the game clock left every 100 rounds,
+        and writes the full report, including the per-action breakdown, next to the game log.
+        '''
+        report = {}
+        for player in sorted(players, key=lambda player: player.name):
+            report[player.name] = player.latency_report()
+            report[player.name]['clock'] = self.clock_samples[player.name]
+            if player.resource_usage is not None:
+                report[player.name]['resources'] = player.resource_usage
+            report[player.name]['startup'] = player.startup
+            print(player.name, 'startup (ms):', ', '.join('{} {:.1f}'.format(key[:-3].replace('_', ' '), value)
+                                                    for key, value in player.startup.items()))
+            print(player.name, 'decision latency (ms):')
+            for street in ['Preflop'] + STREET_NAMES + ['Ack']:
+                if street in report[player.name]['streets']:
+                    summary = report[player.name]['streets'][street]
+                    print('  {:<8}n={:<7}p50={:<9.3f}p90={:<9.3f}p99={:<9.3f}max={:.3f}'.format(
+                        street, summary['count'], summary['p50_ms'], summary['p90_ms'],
+                        summary['p99_ms'], summary['max_ms']))
+            print('  clock left:', ', '.join('{}: {:.2f}s'.format(*sample) for sample in self.clock_samples[player.name]))
+        name = os.path.join(self.directory, GAME_LOG_FILENAME + '_latency.json')
+        print('Writing', name)
+        with open(name, 'w') as report_file:
+            json.dump(report, report_file, indent=2)
+
+    def make_players(self):
+        '''
+        Creates and starts both players, with their logs in the game's directory.
+        '''
+        if self.pool is not None:
+            return [self.pool.acquire(name, path, os.path.join(self.directory, name + '.txt')) for name, path in self.players]
+        player_class = InProcessPlayer if IN_PROCESS else Player
+        players = [player_class(name, path, os.path.join(self.directory, name + '.txt')) for name, path in self.players]
         for player in players:
             player.build()
             player.run()
-        for round_num in tqdm(range(1, NUM_ROUNDS + 1)):
+        return players
+
+    def start_round(self, round_num, players, bounties):
+        '''
+        Logs the start of a round and redraws the bounties every ROUNDS_PER_BOUNTY rounds.
+
+        Returns:
+            list: The bounties for this round, in seat order.
+        '''
+        if self.text_log:
             self.log.append('')
             self.log.append('Round #' + str(round_num) + STATUS(players))
-            if round_num % ROUNDS_PER_BOUNTY == 1:
-                cardNames = ['2', '3', '4', '5', '6', '7', '8', '9', 'T', 'J', 'Q', 'K', 'A']
-                bounties = [cardNames[random.randint(0, 12)], cardNames[random.randint(0, 12)]]
+        self.round_num = round_num
+        self.rng = self.round_rng(round_num, 'deck')
+        if round_num % ROUNDS_PER_BOUNTY == 1 or round_num == self.first_round:
+            if round_num % ROUNDS_PER_BOUNTY != 1:
+                # a shard starting mid-way through a bounty period redraws that period's bounties
+                bounties = self.draw_bounties(round_num - (round_num - 1) % ROUNDS_PER_BOUNTY)
+                bounties = bounties[::-1] if (round_num - 1) % ROUNDS_PER_BOUNTY % 2 else bounties
+            else:
+                bounties = self.draw_bounties()
+            if self.text_log:
                 self.log.append(f"Bounties reset to {bounties[0]} for player {players[0].name} and {bounties[1]} for player {players[1].name}")
-            self.run_round(players, bounties)
+        if self.events is not None:
+            self.log_event('round', players=[player.name for player in players], bounties=bounties,
+                           bankrolls=[player.bankroll for player in players])
+        return bounties
+
+    def draw_bounties(self, round_num=None):
+        '''
+        Draws a new bounty rank for each seat, in the seat order of round_num (the current round by default).
+        '''
+        if self.corpus is not None:
+            return self.corpus.bounties(round_num or self.round_num)
+        rng = self.round_rng(round_num or self.round_num, 'bounty')
+        cardNames = ['2', '3', '4', '5', '6', '7', '8', '9', 'T', 'J', 'Q', 'K', 'A']
+        return [cardNames[rng.randint(0, 12)], cardNames[rng.randint(0, 12)]]
+
+    def end_round(self, round_num, players):
+        '''
+        Logs the end of a round and samples the game clocks every 100 rounds.
+        '''
+        if self.text_log:
             self.log.append('Winning counts at the end of the round: ' + STATUS(players))
+        if round_num % 100 == 0:
+            for player in players:
+                self.clock_samples[player.name].append((round_num, player.game_clock))
+
+    def begin(self, players):
+        '''
+        Seats the players for the first round to play, from the last checkpoint when resuming.
+
+        Returns:
+            tuple: The first round, the players in its seat order and its bounties.
+        '''
+        for player in players:
+            player.start_usage()
+        if self.first_round % 2 == 0:
+            players = players[::-1]  # seats alternate every round
+        if self.resume:
+            if os.path.exists(self.checkpoint_filename):
+                return self.load_checkpoint(players)
+            print('No checkpoint found - starting from round 1')
+        return self.first_round, players, [-1, -1]
+
+    def finish_round(self, round_num, players, bounties):
+        '''
+        Ends a round: logs it, swaps the seats, and saves a checkpoint and reports the running
+        statistics when they are due.
+
+        Returns:
+            tuple: The players and bounties in the next round's seat order, and whether the
+            match should stop here.
+        '''
+        self.end_round(round_num, players)
+        players = players[::-1]
+        bounties = bounties[::-1]
+        if CHECKPOINT_INTERVAL and round_num % CHECKPOINT_INTERVAL == 0:
+            self.save_checkpoint(round_num, players, bounties)
+        stop = bool(STATS_INTERVAL) and round_num % STATS_INTERVAL == 0 and self.report_stats(round_num)
+        return players, bounties, stop
+
+    def save_checkpoint(self, round_num, players, bounties):
+        '''
+        Saves what is needed to continue the match after round_num, replacing the last checkpoint.
+
+        Args:
+            round_num: The last round played.
+            players: The players in their seat order for the next round.
+            bounties: The bounties for the next round, in seat order.
+        '''
+        checkpoint = {
+            'round': round_num,
+            'seats': [player.name for player in players],
+            'bankrolls': {player.name: player.bankroll for player in players},
+            'game_clocks': {player.name: player.game_clock for player in players},
+            'bounties': bounties,
+            'seed': self.seed,
+            'log_offset': self.log.checkpoint(),
+            'events_offset': self.events.checkpoint() if self.events is not None else None,
+            'clock_samples': self.clock_samples,
+            'stats': {split: vars(stats) for split, stats in self.stats.items()},
+        }
+        if self.round_deltas is not None:
+            checkpoint['round_deltas'] = self.round_deltas
+        # write a new file and rename it, so a crash mid-write leaves the previous checkpoint
+        temp_filename = self.checkpoint_filename + '.tmp'
+        with open(temp_filename, 'w') as checkpoint_file:
+            json.dump(checkpoint, checkpoint_file)
+        os.replace(temp_filename, self.checkpoint_filename)
+
+    def load_checkpoint(self, players):
+        '''
+        Restores the state saved by save_checkpoint and cuts the logs back to the same point.
+
+        The pokerbots themselves start afresh: they keep their game clock and bankroll, but not
+        what they learned about their opponent before the checkpoint.
+
+        Returns:
+            tuple: The first round to play, the players in seat order and their bounties.
+        '''
+        with open(self.checkpoint_filename) as checkpoint_file:
+            checkpoint = json.load(checkpoint_file)
+        players_by_name = {player.name: player for player in players}
+        players = [players_by_name[name] for name in checkpoint['seats']]
+        for player in players:
+            player.bankroll = checkpoint['bankrolls'][player.name]
+            player.game_clock = checkpoint['game_clocks'][player.name]
+        self.seed = checkpoint['seed']
+        if self.round_deltas is not None:
+            if 'round_deltas' not in checkpoint:
+                raise ValueError('the checkpoint has no per-round deltas to continue from')
+            self.round_deltas = checkpoint['round_deltas']
+        self.clock_samples = checkpoint['clock_samples']
+        self.stats = {split: match_stats.RunningStats(**stats) for split, stats in checkpoint['stats'].items()}
+        self.log.resume(checkpoint['log_offset'])
+        if self.events is not None and checkpoint['events_offset'] is not None:
+            self.events.resume(checkpoint['events_offset'])
+        self.round_num = checkpoint['round']
+        print('Resuming from round', checkpoint['round'] + 1)
+        return checkpoint['round'] + 1, players, checkpoint['bounties']
 
-            players = players[::-1]
-            bounties = bounties[::-1]
+    def close_logs(self, players):
+        '''
+        Logs the final bankrolls and closes the game log and event stream.
+        '''
         self.log.append('')
         self.log.append('Final' + STATUS(players))
+        if self.log.filename is not None:
+            print('Writing', self.log.filename)
+        self.log.close()
+        if self.events is not None:
+            self.events.close()
+
+    def release_players(self, players, failed=False):
+        '''
+        Measures what each player used in the game, then stops its pokerbot or hands it back to
+        the pool. After a failed game a pooled bot may be stuck mid-round, so it is stopped and
+        dropped from the pool instead.
+        '''
         for player in players:
-            player.stop()
-        name = GAME_LOG_FILENAME + '.txt'
-        print('Writing', name)
-        with open(name, 'w') as log_file:
-            log_file.write('\n'.join(self.log))
+            player.report_usage()  # per game, as a pooled bot keeps running
+            if self.pool is None:
+                player.stop()
+            elif failed:
+                self.pool.discard(player)
+            else:
+                self.pool.release(player)
+
+    def run(self):
+        '''
+        Runs one game of poker.
+
+        Returns:
+            dict: The final bankroll of each player, keyed by name.
+        '''
+        print('   __  _____________  ___       __           __        __    ')
+        print('  /  |/  /  _/_  __/ / _ \\___  / /_____ ____/ /  ___  / /____')
+        print(' / /|_/ // /  / /   / ___/ _ \\/  \'_/ -_) __/ _ \\/ _ \\/ __(_-<')
+        print('/_/  /_/___/ /_/   /_/   \\___/_/\\_\\\\__/_/ /_.__/\\___/\\__/___/')
+        print()
+        print('Starting the Pokerbots engine...')
+        print('Deal seed:', self.seed)
+        players = self.make_players()
+        failed = True
+        try:
+            first_round, players, bounties = self.begin(players)
+            try:
+                for round_num in tqdm(range(first_round, self.num_rounds + 1)):
+                    bounties = self.start_round(round_num, players, bounties)
+                    self.run_round(players, bounties)
+                    players, bounties, stop = self.finish_round(round_num, players, bounties)
+                    if stop:
+                        break
+            finally:
+                # leave the partial log behind if the match crashes
+                self.close_logs(players)
+            failed = False
+        finally:
+            self.release_players(players, failed)
+        if LATENCY_REPORT:
+            self.report_latency(players)
+        return {player.name: player.bankroll for player in players}
 
 
 if __name__ == '__main__':
-    Game().run()
+    Game(seed=SEED, resume='--resume' in sys.argv[1:]).run()
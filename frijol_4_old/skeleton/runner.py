@@ -177,21 +177,48 @@ def parse_args():
         default="localhost",
         help="Host to connect to, defaults to localhost",
     )
-    parser.add_argument("port", type=int, help="Port on host to connect to")
+    parser.add_argument(
+        "port",
+        type=str,
+        help="Port on host to connect to, or unix:PATH or fd:N for a local transport",
+    )
     return parser.parse_args()
 
 
+def connect(host, port):
+    """
+    Connects to the engine: over TCP, over the Unix domain socket at unix:PATH,
+    or through the already connected socket fd:N inherited from the engine.
+    """
+    port = str(port)
+    if port.startswith("fd:"):
+        return socket.socket(fileno=int(port[3:]))
+    if port.startswith("unix:"):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(port[5:])
+        except OSError:
+            sock.close()
+            raise
+        return sock
+    return socket.create_connection((host, int(port)))
+
+
 def run_bot(pokerbot, args):
     """
     Runs the pokerbot.
     """
     assert isinstance(pokerbot, Bot)
     try:
-        sock = socket.create_connection((args.host, args.port))
+        sock = connect(args.host, args.port)
     except OSError:
         print("Could not connect to {}:{}".format(args.host, args.port))
         return
     socketfile = sock.makefile("rw")
+    if str(args.port).startswith("fd:"):
+        # an inherited connection has no accept to tell the engine that we are up
+        socketfile.write("ready\n")
+        socketfile.flush()
     runner = Runner(pokerbot, socketfile)
     runner.run()
     socketfile.close()
@@ -5,11 +5,6 @@ import numpy as np
 
 class FrijolBot(Bot):
     def __init__(self):
-        self.game_state = None
-        self.round_state = None
-        self.terminal_state = None
-        self.active = None
-        self.opponent_bounty_distribution = np.zeros(13)
         (self.BTN_opening_range, 
          self.BB_call_range_vs_open, 
          self.BB_3bet_range_vs_open, 
@@ -18,6 +13,15 @@ class FrijolBot(Bot):
          self.BB_call_range_vs_4bet, 
          self.BB_5bet_range_vs_4bet, 
          self.BB_raise_range_vs_limp)=read_starting_ranges("my_starting_ranges.csv")
+        self.handle_new_game()
+
+    def handle_new_game(self):
+        # the starting ranges are loaded once; everything else is learned per game
+        self.game_state = None
+        self.round_state = None
+        self.terminal_state = None
+        self.active = None
+        self.opponent_bounty_distribution = np.zeros(13)
         self.strategy_bankrolls= {"conservative": 0, "mid": 0, "aggressive": 0}
         self.previous_street = None
         self.previosly_raised = False
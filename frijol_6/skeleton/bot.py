@@ -8,6 +8,32 @@ class Bot:
     The base class for a pokerbot.
     """
 
+    def handle_new_game(self):
+        """
+        Called when the engine reuses this bot process for another game, before its first round.
+        Reset any state that should not carry over from the previous game.
+
+        Arguments:
+        Nothing.
+
+        Returns:
+        Nothing.
+        """
+        pass
+
+    def handle_warmup(self):
+        """
+        Called once before the first round when the engine grants a warmup (WARMUP_TIMEOUT),
+        without charging your game clock. Load tables or warm caches here.
+
+        Arguments:
+        Nothing.
+
+        Returns:
+        Nothing.
+        """
+        pass
+
     def handle_new_round(self, game_state, round_state, active):
         """
         Called when a new round starts. Called NUM_ROUNDS times.
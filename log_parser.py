@@ -1,3 +1,4 @@
+import gzip
 import json
 import re
 
@@ -244,6 +245,25 @@ def parse_pokerbots_log_to_json(filepath):
     return rounds
 
 
+def read_event_log(filepath):
+    """
+    Reads the JSONL event stream that the engine writes when EVENT_LOG is set in config.py
+    and groups it by round. Each round is its "round" event plus the list of its
+    deal/street/action/end events, with no regex work needed.
+    """
+    rounds = []
+    opener = gzip.open if filepath.endswith(".gz") else open
+    with opener(filepath, "rt") as infile:
+        for line in infile:
+            event = json.loads(line)
+            if event["event"] == "round":
+                event["events"] = []
+                rounds.append(event)
+            else:
+                rounds[-1]["events"].append(event)
+    return rounds
+
+
 def main():
     filepath = "gamelog.txt"  # Replace with your actual file path
     rounds_data = parse_pokerbots_log_to_json(filepath)
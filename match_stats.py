@@ -0,0 +1,113 @@
+'''
+Statistics helpers for comparing pokerbots from match results.
+'''
+import math
+import statistics
+
+Z_95 = 1.959964
+
+
+def mean_ci(samples, z=Z_95):
+    '''
+    Computes the sample mean with a normal-approximation confidence interval.
+
+    Returns:
+        tuple: (mean, standard error, (low, high)).
+    '''
+    n = len(samples)
+    if n == 0:
+        return 0., 0., (0., 0.)
+    mean = sum(samples) / n
+    if n == 1:
+        return mean, 0., (mean, mean)
+    variance = sum((x - mean) ** 2 for x in samples) / (n - 1)
+    stderr = math.sqrt(variance / n)
+    return mean, stderr, (mean - z * stderr, mean + z * stderr)
+
+
+def duplicate_estimates(deltas, mirrored_deltas, z=Z_95):
+    '''
+    Estimates one player's edge per round from a duplicate pair of matches.
+
+    Both lists hold the same player's per-round deltas, for the same rounds. In the mirrored
+    match the seats and bounties are swapped on the same deals, so round i of one match and
+    round i of the other form a pair in which the card luck cancels out.
+
+    Returns:
+        dict: The paired and unpaired estimates of the mean delta per round, and the variance
+        reduction factor, i.e. how many times fewer rounds the paired estimate needs for the
+        same confidence.
+    '''
+    if len(deltas) != len(mirrored_deltas):
+        raise ValueError('a duplicate pair needs the same rounds, not {} and {}'.format(len(deltas), len(mirrored_deltas)))
+    pairs = [(a + b) / 2 for a, b in zip(deltas, mirrored_deltas)]
+    paired_mean, paired_stderr, paired_ci = mean_ci(pairs, z)
+    unpaired_mean, unpaired_stderr, unpaired_ci = mean_ci(list(deltas) + list(mirrored_deltas), z)
+    return {
+        'rounds': len(pairs),
+        'paired': {'mean': paired_mean, 'stderr': paired_stderr, 'ci': paired_ci},
+        'unpaired': {'mean': unpaired_mean, 'stderr': unpaired_stderr, 'ci': unpaired_ci},
+        'variance_reduction': (unpaired_stderr / paired_stderr) ** 2 if paired_stderr > 0 else math.inf,
+    }
+
+
+def repeated_z(checks, alpha=0.05):
+    '''
+    Returns the z to use when the same growing sample is tested `checks` times, such that the
+    chance that any of the two-sided intervals excludes a true mean of zero stays within alpha
+    (a Bonferroni correction). One check gives the usual 1.96 for alpha 0.05.
+    '''
+    return statistics.NormalDist().inv_cdf(1 - alpha / 2 / max(checks, 1))
+
+
+def sprt_bounds(alpha=0.05, beta=0.05):
+    '''
+    Returns Wald's lower and upper stopping bounds on the log-likelihood ratio, for false
+    positive rate alpha and false negative rate beta.
+    '''
+    return math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha)
+
+
+def sprt_llr(samples, margin):
+    '''
+    Computes the log-likelihood ratio of H1: mean = +margin against H0: mean = -margin.
+
+    The samples are taken as normal with the sample variance standing in for the unknown
+    variance, as in the generalized SPRT used for engine testing. Positive values favour H1.
+    '''
+    n = len(samples)
+    if n < 2:
+        return 0.
+    mean = sum(samples) / n
+    variance = sum((x - mean) ** 2 for x in samples) / (n - 1)
+    if variance == 0:
+        return math.copysign(math.inf, mean) if mean != 0 else 0.
+    return 2 * margin * sum(samples) / variance
+
+
+class RunningStats():
+    '''
+    The mean and variance of a stream of samples, updated one sample at a time (Welford's method).
+    '''
+
+    def __init__(self, count=0, mean=0., m2=0.):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2  # sum of squared deviations from the mean
+
+    def add(self, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+
+    def mean_ci(self, z=Z_95):
+        '''
+        Returns what mean_ci would for all the samples added so far.
+        '''
+        if self.count == 0:
+            return 0., 0., (0., 0.)
+        if self.count == 1:
+            return self.mean, 0., (self.mean, self.mean)
+        stderr = math.sqrt(self.m2 / (self.count - 1) / self.count)
+        return self.mean, stderr, (self.mean - z * stderr, self.mean + z * stderr)
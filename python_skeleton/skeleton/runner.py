@@ -52,6 +52,7 @@ class Runner:
         round_state = None
         active = 0
         round_flag = True
+        new_game = False
         for packet in self.receive():
             for clause in packet:
                 if clause[0] == "T":
@@ -156,9 +157,21 @@ class Runner:
                         game_state.round_num + 1,
                     )
                     round_flag = True
+                elif clause[0] == "N":
+                    game_state = GameState(0, 0.0, 1)
+                    round_state = None
+                    round_flag = True
+                    new_game = True
+                    self.pokerbot.handle_new_game()
+                elif clause[0] == "W":
+                    self.pokerbot.handle_warmup()
                 elif clause[0] == "Q":
                     return
-            if round_flag:  # ack the engine
+            if new_game:  # confirm the reset, which older runners would ack with a plain K
+                self.socketfile.write("N\n")
+                self.socketfile.flush()
+                new_game = False
+            elif round_flag:  # ack the engine
                 self.send(CheckAction())
             else:
                 assert active == round_state.button % 2
@@ -177,21 +190,48 @@ def parse_args():
         default="localhost",
         help="Host to connect to, defaults to localhost",
     )
-    parser.add_argument("port", type=int, help="Port on host to connect to")
+    parser.add_argument(
+        "port",
+        type=str,
+        help="Port on host to connect to, or unix:PATH or fd:N for a local transport",
+    )
     return parser.parse_args()
 
 
+def connect(host, port):
+    """
+    Connects to the engine: over TCP, over the Unix domain socket at unix:PATH,
+    or through the already connected socket fd:N inherited from the engine.
+    """
+    port = str(port)
+    if port.startswith("fd:"):
+        return socket.socket(fileno=int(port[3:]))
+    if port.startswith("unix:"):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(port[5:])
+        except OSError:
+            sock.close()
+            raise
+        return sock
+    return socket.create_connection((host, int(port)))
+
+
 def run_bot(pokerbot, args):
     """
     Runs the pokerbot.
     """
     assert isinstance(pokerbot, Bot)
     try:
-        sock = socket.create_connection((args.host, args.port))
+        sock = connect(args.host, args.port)
     except OSError:
         print("Could not connect to {}:{}".format(args.host, args.port))
         return
     socketfile = sock.makefile("rw")
+    if str(args.port).startswith("fd:"):
+        # an inherited connection has no accept to tell the engine that we are up
+        socketfile.write("ready\n")
+        socketfile.flush()
     runner = Runner(pokerbot, socketfile)
     runner.run()
     socketfile.close()
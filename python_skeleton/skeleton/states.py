@@ -188,3 +188,130 @@ class RoundState(
             self.deck,
             self,
         )
+
+
+class MutableRoundState:
+    """
+    A RoundState that applies actions in place and keeps an undo log, for searching over
+    betting lines without allocating a new state for every action.
+
+    legal_actions, raise_bounds, get_bounty_hits and showdown are RoundState's own methods.
+    A TerminalState returned by proceed() refers to this object as its previous_state,
+    so it changes along with any later undo().
+    """
+
+    __slots__ = [
+        "button",
+        "street",
+        "pips",
+        "stacks",
+        "hands",
+        "bounties",
+        "deck",
+        "undo_log",
+    ]
+
+    def __init__(self, button, street, pips, stacks, hands, bounties, deck):
+        self.button = button
+        self.street = street
+        self.pips = list(pips)
+        self.stacks = list(stacks)
+        self.hands = hands
+        self.bounties = bounties
+        self.deck = deck
+        self.undo_log = []
+
+    @classmethod
+    def from_round_state(cls, round_state):
+        """
+        Copies a RoundState, e.g. the one passed to get_action, into a mutable state.
+        """
+        return cls(
+            round_state.button,
+            round_state.street,
+            round_state.pips,
+            round_state.stacks,
+            round_state.hands,
+            round_state.bounties,
+            round_state.deck,
+        )
+
+    get_bounty_hits = RoundState.get_bounty_hits
+    showdown = RoundState.showdown
+    legal_actions = RoundState.legal_actions
+    raise_bounds = RoundState.raise_bounds
+
+    def proceed_street(self):
+        """
+        Resets the players' pips and advances to the next round of betting, in place.
+        """
+        if self.street == 5:
+            return self.showdown()
+        self.button = 1
+        self.street = 3 if self.street == 0 else self.street + 1
+        self.pips[0] = self.pips[1] = 0
+        return self
+
+    def proceed(self, action):
+        """
+        Applies one action by the active player, in place.
+
+        Returns this state, or a TerminalState if the action ends the hand.
+        """
+        self.undo_log.append(
+            (
+                self.button,
+                self.street,
+                self.pips[0],
+                self.pips[1],
+                self.stacks[0],
+                self.stacks[1],
+            )
+        )
+        active = self.button % 2
+        if isinstance(action, FoldAction):
+            delta = (
+                self.stacks[0] - STARTING_STACK
+                if active == 0
+                else STARTING_STACK - self.stacks[1]
+            )
+            return TerminalState([delta, -delta], self.get_bounty_hits(), self)
+        if isinstance(action, CallAction):
+            if self.button == 0:  # sb calls bb
+                self.button = 1
+                self.pips[0] = self.pips[1] = BIG_BLIND
+                self.stacks[0] = self.stacks[1] = STARTING_STACK - BIG_BLIND
+                return self
+            # both players acted
+            contribution = self.pips[1 - active] - self.pips[active]
+            self.stacks[active] -= contribution
+            self.pips[active] += contribution
+            self.button += 1
+            return self.proceed_street()
+        if isinstance(action, CheckAction):
+            if (
+                self.street == 0 and self.button > 0
+            ) or self.button > 1:  # both players acted
+                return self.proceed_street()
+            # let opponent act
+            self.button += 1
+            return self
+        # isinstance(action, RaiseAction)
+        contribution = action.amount - self.pips[active]
+        self.stacks[active] -= contribution
+        self.pips[active] += contribution
+        self.button += 1
+        return self
+
+    def undo(self):
+        """
+        Reverts the most recent action.
+        """
+        (
+            self.button,
+            self.street,
+            self.pips[0],
+            self.pips[1],
+            self.stacks[0],
+            self.stacks[1],
+        ) = self.undo_log.pop()
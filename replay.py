@@ -0,0 +1,280 @@
+'''
+Replays a recorded match into one pokerbot.
+
+The gamelog holds everything the engine sent to each seat: the hands, the bounties, the board
+and every action. ReplayGame rebuilds every round from the log and feeds the chosen seat the
+exact T/P/H/G/B/O/D/Y message stream it received in the original match, through a socket or
+in-process like a normal engine.Game. The bot's answers are recorded, with their latency,
+but the round always continues with the recorded action, so the bot sees the real positions
+from start to finish and no opponent process is needed.
+
+Run it from the directory holding config.py, like engine.py:
+
+    python3 replay.py gamelog.txt --seat A --bot ./frijol_6 --out replay
+
+The replayed game log in the output directory matches the original line for line as long as
+the bot answers in time. The bot's decisions and their agreement with the recorded actions are
+written to <GAME_LOG_FILENAME>_replay.json next to the usual latency report.
+'''
+import argparse
+import gzip
+import json
+import os
+import re
+import time
+
+import eval7
+
+import engine
+
+ROUND_PATTERN = re.compile(r'^Round #(\d+), (\S+) \((-?\d+)\), (\S+) \((-?\d+)\)$')
+BOUNTY_PATTERN = re.compile(r'^Bounties reset to (\S+) for player (\S+) and (\S+) for player (\S+)$')
+DEALT_PATTERN = re.compile(r'^(\S+) dealt \[(\S+) (\S+)\]$')
+BOARD_PATTERN = re.compile(r'^(?:Flop|Turn|River) \[([^\]]*)\]')
+ACTION_PATTERN = re.compile(r'^(\S+) (folds|calls|checks|bets (\d+)|raises to (\d+))$')
+AWARDED_PATTERN = re.compile(r'^(\S+) awarded (-?\d+)$')
+ACTION_CODES = {'folds': 'F', 'calls': 'C', 'checks': 'K'}
+
+
+def read_gamelog(filepath):
+    '''
+    Parses an engine gamelog into one record per round.
+
+    Returns:
+        list: Dicts with the round number, the seats in order (small blind first), and the
+        bounties, hands, deltas (all keyed by player name), the board as far as it was dealt
+        and the actions as (name, code) pairs, with codes as in the player messages.
+    '''
+    opener = gzip.open if filepath.endswith('.gz') else open
+    rounds = []
+    bounties = {}
+    current = None
+    with opener(filepath, 'rt') as log_file:
+        for line in log_file:
+            line = line.rstrip('\n')
+            match = ROUND_PATTERN.match(line)
+            if match:
+                current = {'round': int(match.group(1)), 'seats': [match.group(2), match.group(4)],
+                           'bounties': bounties, 'hands': {}, 'board': [], 'actions': [], 'deltas': {}}
+                rounds.append(current)
+                continue
+            if current is None:
+                continue
+            match = BOUNTY_PATTERN.match(line)
+            if match:
+                bounties = {match.group(2): match.group(1), match.group(4): match.group(3)}
+                current['bounties'] = bounties
+                continue
+            match = DEALT_PATTERN.match(line)
+            if match:
+                current['hands'][match.group(1)] = [match.group(2), match.group(3)]
+                continue
+            match = BOARD_PATTERN.match(line)
+            if match:
+                current['board'] = match.group(1).split()
+                continue
+            match = ACTION_PATTERN.match(line)
+            if match:
+                amount = match.group(3) or match.group(4)
+                code = 'R' + amount if amount else ACTION_CODES[match.group(2)]
+                current['actions'].append((match.group(1), code))
+                continue
+            match = AWARDED_PATTERN.match(line)
+            if match:
+                current['deltas'][match.group(1)] = int(match.group(2))
+    return [record for record in rounds if len(record['deltas']) == 2]  # drop a round cut off mid-way
+
+
+def decode(code):
+    '''
+    Turns a message action code back into an engine action.
+    '''
+    if code[0] == 'R':
+        return engine.RaiseAction(int(code[1:]))
+    return engine.DECODE[code]()
+
+
+def encode(action):
+    '''
+    Returns the message action code of an engine action.
+    '''
+    if isinstance(action, engine.RaiseAction):
+        return 'R' + str(action.amount)
+    return {engine.FoldAction: 'F', engine.CallAction: 'C', engine.CheckAction: 'K'}[type(action)]
+
+
+class RecordedDeck():
+    '''
+    The part of a deck the engine looks at: the board, as far as it was dealt in the log.
+    '''
+
+    def __init__(self, board):
+        self.cards = [eval7.Card(card) for card in board]
+
+    def peek(self, num_cards):
+        return self.cards[:num_cards]
+
+
+class RecordedPlayer(engine.Player):
+    '''
+    The seat that is not being replayed. Its actions come from the log, so there is no bot.
+    '''
+
+    def build(self):
+        pass
+
+    def run(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def query(self, round_state, player_message, game_log):
+        return engine.CheckAction()
+
+
+class ReplayGame(engine.Game):
+    '''
+    An engine.Game whose deals, bounties and actions come from a recorded match.
+    '''
+
+    def __init__(self, rounds, seat, path, directory=''):
+        '''
+        Args:
+            rounds: Round records from read_gamelog.
+            seat: The name of the player whose messages are replayed.
+            path: The pokerbot that plays that seat.
+            directory: Where the replayed game log, the player log and the reports are written.
+        '''
+        seats = rounds[0]['seats']
+        if seat not in seats:
+            raise ValueError('no player named {} in the gamelog'.format(seat))
+        super().__init__(players=[(name, path if name == seat else None) for name in seats], directory=directory)
+        self.rounds = rounds
+        self.seat = seat
+        self.num_rounds = len(rounds)
+        self.decisions = []
+        self.mismatched_rounds = []
+
+    def make_players(self):
+        players = []
+        for name, path in self.players:
+            if name == self.seat:
+                player_class = engine.InProcessPlayer if engine.IN_PROCESS else engine.Player
+                player = player_class(name, path, os.path.join(self.directory, name + '.txt'))
+                player.build()
+                player.run()
+            else:
+                player = RecordedPlayer(name, path)
+            players.append(player)
+        return players
+
+    def recorded_bounties(self, round_num=None):
+        record = self.rounds[(round_num or self.round_num) - 1]
+        return [record['bounties'][name] for name in record['seats']]
+
+    def draw_bounties(self, round_num=None):
+        return self.recorded_bounties(round_num)
+
+    def start_round(self, round_num, players, bounties):
+        record = self.rounds[round_num - 1]
+        if [player.name for player in players] != record['seats']:
+            raise ValueError('round {} of the gamelog seats {} first'.format(record['round'], record['seats'][0]))
+        super().start_round(round_num, players, bounties)
+        return self.recorded_bounties()
+
+    def deal(self, bounties):
+        record = self.rounds[self.round_num - 1]
+        hands = [[eval7.Card(card) for card in record['hands'][name]] for name in record['seats']]
+        pips = [engine.SMALL_BLIND, engine.BIG_BLIND]
+        stacks = [engine.STARTING_STACK - engine.SMALL_BLIND, engine.STARTING_STACK - engine.BIG_BLIND]
+        return engine.MutableRoundState(0, 0, pips, stacks, hands, RecordedDeck(record['board']), bounties)
+
+    def run_round(self, players, bounties):
+        '''
+        Replays one round through engine.Game.round_steps, asking the replayed seat for its
+        action at each of its decisions and continuing with the recorded action.
+
+        Raises ValueError if the log has another player acting, or too few or too many actions.
+        '''
+        record = self.rounds[self.round_num - 1]
+        actions = iter(record['actions'])
+        steps = self.round_steps(players, bounties)
+        action = None
+        terminal_state = None
+        try:
+            while True:
+                player, round_state, player_message = steps.send(action)
+                if isinstance(round_state, engine.TerminalState):
+                    terminal_state = round_state
+                    action = player.query(round_state, player_message, self.log)
+                    continue
+                name, code = next(actions, (None, None))
+                if name != player.name:
+                    raise ValueError('round {}: expected {} to act, log has {}'.format(
+                        record['round'], player.name, name or 'no more actions'))
+                if player.name == self.seat:
+                    start_time = time.perf_counter()
+                    chosen = player.query(round_state, player_message, self.log)
+                    end_time = time.perf_counter()
+                    self.decisions.append({'round': record['round'], 'street': round_state.street,
+                                           'recorded': code, 'chosen': encode(chosen),
+                                           'latency_ms': 1e3 * (end_time - start_time)})
+                action = decode(code)
+        except StopIteration:
+            pass
+        extra = next(actions, None)
+        if extra is not None:
+            raise ValueError('round {}: the round is over, log has {} to act'.format(record['round'], extra[0]))
+        if terminal_state.deltas != [record['deltas'][name] for name in record['seats']]:
+            self.mismatched_rounds.append(record['round'])
+
+    def report_latency(self, players):
+        super().report_latency([player for player in players if player.name == self.seat])
+
+    def run(self):
+        '''
+        Replays the whole match and writes the bot's decisions.
+
+        Returns:
+            dict: The replayed seat, the number of rounds and decisions, the fraction of decisions
+            that matched the recorded action, and the rounds whose outcome differs from the log
+            (a sign that the log came from an engine with other settings).
+        '''
+        super().run()
+        agreed = sum(decision['chosen'] == decision['recorded'] for decision in self.decisions)
+        summary = {
+            'seat': self.seat,
+            'rounds': self.num_rounds,
+            'num_decisions': len(self.decisions),
+            'agreement': agreed / len(self.decisions) if self.decisions else 0.,
+            'mismatched_rounds': self.mismatched_rounds,
+        }
+        name = os.path.join(self.directory, engine.GAME_LOG_FILENAME + '_replay.json')
+        print('Writing', name)
+        with open(name, 'w') as replay_file:
+            json.dump(dict(summary, decisions=self.decisions), replay_file, indent=2)
+        return summary
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(prog='python3 replay.py')
+    parser.add_argument('gamelog', help='Recorded gamelog, optionally gzipped')
+    parser.add_argument('--seat', required=True, help='Name of the player whose messages are replayed')
+    parser.add_argument('--bot', required=True, help='Path to the pokerbot that plays that seat')
+    parser.add_argument('--rounds', type=int, default=None, help='Replay only the first ROUNDS rounds')
+    parser.add_argument('--in-process', action='store_true', help='Load the bot into the engine process')
+    parser.add_argument('--out', default='replay', help='Directory for the replayed logs and reports')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    engine.IN_PROCESS = args.in_process or engine.IN_PROCESS
+    rounds = read_gamelog(args.gamelog)[:args.rounds]
+    os.makedirs(args.out, exist_ok=True)
+    summary = ReplayGame(rounds, args.seat, os.path.abspath(args.bot), args.out).run()
+    print('{} decisions over {} rounds, {:.1%} agree with the log'.format(
+        summary['num_decisions'], summary['rounds'], summary['agreement']))
+    if summary['mismatched_rounds']:
+        print('Outcomes differ from the log in rounds', summary['mismatched_rounds'][:10])
@@ -0,0 +1,257 @@
+'''
+Ranks several pokerbots against each other with a round-robin of sequential matches.
+
+Every pair of bots plays matches until its winner is statistically clear, or until it
+reaches --max-matches, whichever comes first; matches from all pairings share one process
+pool (see tournament.run_match). Each pairing tracks one sample per match, the first bot's
+mean delta per round (per duplicate pair of matches with --duplicate), and stops on
+
+    --stop sprt: Wald's sequential probability ratio test of "the first bot wins --margin
+                 chips per round" against "the second bot does", at error rates --alpha and
+                 --beta, with the sample variance standing in for the unknown variance;
+    --stop ci:   the confidence interval of the mean excluding zero. It is checked after every
+                 sample, so it is widened for that many checks to keep the chance of a wrong
+                 decision within --alpha (see match_stats.repeated_z).
+
+Sample k of every pairing uses the same deal seed, so all pairings see the same cards.
+Run it from the directory holding config.py, like engine.py:
+
+    python3 round_robin.py frijol-1 frijol-2 frijol-3 frijol-4 frijol_4 frijol_4_old frijol_5 frijol_6 --workers 8 --seed 1
+
+The ranking orders the bots by their mean delta per round against all opponents, each
+opponent weighted equally, with a confidence interval.
+'''
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import combinations
+from statistics import NormalDist
+import argparse
+import json
+import os
+import random
+import time
+
+import engine
+import match_stats
+import tournament
+
+
+class Pairing():
+    '''
+    The sequential match schedule and stopping rule for one pair of bots.
+    '''
+
+    def __init__(self, bots, seeds, out_dir, settings, args):
+        self.bots = bots
+        self.seeds = seeds
+        self.out_dir = out_dir
+        self.settings = settings
+        self.args = args
+        self.scheduled = 0  # samples handed out
+        self.partial = {}  # sample index -> results of a duplicate pair so far
+        self.samples = []  # first bot's mean delta per round, one per completed sample
+        self.matches = 0
+        self.decision = None
+
+    def wants_more(self):
+        return self.decision is None and self.scheduled < self.args.max_matches
+
+    def next_jobs(self):
+        '''
+        Schedules the next sample: one match, or two with the seats swapped in duplicate mode.
+        '''
+        sample = self.scheduled
+        self.scheduled += 1
+        while len(self.seeds) <= sample:
+            self.seeds.append(self.seeds.rng.getrandbits(63))
+        jobs = [tournament.make_job(sample, self.seeds[sample], self.out_dir, self.settings)]
+        if self.args.duplicate:
+            jobs.append(tournament.make_job(sample, self.seeds[sample], self.out_dir, self.settings, mirrored=True))
+        return jobs
+
+    def add_result(self, result):
+        '''
+        Records a finished match, and reruns the stopping rule once its sample is complete.
+        '''
+        if self.decision is not None:
+            return  # the pairing stopped while this match was running
+        self.matches += 1
+        results = self.partial.setdefault(result['match'], [])
+        results.append(result)
+        if len(results) < (2 if self.args.duplicate else 1):
+            return
+        del self.partial[result['match']]
+        deltas = [delta for result in results for delta in result['deltas'][self.bots[0]]]
+        self.samples.append(sum(deltas) / len(deltas))
+        self.update_decision()
+
+    def update_decision(self):
+        if len(self.samples) < self.args.min_matches:
+            return
+        if self.args.stop == 'sprt':
+            lower, upper = match_stats.sprt_bounds(self.args.alpha, self.args.beta)
+            llr = match_stats.sprt_llr(self.samples, self.args.margin)
+            if llr >= upper:
+                self.decision = self.bots[0]
+            elif llr <= lower:
+                self.decision = self.bots[1]
+        else:
+            _, _, (low, high) = match_stats.mean_ci(self.samples, interval_z(self.args))
+            if low > 0:
+                self.decision = self.bots[0]
+            elif high < 0:
+                self.decision = self.bots[1]
+
+    def summary(self):
+        mean, stderr, ci = match_stats.mean_ci(self.samples, interval_z(self.args))
+        summary = {'bots': self.bots, 'samples': len(self.samples), 'matches': self.matches,
+                   'mean': mean, 'stderr': stderr, 'ci': list(ci), 'winner': self.decision}
+        if self.args.stop == 'sprt':
+            summary['llr'] = match_stats.sprt_llr(self.samples, self.args.margin)
+        return summary
+
+
+class SeedList(list):
+    '''
+    Deal seeds shared by every pairing, drawn from the tournament seed as they are needed.
+    '''
+
+    def __init__(self, seed):
+        super().__init__()
+        self.rng = random.Random(seed)
+
+
+def z_score(alpha):
+    '''
+    Returns the normal quantile of a two-sided confidence interval at level 1 - alpha.
+    '''
+    return NormalDist().inv_cdf(1 - alpha / 2)
+
+
+def interval_z(args):
+    '''
+    Returns the z of the pairings' confidence intervals. With --stop ci every pairing checks its
+    interval after each sample from --min-matches to --max-matches, so z is corrected for that
+    many checks.
+    '''
+    if args.stop == 'ci':
+        return match_stats.repeated_z(args.max_matches - args.min_matches + 1, args.alpha)
+    return z_score(args.alpha)
+
+
+def rank(pairings, names, z):
+    '''
+    Averages each bot's mean delta per round over its opponents, weighting them equally.
+
+    Returns:
+        list: One dict per bot, best first, with the score, its confidence interval and the
+        pairings it was declared to win or lose.
+    '''
+    ranking = []
+    for name in names:
+        means, variances, wins, losses = [], [], 0, 0
+        for pairing in pairings:
+            if name not in pairing.bots or not pairing.samples:
+                continue
+            mean, stderr, _ = match_stats.mean_ci(pairing.samples, z)
+            sign = 1 if pairing.bots[0] == name else -1
+            means.append(sign * mean)
+            variances.append(stderr ** 2)
+            wins += pairing.decision == name
+            losses += pairing.decision is not None and pairing.decision != name
+        score = sum(means) / len(means) if means else 0.
+        stderr = sum(variances) ** 0.5 / len(means) if means else 0.
+        ranking.append({'bot': name, 'score': score, 'ci': [score - z * stderr, score + z * stderr],
+                        'wins': wins, 'losses': losses})
+    return sorted(ranking, key=lambda entry: entry['score'], reverse=True)
+
+
+def run_round_robin(pairings, workers):
+    '''
+    Plays the pairings' matches on a process pool until every pairing has stopped.
+    '''
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        running = {}
+
+        def fill():
+            while len(running) < workers:
+                candidates = [pairing for pairing in pairings if pairing.wants_more()]
+                if not candidates:
+                    return
+                pairing = min(candidates, key=lambda pairing: pairing.scheduled)
+                for job in pairing.next_jobs():
+                    running[executor.submit(tournament.run_match, job)] = pairing
+
+        fill()
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                pairing = running.pop(future)
+                if future.cancelled():
+                    continue
+                was_decided = pairing.decision is not None
+                pairing.add_result(future.result())
+                if pairing.decision is not None and not was_decided:
+                    print('{} vs {}: {} wins after {} matches'.format(*pairing.bots, pairing.decision, pairing.matches))
+                    for other, other_pairing in list(running.items()):
+                        if other_pairing is pairing:
+                            other.cancel()
+            fill()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(prog='python3 round_robin.py')
+    parser.add_argument('bots', nargs='+', help='Paths to the pokerbots to rank')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Number of worker processes')
+    parser.add_argument('--seed', type=int, default=None, help='Tournament seed, for reproducible deals')
+    parser.add_argument('--rounds', type=int, default=engine.NUM_ROUNDS, help='Rounds per match')
+    parser.add_argument('--min-matches', type=int, default=4, help='Samples per pairing before it may stop')
+    parser.add_argument('--max-matches', type=int, default=40, help='Samples per pairing at most')
+    parser.add_argument('--stop', choices=['sprt', 'ci'], default='sprt', help='Stopping rule per pairing')
+    parser.add_argument('--margin', type=float, default=1., help='SPRT: edge in chips per round to tell apart')
+    parser.add_argument('--alpha', type=float, default=0.05, help='False positive rate')
+    parser.add_argument('--beta', type=float, default=0.05, help='SPRT: false negative rate')
+    parser.add_argument('--duplicate', action='store_true', help='Play every sample twice with the seats swapped')
+    parser.add_argument('--in-process', action='store_true', help='Load the bots into the engine process')
+    parser.add_argument('--out', default='round_robin', help='Directory for match logs and the summary')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    out_dir = os.path.abspath(args.out)
+    paths = [os.path.abspath(bot) for bot in args.bots]
+    names = [os.path.basename(path) for path in paths]
+    if len(set(names)) < len(names):
+        names = ['{}_{}'.format(index, name) for index, name in enumerate(names)]
+    seeds = SeedList(args.seed)
+    pairings = []
+    for first, second in combinations(range(len(paths)), 2):
+        settings = {
+            'PLAYER_1_NAME': names[first],
+            'PLAYER_2_NAME': names[second],
+            'PLAYER_1_PATH': paths[first],
+            'PLAYER_2_PATH': paths[second],
+            'NUM_ROUNDS': args.rounds,
+            'IN_PROCESS': args.in_process or engine.IN_PROCESS,
+        }
+        pairing_dir = os.path.join(out_dir, '{}_vs_{}'.format(names[first], names[second]))
+        pairings.append(Pairing([names[first], names[second]], seeds, pairing_dir, settings, args))
+    start_time = time.perf_counter()
+    run_round_robin(pairings, args.workers)
+    z = interval_z(args)
+    summary = {
+        'stop': args.stop,
+        'rounds': args.rounds,
+        'seconds': time.perf_counter() - start_time,
+        'matches': sum(pairing.matches for pairing in pairings),
+        'pairings': [pairing.summary() for pairing in pairings],
+        'ranking': rank(pairings, names, z),
+    }
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, 'summary.json'), 'w') as summary_file:
+        json.dump(summary, summary_file, indent=2)
+    print('{:<4}{:<16}{:>10}  {:<22}{}'.format('#', 'bot', 'chips/rd', '{:.0%} CI'.format(1 - args.alpha), 'W-L'))
+    for place, entry in enumerate(summary['ranking'], 1):
+        print('{:<4}{:<16}{:>10.3f}  [{:>8.3f}, {:>8.3f}]  {}-{}'.format(
+            place, entry['bot'], entry['score'], entry['ci'][0], entry['ci'][1], entry['wins'], entry['losses']))
+    print('{} matches in {:.1f}s'.format(summary['matches'], summary['seconds']))
@@ -0,0 +1,202 @@
+'''
+Splits one long match into ranges of rounds played in parallel, and merges the shards back.
+
+The deck and the bounties of every round derive from the match's master seed and the round
+number alone (see engine.Game.round_rng), and a shard starts with the seats and bounties that
+a serial match has at its first round, so each shard deals exactly the cards of those rounds.
+Run it from the directory holding config.py, like engine.py:
+
+    python3 shards.py run --seed 1 --rounds 100000 --shards 8 --workers 8 --out shards
+
+plays rounds 1-12500, 12501-25000, ... in 8 worker processes and merges them into
+shards/gamelog.txt and shards/summary.json. To spread a match over several machines instead,
+play one range on each,
+
+    python3 shards.py run --seed 1 --rounds 25001:50000 --out shards
+
+and merge the shard directories once they are copied together:
+
+    python3 shards.py merge shards/*-*/ --out merged
+
+The merged game log is the serial match's game log line for line, as long as the bots'
+decisions do not depend on earlier rounds: every shard starts fresh bots with a full game
+clock, and their GameState counts bankroll and rounds from the start of the shard.
+'''
+import argparse
+import gzip
+import json
+import os
+import re
+import time
+
+import engine
+import match_stats
+import tournament
+
+STATUS_PATTERN = re.compile(r', (\S+) \((-?\d+)\)')
+STATUS_PREFIXES = ('Round #', 'Winning counts at the end of the round: ', 'Final')
+TRAILER_PREFIXES = ('Final', 'Match stopped after round ')  # what Game writes after the last round
+
+
+def parse_rounds(text):
+    '''
+    Parses --rounds, either LAST or FIRST:LAST.
+    '''
+    first, _, last = text.rpartition(':')
+    return int(first or 1), int(last)
+
+
+def split_rounds(first_round, last_round, num_shards):
+    '''
+    Splits a range of rounds into num_shards contiguous ranges of nearly equal length.
+    '''
+    num_rounds = last_round - first_round + 1
+    bounds = [first_round + num_rounds * shard // num_shards for shard in range(num_shards + 1)]
+    return [(bounds[shard], bounds[shard + 1] - 1) for shard in range(num_shards) if bounds[shard] < bounds[shard + 1]]
+
+
+def make_shard_jobs(seed, ranges, out_dir, settings):
+    '''
+    Builds one tournament job per range of rounds, all with the same master seed.
+
+    A shard has to play its whole range, so early stopping is turned off.
+    '''
+    settings = dict(settings, EARLY_STOP=False, EARLY_STOP_PRECISION=0.)
+    return [{'match': shard, 'seed': seed, 'mirrored': False, 'settings': settings,
+             'first_round': first_round, 'last_round': last_round,
+             'directory': os.path.join(out_dir, '{}-{}'.format(first_round, last_round))}
+            for shard, (first_round, last_round) in enumerate(ranges)]
+
+
+def read_lines(directory):
+    '''
+    Reads a shard's game log, gzipped or not, as a list of lines.
+    '''
+    filename = os.path.join(directory, engine.GAME_LOG_FILENAME + '.txt')
+    if not os.path.exists(filename):
+        with gzip.open(filename + '.gz', 'rt') as log_file:
+            return log_file.read().split('\n')
+    with open(filename) as log_file:
+        return log_file.read().split('\n')
+
+
+def strip_trailer(lines):
+    '''
+    Drops the lines a game log ends with after its last round: the blank line, the final
+    bankrolls and an early stop message, whichever are there.
+    '''
+    while lines and (lines[-1] == '' or lines[-1].startswith(TRAILER_PREFIXES)):
+        lines.pop()
+    return lines
+
+
+def shift_bankrolls(line, offsets):
+    '''
+    Adds the bankrolls won in earlier shards to a line that shows the running bankrolls.
+    '''
+    if not line.startswith(STATUS_PREFIXES):
+        return line
+    return STATUS_PATTERN.sub(lambda match: engine.PVALUE(match.group(1), int(match.group(2)) + offsets[match.group(1)]), line)
+
+
+def merge(directories, out_dir):
+    '''
+    Merges shard directories into the game log and results of one match.
+
+    Returns:
+        dict: The master seed, the players, the range of rounds, the total bankrolls, the first
+        player's mean delta per round with a 95% confidence interval, and the per-round deltas
+        of both players.
+    '''
+    shards = []
+    for directory in directories:
+        with open(os.path.join(directory, 'shard.json')) as shard_file:
+            shards.append(dict(json.load(shard_file), directory=directory))
+    shards.sort(key=lambda shard: shard['first_round'])
+    for previous, shard in zip(shards, shards[1:]):
+        if shard['seed'] != previous['seed']:
+            raise ValueError('shards {} and {} have different seeds'.format(previous['directory'], shard['directory']))
+        if shard['first_round'] != previous['last_round'] + 1:
+            raise ValueError('rounds {}-{} are missing'.format(previous['last_round'] + 1, shard['first_round'] - 1))
+    names = shards[0]['players']
+    for shard in shards:
+        if len(shard['deltas'][names[0]]) != shard['last_round'] - shard['first_round'] + 1:
+            raise ValueError('shard {} stopped before its last round'.format(shard['directory']))
+    offsets = {name: 0 for name in names}
+    deltas = {name: [] for name in names}
+    os.makedirs(out_dir, exist_ok=True)
+    log = engine.GameLog(os.path.join(out_dir, engine.GAME_LOG_FILENAME))
+    for index, shard in enumerate(shards):
+        lines = read_lines(shard['directory'])
+        if index > 0:
+            lines = lines[1:]  # the header
+        if index < len(shards) - 1:
+            lines = strip_trailer(lines)
+        if shard['first_round'] % engine.ROUNDS_PER_BOUNTY != 1:
+            # the bounties a shard redraws when it starts in the middle of a bounty period
+            lines.remove(next(line for line in lines if line.startswith('Bounties reset')))
+        for line in lines:
+            log.append(shift_bankrolls(line, offsets))
+        for name in names:
+            offsets[name] += shard['bankrolls'][name]
+            deltas[name] += shard['deltas'][name]
+    print('Writing', log.filename)
+    log.close()
+    mean, stderr, ci = match_stats.mean_ci(deltas[names[0]])
+    return {'seed': shards[0]['seed'], 'players': names, 'first_round': shards[0]['first_round'],
+            'last_round': shards[-1]['last_round'], 'bankrolls': offsets,
+            'mean': mean, 'stderr': stderr, 'ci95': list(ci), 'deltas': deltas}
+
+
+def write_summary(summary, out_dir):
+    with open(os.path.join(out_dir, 'summary.json'), 'w') as summary_file:
+        json.dump(summary, summary_file)
+    print('Rounds {}-{}: {}, {} {:+.3f} chips per round, 95% CI [{:+.3f}, {:+.3f}]'.format(
+        summary['first_round'], summary['last_round'], summary['bankrolls'], summary['players'][0],
+        summary['mean'], summary['ci95'][0], summary['ci95'][1]))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(prog='python3 shards.py')
+    commands = parser.add_subparsers(dest='command', required=True)
+    run = commands.add_parser(
+        'run', help='Play a range of rounds in shards and merge them',
+        description='Play a range of rounds in shards and merge them. The merged game log equals the '
+                    'serial match only for bots whose decisions do not depend on earlier rounds: each '
+                    'shard starts fresh bots, so bots with their own random state or opponent models '
+                    '(random_legal, the frijol bots) play different actions than in one long match.')
+    run.add_argument('--seed', type=int, required=True, help='Master seed of the match')
+    run.add_argument('--rounds', type=parse_rounds, default=(1, engine.NUM_ROUNDS), help='LAST or FIRST:LAST')
+    run.add_argument('--shards', type=int, default=os.cpu_count(), help='Number of shards')
+    run.add_argument('--workers', type=int, default=os.cpu_count(), help='Number of worker processes')
+    run.add_argument('--in-process', action='store_true', help='Load the bots into the engine process')
+    run.add_argument('--out', default='shards', help='Directory for the shards and the merged match')
+    merge = commands.add_parser('merge', help='Merge shard directories into one match')
+    merge.add_argument('directories', nargs='+', help='Shard directories, each with its shard.json')
+    merge.add_argument('--out', default='merged', help='Directory for the merged match')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    out_dir = os.path.abspath(args.out)
+    if args.command == 'run':
+        settings = {
+            'PLAYER_1_NAME': engine.PLAYER_1_NAME,
+            'PLAYER_2_NAME': engine.PLAYER_2_NAME,
+            'PLAYER_1_PATH': os.path.abspath(engine.PLAYER_1_PATH),
+            'PLAYER_2_PATH': os.path.abspath(engine.PLAYER_2_PATH),
+            'IN_PROCESS': args.in_process or engine.IN_PROCESS,
+        }
+        jobs = make_shard_jobs(args.seed, split_rounds(*args.rounds, args.shards), out_dir, settings)
+        start_time = time.perf_counter()
+        results = tournament.run_tournament(jobs, args.workers)
+        for job, result in zip(jobs, results):
+            with open(os.path.join(job['directory'], 'shard.json'), 'w') as shard_file:
+                json.dump(dict(result, players=[settings['PLAYER_1_NAME'], settings['PLAYER_2_NAME']],
+                               first_round=job['first_round'], last_round=job['last_round']), shard_file)
+        summary = merge([job['directory'] for job in jobs], out_dir)
+        summary['seconds'] = time.perf_counter() - start_time
+    else:
+        summary = merge(args.directories, out_dir)
+    write_summary(summary, out_dir)
@@ -0,0 +1,295 @@
+'''
+Batched heads-up simulator for tuning threshold strategies.
+
+Holds thousands of hands as NumPy arrays (cards, pips, stacks, bounties) and advances all of
+them together, one action per live hand per step. The betting rules follow engine.RoundState:
+legal_actions, raise_bounds, proceed/proceed_street and get_delta, including the bounty payout
+and the rounding of fractional deltas. Policies are vectorized functions of an Observation.
+
+Like engine.py, it reads the game constants from config.py in the working directory:
+
+    python3 simulator.py --hands 100000
+'''
+import argparse
+import time
+
+import eval7
+import numpy as np
+
+import engine
+import match_stats
+
+FOLD, CALL, CHECK, RAISE = 0, 1, 2, 3
+
+RANKS = '23456789TJQKA'
+SUITS = 'cdhs'
+# card code = 4 * rank + suit
+EVAL7_CARDS = [eval7.Card(rank + suit) for rank in RANKS for suit in SUITS]
+
+
+class Observation():
+    '''
+    What the active player sees in each live hand, as arrays aligned with `rows`.
+    '''
+
+    def __init__(self, simulator, rows):
+        self.simulator = simulator
+        self.rows = rows
+        self.street = simulator.street[rows]
+        self.active = simulator.button[rows] % 2
+        self.hole = np.stack([simulator.cards[rows, 2 * self.active], simulator.cards[rows, 2 * self.active + 1]], axis=1)
+        visible = np.arange(5)[None, :] < self.street[:, None]
+        self.board = np.where(visible, simulator.cards[rows, 4:9], -1)
+        self.bounty = simulator.bounties[rows, self.active]
+        self.my_pip = simulator.pips[rows, self.active]
+        self.opp_pip = simulator.pips[rows, 1 - self.active]
+        self.my_stack = simulator.stacks[rows, self.active]
+        self.opp_stack = simulator.stacks[rows, 1 - self.active]
+        self.continue_cost = self.opp_pip - self.my_pip
+        self.pot = 2 * engine.STARTING_STACK - self.my_stack - self.opp_stack
+        # RoundState.legal_actions and RoundState.raise_bounds
+        self.can_raise = np.where(self.continue_cost == 0,
+                                  (self.my_stack > 0) & (self.opp_stack > 0),
+                                  (self.continue_cost != self.my_stack) & (self.opp_stack > 0))
+        max_contribution = np.minimum(self.my_stack, self.opp_stack + self.continue_cost)
+        min_contribution = np.minimum(max_contribution,
+                                      self.continue_cost + np.maximum(self.continue_cost, engine.BIG_BLIND))
+        self.min_raise = self.my_pip + min_contribution
+        self.max_raise = self.my_pip + max_contribution
+
+    def strength(self, samples=16):
+        '''
+        Monte Carlo equity of the active player's hand against a random hand, cached per street.
+        '''
+        return self.simulator.strength(self.rows, self.active, samples)
+
+
+class Simulator():
+    '''
+    Plays a batch of independent hands. Seat 0 is the small blind in every hand.
+    '''
+
+    def __init__(self, num_hands, rng=None, bounties=None):
+        self.rng = np.random.default_rng(rng)
+        self.num_hands = num_hands
+        # each row is a shuffled deck: hands at [0:2] and [2:4], then the board at [4:9]
+        self.cards = np.argsort(self.rng.random((num_hands, 52)), axis=1)[:, :9]
+        self.bounties = self.rng.integers(0, 13, (num_hands, 2)) if bounties is None else np.asarray(bounties)
+        self.button = np.zeros(num_hands, dtype=np.int64)
+        self.street = np.zeros(num_hands, dtype=np.int64)
+        self.pips = np.tile(np.array([engine.SMALL_BLIND, engine.BIG_BLIND], dtype=np.int64), (num_hands, 1))
+        self.stacks = engine.STARTING_STACK - self.pips
+        self.live = np.ones(num_hands, dtype=bool)
+        self.deltas = np.zeros((num_hands, 2), dtype=np.int64)
+        self.strength_cache = np.full((num_hands, 2, 6), np.nan)
+
+    def bounty_hits(self, rows):
+        '''
+        Vectorized RoundState.get_bounty_hits: the bounty rank in the hole cards or on the board so far.
+        '''
+        ranks = self.cards[rows] // 4
+        visible = np.arange(5)[None, :] < self.street[rows][:, None]
+        board_ranks = np.where(visible, ranks[:, 4:9], -1)
+        hits = []
+        for seat in (0, 1):
+            bounty = self.bounties[rows, seat][:, None]
+            hits.append((ranks[:, 2 * seat:2 * seat + 2] == bounty).any(axis=1) | (board_ranks == bounty).any(axis=1))
+        return hits
+
+    def finish(self, rows, winner):
+        '''
+        Ends the given hands, applying RoundState.get_delta to each. winner is 0, 1 or 2 (split).
+        '''
+        hit0, hit1 = self.bounty_hits(rows)
+        stacks = self.stacks[rows].astype(np.float64)
+        split = (engine.STARTING_STACK - stacks[:, 0]) * (engine.BOUNTY_RATIO - 1) / 2 + engine.BOUNTY_CONSTANT
+        split = np.where(hit0 & ~hit1, split, np.where(~hit0 & hit1, -split, 0.))
+        won0 = engine.STARTING_STACK - stacks[:, 1]
+        won0 = np.where(hit0, won0 * engine.BOUNTY_RATIO + engine.BOUNTY_CONSTANT, won0)
+        won1 = stacks[:, 0] - engine.STARTING_STACK
+        won1 = np.where(hit1, won1 * engine.BOUNTY_RATIO - engine.BOUNTY_CONSTANT, won1)
+        delta = np.select([winner == 0, winner == 1], [won0, won1], split)
+        # if delta is not an integer, round it down or up depending on who's in position
+        fractional = np.abs(delta - np.floor(delta)) > 1e-6
+        rounded = np.where(self.button[rows] % 2 == 0, np.floor(delta), np.ceil(delta))
+        delta = np.where(fractional, rounded, delta).astype(np.int64)
+        self.deltas[rows, 0] = delta
+        self.deltas[rows, 1] = -delta
+        self.live[rows] = False
+
+    def showdown(self, rows):
+        '''
+        Compares the hands with eval7 and ends them.
+        '''
+        winner = np.empty(len(rows), dtype=np.int64)
+        for i, cards in enumerate(self.cards[rows].tolist()):
+            board = [EVAL7_CARDS[card] for card in cards[4:9]]
+            score0 = eval7.evaluate(board + [EVAL7_CARDS[cards[0]], EVAL7_CARDS[cards[1]]])
+            score1 = eval7.evaluate(board + [EVAL7_CARDS[cards[2]], EVAL7_CARDS[cards[3]]])
+            winner[i] = 0 if score0 > score1 else 1 if score0 < score1 else 2
+        self.finish(rows, winner)
+
+    def proceed_street(self, rows):
+        '''
+        Vectorized RoundState.proceed_street.
+        '''
+        river = self.street[rows] == 5
+        self.showdown(rows[river])
+        rows = rows[~river]
+        self.button[rows] = 1
+        self.street[rows] = np.where(self.street[rows] == 0, 3, self.street[rows] + 1)
+        self.pips[rows] = 0
+
+    def proceed(self, rows, codes, amounts):
+        '''
+        Vectorized RoundState.proceed: applies one action per hand.
+        '''
+        active = self.button[rows] % 2
+        folds = codes == FOLD
+        self.finish(rows[folds], 1 - active[folds])  # if active folds, the other player wins
+        raises = codes == RAISE
+        raise_rows, raise_active = rows[raises], active[raises]
+        self.stacks[raise_rows, raise_active] -= amounts[raises] - self.pips[raise_rows, raise_active]
+        self.pips[raise_rows, raise_active] = amounts[raises]
+        self.button[raise_rows] += 1
+        calls = codes == CALL
+        blind_calls = calls & (self.button[rows] == 0)  # sb calls bb
+        self.button[rows[blind_calls]] = 1
+        self.pips[rows[blind_calls]] = engine.BIG_BLIND
+        self.stacks[rows[blind_calls]] = engine.STARTING_STACK - engine.BIG_BLIND
+        calls &= ~blind_calls
+        call_rows, call_active = rows[calls], active[calls]
+        contribution = self.pips[call_rows, 1 - call_active] - self.pips[call_rows, call_active]
+        self.stacks[call_rows, call_active] -= contribution
+        self.pips[call_rows, call_active] += contribution
+        self.button[call_rows] += 1
+        checks = codes == CHECK
+        both_acted = ((self.street[rows] == 0) & (self.button[rows] > 0)) | (self.button[rows] > 1)
+        self.button[rows[checks & ~both_acted]] += 1
+        self.proceed_street(np.concatenate([call_rows, rows[checks & both_acted]]))
+
+    def legalize(self, observation, codes, amounts):
+        '''
+        Replaces illegal actions the way engine.Player.query does: check if legal, otherwise fold.
+        '''
+        codes = np.asarray(codes, dtype=np.int64)
+        amounts = np.asarray(amounts, dtype=np.int64)
+        cost = observation.continue_cost
+        legal = ((codes == FOLD) | ((codes == CALL) & (cost > 0)) | ((codes == CHECK) & (cost == 0)) |
+                 ((codes == RAISE) & observation.can_raise &
+                  (observation.min_raise <= amounts) & (amounts <= observation.max_raise)))
+        return np.where(legal, codes, np.where(cost == 0, CHECK, FOLD)), amounts
+
+    def play(self, policies):
+        '''
+        Plays every hand to the end.
+
+        Args:
+            policies: One vectorized policy per seat. Each takes an Observation and returns
+                arrays of action codes and raise-to amounts for its rows.
+
+        Returns:
+            numpy.ndarray: The (num_hands, 2) deltas per seat.
+        '''
+        while self.live.any():
+            live_rows = np.flatnonzero(self.live)
+            seats = self.button[live_rows] % 2
+            for seat in (0, 1):
+                observation = Observation(self, live_rows[seats == seat])
+                if len(observation.rows) > 0:
+                    codes, amounts = self.legalize(observation, *policies[seat](observation))
+                    self.proceed(observation.rows, codes, amounts)
+        return self.deltas
+
+    def strength(self, rows, seats, samples):
+        '''
+        Estimates each seat's equity against a random hand on the current street, caching the result.
+
+        The unseen cards are drawn for all hands at once; only the eval7 comparisons loop in Python.
+        '''
+        streets = self.street[rows]
+        cached = self.strength_cache[rows, seats, streets]
+        missing = np.flatnonzero(np.isnan(cached))
+        if len(missing) == 0:
+            return cached
+        rows, seats, streets = rows[missing], seats[missing], streets[missing]
+        n = len(rows)
+        # known cards: the seat's hole cards, then the board so far (padded with repeats of the hole cards)
+        board_slots = np.arange(5)[None, :] < streets[:, None]
+        hole = np.stack([self.cards[rows, 2 * seats], self.cards[rows, 2 * seats + 1]], axis=1)
+        board = np.where(board_slots, self.cards[rows, 4:9], hole[:, :1])
+        known = np.zeros((n, 52), dtype=bool)
+        known[np.arange(n)[:, None], np.concatenate([hole, board], axis=1)] = True
+        # per sample, the 7 lowest random keys among the unseen cards: 2 for the opponent, 5 for the board
+        keys = self.rng.random((samples, n, 52))
+        keys[:, known] = np.inf
+        drawn = np.argpartition(keys, 7, axis=2)[:, :, :7]
+        full_board = np.where(board_slots[None], board[None], drawn[:, :, 2:])
+        wins = np.zeros(n)
+        hole, full_board, opponent = hole.tolist(), full_board.tolist(), drawn[:, :, :2].tolist()
+        for sample in range(samples):
+            for i in range(n):
+                board_cards = [EVAL7_CARDS[card] for card in full_board[sample][i]]
+                score = eval7.evaluate(board_cards + [EVAL7_CARDS[card] for card in hole[i]])
+                opp_score = eval7.evaluate(board_cards + [EVAL7_CARDS[card] for card in opponent[sample][i]])
+                wins[i] += 1. if score > opp_score else .5 if score == opp_score else 0.
+        cached[missing] = wins / samples
+        self.strength_cache[rows, seats, streets] = cached[missing]
+        return cached
+
+
+def threshold_policy(raise_probs, raise_threshold, odds_offset, samples=16):
+    '''
+    Vectorized version of frijol_6's postflop rule: continue when the hand strength beats the pot
+    odds plus odds_offset, and raise to 3x the pot with probability raise_probs[i] when it also
+    clears the pot-scaled raise_threshold[i] (i = 0 when not facing a bet, else 1).
+    Preflop it simply checks or calls.
+    '''
+    def policy(observation):
+        n = len(observation.rows)
+        strength = observation.strength(samples)
+        cost = observation.continue_cost
+        pot_odds = cost / (observation.pot + cost)
+        facing_bet = (observation.my_pip > 0).astype(np.int64)
+        threshold = 1 - (350 - observation.pot) * (1 - np.asarray(raise_threshold)[facing_bet]) / 325
+        raising = ((strength > threshold) & (observation.my_pip < 4 * observation.pot) &
+                   (observation.simulator.rng.random(n) < np.asarray(raise_probs)[facing_bet]))
+        continuing = strength > pot_odds + odds_offset
+        check_call = np.where(cost == 0, CHECK, CALL)
+        check_fold = np.where(cost == 0, CHECK, FOLD)
+        codes = np.where(continuing, np.where(raising & observation.can_raise, RAISE, check_call), check_fold)
+        codes = np.where(observation.street == 0, check_call, codes)
+        amounts = np.clip(3 * observation.pot, observation.min_raise, observation.max_raise)
+        return codes, amounts
+    return policy
+
+
+def compare(policy_a, policy_b, num_hands, rng=None):
+    '''
+    Plays num_hands hands with policy_a in each seat and returns its per-hand deltas.
+    '''
+    rng = np.random.default_rng(rng)
+    first = Simulator(num_hands, rng).play([policy_a, policy_b])[:, 0]
+    second = Simulator(num_hands, rng).play([policy_b, policy_a])[:, 1]
+    return np.concatenate([first, second])
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(prog='python3 simulator.py')
+    parser.add_argument('--hands', type=int, default=10000, help='Hands per seat order')
+    parser.add_argument('--seed', type=int, default=None, help='Seed for the deals and the policies')
+    parser.add_argument('--samples', type=int, default=16, help='Monte Carlo samples per hand strength')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    # frijol_6's "mid" and "aggressive" postflop parameters
+    mid = threshold_policy([0.9, 0.7], [0.75, 0.9], 0.05, args.samples)
+    aggressive = threshold_policy([0.95, 0.85], [0.65, 0.75], -0.02, args.samples)
+    start_time = time.perf_counter()
+    deltas = compare(mid, aggressive, args.hands, args.seed)
+    seconds = time.perf_counter() - start_time
+    mean, _, (low, high) = match_stats.mean_ci(deltas.tolist())
+    print('mid vs aggressive: {:.3f} per hand, 95% CI [{:.3f}, {:.3f}]'.format(mean, low, high))
+    print('{} hands in {:.1f}s ({:.0f} hands/s)'.format(len(deltas), seconds, len(deltas) / seconds))
@@ -0,0 +1,32 @@
+'''
+engine.py reads the match settings from the config.py of the working directory; the tests that
+import it play with these instead.
+'''
+import sys
+import types
+
+SETTINGS = {
+    'PLAYER_1_NAME': 'A',
+    'PLAYER_1_PATH': './benchmark_bots/fold',
+    'PLAYER_2_NAME': 'B',
+    'PLAYER_2_PATH': './benchmark_bots/check_call',
+    'GAME_LOG_FILENAME': 'gamelog',
+    'PLAYER_LOG_SIZE_LIMIT': 524288,
+    'ENFORCE_GAME_CLOCK': True,
+    'STARTING_GAME_CLOCK': 30.,
+    'BUILD_TIMEOUT': 10.,
+    'CONNECT_TIMEOUT': 10.,
+    'PLAYER_TIMEOUT': 120.,
+    'NUM_ROUNDS': 1000,
+    'STARTING_STACK': 400,
+    'BIG_BLIND': 2,
+    'SMALL_BLIND': 1,
+    'ROUNDS_PER_BOUNTY': 25,
+    'BOUNTY_RATIO': 1.5,
+    'BOUNTY_CONSTANT': 10,
+    'LATENCY_REPORT': False,
+}
+
+config = types.ModuleType('config')
+vars(config).update(SETTINGS)
+sys.modules.setdefault('config', config)
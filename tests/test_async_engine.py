@@ -0,0 +1,38 @@
+import asyncio
+import os
+
+import engine
+import async_engine
+
+BOTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmark_bots')
+PLAYERS = [('A', os.path.join(BOTS_DIR, 'fold')), ('B', os.path.join(BOTS_DIR, 'check_call'))]
+
+
+def test_matches_in_a_row_give_their_cores_back(tmp_path, monkeypatch, capsys):
+    cpu = min(os.sched_getaffinity(0))
+    monkeypatch.setattr(engine, 'BOT_CPUS', [cpu])
+    started = []
+    make_players = async_engine.AsyncGame.make_players
+
+    def keep_players(game):
+        players = make_players(game)
+        started.append(players)  # kept alive, so that a leaked lock is not closed by the garbage collector
+        return players
+    monkeypatch.setattr(async_engine.AsyncGame, 'make_players', keep_players)
+
+    async def play_two():
+        for match in range(2):
+            directory = tmp_path / str(match)
+            directory.mkdir()
+            await async_engine.AsyncGame(seed=match, players=PLAYERS, directory=str(directory), last_round=10).run()
+    asyncio.run(play_two())
+
+    # one core for two bots: in each match one bot is pinned and the other is not
+    assert capsys.readouterr().out.count('not pinned') == 2
+
+    for players in started:
+        assert sorted(player.cpu is None for player in players) == [True, True]
+        assert all(player.cpu_lock is None for player in players)
+    claimed, lock_file = engine.claim_cpu()
+    assert claimed == cpu
+    lock_file.close()
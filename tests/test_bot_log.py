@@ -0,0 +1,44 @@
+import gzip
+
+import pytest
+
+from engine import BotLog
+
+OUTPUT = b''.join(b'line %03d\n' % number for number in range(200))  # 9 bytes a line
+
+
+def read(filename):
+    opener = gzip.open if filename.endswith('.gz') else open
+    with opener(filename, 'rb') as log_file:
+        return log_file.read()
+
+
+@pytest.mark.parametrize('compress', [False, True])
+def test_ring_keeps_the_start_and_the_last_lines(tmp_path, compress):
+    log = BotLog(str(tmp_path / 'A.txt'), size_limit=180, mode='ring', compress=compress)
+    for line in OUTPUT.splitlines(keepends=True):
+        log.write(line)
+    log.close()
+
+    assert log.filename.endswith('.gz') == compress
+    content = read(log.filename)
+    marker = b'\n[%d bytes of output omitted]\n' % (len(OUTPUT) - 180)
+    assert content == OUTPUT[:90] + marker + OUTPUT[-90:]
+    assert content.endswith(b''.join(b'line %03d\n' % number for number in range(190, 200)))
+
+
+def test_ring_keeps_everything_under_the_limit(tmp_path):
+    log = BotLog(str(tmp_path / 'A.txt'), size_limit=len(OUTPUT), mode='ring', compress=False)
+    log.write(OUTPUT[:1000])
+    log.write(OUTPUT[1000:].decode())
+    log.close()
+
+    assert read(log.filename) == OUTPUT
+
+
+def test_head_drops_everything_past_the_limit(tmp_path):
+    log = BotLog(str(tmp_path / 'A.txt'), size_limit=180, mode='head', compress=False)
+    log.write(OUTPUT)
+    log.close()
+
+    assert read(log.filename) == OUTPUT[:180] + b'\n[%d bytes of output omitted]\n' % (len(OUTPUT) - 180)
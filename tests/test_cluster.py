@@ -0,0 +1,105 @@
+import io
+import socket
+import tarfile
+
+from cluster import Coordinator, WorkerAgent, pack_bot, receive_message, send_message
+
+
+def make_coordinator(num_jobs):
+    jobs = [{'id': 'match_{:04d}'.format(match), 'match': match} for match in range(num_jobs)]
+    return Coordinator(jobs, {}, '')
+
+
+def test_messages_carry_their_payload():
+    left, right = socket.socketpair()
+    with left, right, left.makefile('rwb') as sender, right.makefile('rwb') as receiver:
+        send_message(sender, {'type': 'file', 'name': 'gamelog.txt'}, b'Round #1\n' * 1000)
+        send_message(sender, {'type': 'job'})
+
+        assert receive_message(receiver) == ({'type': 'file', 'name': 'gamelog.txt'}, b'Round #1\n' * 1000)
+        assert receive_message(receiver) == ({'type': 'job'}, b'')
+
+
+def test_idle_worker_steals_the_newer_half_of_the_longest_queue():
+    coordinator = make_coordinator(8)
+    first = coordinator.add_worker('first', 1)
+    assert coordinator.next_job(first)['match'] == 0  # takes a chunk of 4: half of the jobs per worker
+    second = coordinator.add_worker('second', 1)
+    assert coordinator.next_job(second)['match'] == 4  # takes ceil(4 / 4) of the rest
+    coordinator.unassigned.clear()
+
+    assert coordinator.next_job(second)['match'] == 2  # steals matches 2 and 3 from the first worker
+    assert [job['match'] for job in first.queue] == [1]
+    assert [job['match'] for job in second.queue] == [3]
+
+
+def test_jobs_of_a_worker_that_leaves_are_requeued_in_order():
+    coordinator = make_coordinator(4)
+    worker = coordinator.add_worker('worker', 2)
+    coordinator.next_job(worker)
+    coordinator.next_job(worker)
+    coordinator.remove_worker(worker)
+
+    assert [job['match'] for job in coordinator.unassigned] == [0, 1, 2, 3]
+    assert not coordinator.done.is_set()
+
+
+def test_failed_match_is_given_up_after_max_attempts():
+    coordinator = make_coordinator(1)
+    worker = coordinator.add_worker('worker', 1)
+    for _ in range(3):
+        coordinator.fail(worker, coordinator.next_job(worker)['id'], 'RuntimeError()')
+
+    assert coordinator.abandoned == ['match_0000']
+    assert coordinator.done.is_set()
+
+
+def test_packed_bot_is_the_same_for_the_same_files(tmp_path):
+    (tmp_path / 'player.py').write_text('print(1)\n')
+    (tmp_path / '__pycache__').mkdir()
+    (tmp_path / '__pycache__' / 'player.cpython-311.pyc').write_bytes(b'\0')
+    digest, data = pack_bot(str(tmp_path))
+    (tmp_path / 'player.py').touch()
+
+    assert pack_bot(str(tmp_path)) == (digest, data)
+    with tarfile.open(fileobj=io.BytesIO(data), mode='r:gz') as tar:
+        assert tar.getnames() == ['.', './player.py']
+
+
+def test_match_running_on_workers_that_keep_dying_is_given_up():
+    coordinator = make_coordinator(1)
+    for attempt in range(3):
+        worker = coordinator.add_worker('worker_{}'.format(attempt), 1)
+        coordinator.next_job(worker)
+        coordinator.remove_worker(worker)
+
+    assert coordinator.abandoned == ['match_0000']
+    assert not coordinator.unassigned
+    assert coordinator.done.is_set()
+
+
+def test_worker_streams_appended_logs_and_sends_the_rest_at_the_end(tmp_path):
+    agent = WorkerAgent.__new__(WorkerAgent)  # no coordinator to connect to
+    agent.work_dir = str(tmp_path)
+    agent.offsets = {}
+    sent = []
+    agent.request = lambda message, payload=b'': sent.append((message['name'], message['offset'], payload))
+    job = {'id': 'a_vs_b/match_0000'}
+    directory = tmp_path / 'matches' / 'a_vs_b' / 'match_0000'
+    directory.mkdir(parents=True)
+    (directory / 'gamelog.txt').write_bytes(b'Round #1')
+    (directory / 'A.txt').write_bytes(b'')
+
+    agent.send_logs(job)
+    assert sent == [('A.txt', 0, b''), ('gamelog.txt', 0, b'Round #1')]
+
+    sent.clear()
+    with open(directory / 'gamelog.txt', 'ab') as log_file:
+        log_file.write(b'\nRound #2')
+    (directory / 'gamelog_latency.json').write_bytes(b'{}')
+    agent.send_logs(job)
+    assert sent == [('gamelog.txt', 8, b'\nRound #2')]
+
+    sent.clear()
+    agent.send_logs(job, final=True)
+    assert sent == [('gamelog_latency.json', 0, b'{}')]
@@ -0,0 +1,39 @@
+import pytest
+from deal_corpus import DealCorpus, write_corpus, round_rng, CARDS, RANKS
+
+
+def test_corpus_replays_the_seeded_shuffle(tmp_path):
+    filename = str(tmp_path / 'deals.bin')
+    write_corpus(filename, 30, seed=7)
+    corpus = DealCorpus(filename)
+
+    assert len(corpus) == 30
+    for round_num in (1, 17, 30):
+        cards = list(CARDS)
+        round_rng(7, round_num, 'deck').shuffle(cards)
+        assert corpus.cards(round_num) == cards
+        bounty_rng = round_rng(7, round_num, 'bounty')
+        assert corpus.bounties(round_num) == [RANKS[bounty_rng.randint(0, 12)], RANKS[bounty_rng.randint(0, 12)]]
+    corpus.close()
+
+
+def test_corpus_rejects_rounds_out_of_range(tmp_path):
+    filename = str(tmp_path / 'deals.bin')
+    write_corpus(filename, 3, seed=1)
+    corpus = DealCorpus(filename)
+
+    with pytest.raises(IndexError):
+        corpus.cards(4)
+    with pytest.raises(IndexError):
+        corpus.cards(0)
+    corpus.close()
+
+
+def test_truncated_corpus_is_rejected(tmp_path):
+    filename = str(tmp_path / 'deals.bin')
+    write_corpus(filename, 3, seed=1)
+    with open(filename, 'r+b') as corpus_file:
+        corpus_file.truncate(100)
+
+    with pytest.raises(ValueError):
+        DealCorpus(filename)
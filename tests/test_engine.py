@@ -0,0 +1,174 @@
+import gzip
+import json
+import os
+import random
+
+import pytest
+
+import engine
+
+
+def test_even_match_rarely_stops_early(tmp_path, monkeypatch):
+    monkeypatch.setattr(engine, 'EARLY_STOP', True)
+    monkeypatch.setattr(engine, 'STATS_INTERVAL', 50)
+    game = engine.Game(seed=1, directory=str(tmp_path), last_round=1000)
+    rng = random.Random(7)
+    stopped = 0
+    for _ in range(400):
+        game.stats['all'] = engine.match_stats.RunningStats()
+        for round_num in range(1, 1001):
+            game.stats['all'].add(rng.gauss(0, 100))
+            if round_num % 50 == 0 and game.report_stats(round_num):
+                stopped += 1
+                break
+    game.log.close()
+
+    # a plain 95% interval checked twenty times stops about a quarter of these matches
+    assert stopped / 400 < 0.08
+
+
+def test_clear_edge_stops_early(tmp_path, monkeypatch):
+    monkeypatch.setattr(engine, 'EARLY_STOP', True)
+    monkeypatch.setattr(engine, 'STATS_INTERVAL', 50)
+    game = engine.Game(seed=1, directory=str(tmp_path), last_round=1000)
+    rng = random.Random(7)
+    for round_num in range(1, 1001):
+        game.stats['all'].add(rng.gauss(20, 100))
+        if round_num % 50 == 0 and game.report_stats(round_num):
+            break
+    game.log.close()
+
+    assert round_num < 1000
+
+
+def test_misspelt_log_level_is_rejected(tmp_path, monkeypatch):
+    monkeypatch.setattr(engine, 'LOG_LEVEL', 'ful')
+    with pytest.raises(ValueError, match="not 'ful'"):
+        engine.Game(directory=str(tmp_path))
+
+
+BOTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmark_bots')
+PLAYERS = [('A', os.path.join(BOTS_DIR, 'fold')), ('B', os.path.join(BOTS_DIR, 'check_call'))]
+
+
+def read_log(filename):
+    opener = gzip.open if filename.endswith('.gz') else open
+    with opener(filename, 'rb') as log_file:
+        return log_file.read()
+
+
+def test_in_process_match_writes_the_socket_gamelog(tmp_path, monkeypatch):
+    sockets, in_process = tmp_path / 'sockets', tmp_path / 'in_process'
+    sockets.mkdir()
+    in_process.mkdir()
+
+    expected = engine.Game(seed=5, players=PLAYERS, directory=str(sockets), last_round=300).run()
+    monkeypatch.setattr(engine, 'IN_PROCESS', True)
+    bankrolls = engine.Game(seed=5, players=PLAYERS, directory=str(in_process), last_round=300).run()
+
+    assert bankrolls == expected
+    assert read_log(str(in_process / 'gamelog.txt')) == read_log(str(sockets / 'gamelog.txt'))
+
+
+def test_pooled_bots_play_later_games_like_fresh_ones(tmp_path):
+    pool = engine.PlayerPool()
+    try:
+        pids = []
+        for seed in (6, 7):
+            pooled, fresh = tmp_path / 'pooled{}'.format(seed), tmp_path / 'fresh{}'.format(seed)
+            pooled.mkdir()
+            fresh.mkdir()
+            bankrolls = engine.Game(seed=seed, players=PLAYERS, directory=str(pooled), pool=pool, last_round=100).run()
+            expected = engine.Game(seed=seed, players=PLAYERS, directory=str(fresh), last_round=100).run()
+            assert bankrolls == expected
+            assert read_log(str(pooled / 'gamelog.txt')) == read_log(str(fresh / 'gamelog.txt'))
+            pids.append(sorted(player.bot_subprocess.pid for player in pool.players.values()))
+        assert pids[0] == pids[1]  # the second game reused the running bots
+    finally:
+        pool.close()
+
+
+def test_bots_run_pinned_and_capped(tmp_path, monkeypatch):
+    resource = pytest.importorskip('resource')
+    cpu = min(os.sched_getaffinity(0))
+    monkeypatch.setattr(engine, 'BOT_CPUS', [cpu])
+    monkeypatch.setattr(engine, 'BOT_MEMORY_LIMIT', 1 << 30)
+    monkeypatch.setattr(engine, 'BOT_CPU_LIMIT', 60)
+    seen = {}
+    start_usage = engine.Player.start_usage
+
+    def inspect_bot(player):  # once the bot is connected, before the first round
+        pid = player.bot_subprocess.pid
+        seen[player.name] = (player.cpu, os.sched_getaffinity(pid),
+                             resource.prlimit(pid, resource.RLIMIT_AS), resource.prlimit(pid, resource.RLIMIT_CPU))
+        start_usage(player)
+    monkeypatch.setattr(engine.Player, 'start_usage', inspect_bot)
+
+    engine.Game(seed=8, players=PLAYERS, directory=str(tmp_path), last_round=20).run()
+
+    # one core for two bots: the first to start is pinned to it, the other is not
+    assert sorted(claimed is None for claimed, _, _, _ in seen.values()) == [False, True]
+    for claimed, affinity, memory_limit, cpu_limit in seen.values():
+        if claimed is not None:
+            assert affinity == {claimed}
+        assert memory_limit == (1 << 30, 1 << 30)
+        assert cpu_limit == (60, 60)
+    claimed, lock_file = engine.claim_cpu()  # given back when the match ended
+    assert claimed == cpu
+    lock_file.close()
+
+
+@pytest.mark.parametrize('compress', [False, True])
+def test_resumed_match_writes_the_same_gamelog(tmp_path, monkeypatch, compress):
+    monkeypatch.setattr(engine, 'CHECKPOINT_INTERVAL', 50)
+    monkeypatch.setattr(engine, 'GAME_LOG_COMPRESS', compress)
+    whole, resumed = tmp_path / 'whole', tmp_path / 'resumed'
+    whole.mkdir()
+    resumed.mkdir()
+
+    expected = engine.Game(seed=3, players=PLAYERS, directory=str(whole), last_round=200).run()
+    engine.Game(seed=3, players=PLAYERS, directory=str(resumed), last_round=120).run()  # checkpoints at round 100
+    bankrolls = engine.Game(seed=3, players=PLAYERS, directory=str(resumed), last_round=200, resume=True).run()
+
+    filename = 'gamelog.txt' + ('.gz' if compress else '')
+    assert bankrolls == expected
+    assert read_log(str(resumed / filename)) == read_log(str(whole / filename))
+
+
+@pytest.mark.parametrize('transport, transports, supported', [
+    ('tcp', None, True),
+    ('unix', None, False),
+    ('socketpair', ['tcp', 'unix'], False),
+    ('socketpair', ['tcp', 'unix', 'socketpair'], True),
+])
+def test_bots_connect_only_over_the_transports_they_list(tmp_path, monkeypatch, transport, transports, supported):
+    monkeypatch.setattr(engine, 'TRANSPORT', transport)
+    player = engine.Player('A', str(tmp_path), str(tmp_path / 'A.txt'))
+    player.commands = {'build': [], 'run': ['python3', 'player.py']}
+    if transports is not None:
+        player.commands['transports'] = transports
+    assert player.supports_transport() == supported
+
+
+@pytest.mark.parametrize('log_level', engine.LOG_LEVELS)
+def test_log_levels_write_what_they_promise(tmp_path, monkeypatch, log_level):
+    monkeypatch.setattr(engine, 'IN_PROCESS', True)
+    monkeypatch.setattr(engine, 'LOG_LEVEL', log_level)
+    game = engine.Game(seed=2, players=PLAYERS, directory=str(tmp_path), last_round=40)
+    bankrolls = game.run()
+
+    assert game.round_deltas is None  # only the callers that pair or merge matches keep them
+    written = sorted(name for name in os.listdir(tmp_path) if name.startswith('gamelog'))
+    assert written == {'full': ['gamelog.txt'], 'structured': ['gamelog.jsonl'],
+                       'summary': ['gamelog.txt'], 'off': []}[log_level]
+    if log_level == 'full':
+        assert read_log(str(tmp_path / 'gamelog.txt')).count(b'\nRound #') == 40
+    elif log_level == 'summary':
+        assert read_log(str(tmp_path / 'gamelog.txt')).decode().split('\n') == [
+            '6.9630 MIT Pokerbots - A vs B', '', 'Final, A ({}), B ({})'.format(bankrolls['A'], bankrolls['B'])]
+    elif log_level == 'structured':
+        with open(tmp_path / 'gamelog.jsonl') as events_file:
+            ends = [record for record in map(json.loads, events_file) if record['event'] == 'end']
+        assert len(ends) == 40
+        # seat 0 is A in odd rounds and B in even ones
+        assert sum(end['deltas'][(end['round'] - 1) % 2] for end in ends) == bankrolls['A']
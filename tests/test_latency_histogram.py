@@ -0,0 +1,62 @@
+import pytest
+
+from engine import LatencyHistogram
+
+
+def test_buckets_are_exact_below_64_microseconds():
+    histogram = LatencyHistogram()
+    for micros in range(64):
+        assert histogram.bucket(micros) == micros
+        assert histogram.bucket_high(micros) == micros
+
+
+def test_bucket_boundaries_at_powers_of_two():
+    histogram = LatencyHistogram()
+    assert [histogram.bucket(micros) for micros in (63, 64, 65, 66, 127, 128)] == [63, 64, 64, 65, 95, 96]
+    assert histogram.bucket_high(64) == 65
+    assert histogram.bucket_high(95) == 127
+    assert histogram.bucket_high(96) == 131
+
+
+def test_bucket_high_is_within_3_percent():
+    histogram = LatencyHistogram()
+    for micros in range(1, 1 << 22, 997):
+        index = histogram.bucket(micros)
+        assert micros <= histogram.bucket_high(index) <= micros * (1 + 1 / 32)
+        assert histogram.bucket_high(index - 1) < micros
+
+
+def test_percentiles_of_a_uniform_spread():
+    histogram = LatencyHistogram()
+    for millis in range(1, 1001):
+        histogram.record(millis / 1e3)
+
+    assert histogram.count == 1000
+    assert 0.5 <= histogram.percentile(50) <= 0.5 * (1 + 1 / 32)
+    assert 0.99 <= histogram.percentile(99) <= 0.99 * (1 + 1 / 32)
+    assert histogram.percentile(100) == histogram.max == 1.
+    summary = histogram.summary()
+    assert summary['mean_ms'] == pytest.approx(500.5)
+    assert summary['max_ms'] == pytest.approx(1000)
+
+
+def test_percentile_never_exceeds_the_max():
+    histogram = LatencyHistogram()
+    histogram.record(0.0001)  # 100 us falls in the bucket 100-101
+    assert histogram.percentile(50) == histogram.max == 0.0001
+
+
+def test_merge_matches_recording_everything_in_one():
+    first, second, both = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+    for millis in range(1, 200):
+        (first if millis % 3 else second).record(millis / 1e3)
+        both.record(millis / 1e3)
+    first.merge(second)
+
+    assert first.counts == both.counts
+    assert first.count == both.count
+    assert first.summary() == pytest.approx(both.summary())
+
+
+def test_empty_histogram_summary():
+    assert LatencyHistogram().summary() == {'count': 0, 'mean_ms': 0., 'p50_ms': 0., 'p90_ms': 0., 'p99_ms': 0., 'max_ms': 0.}
@@ -0,0 +1,84 @@
+import math
+
+import pytest
+from match_stats import Z_95, mean_ci, duplicate_estimates, repeated_z, sprt_bounds, sprt_llr, RunningStats
+
+
+def test_mean_ci_single_sample():
+    mean, stderr, ci = mean_ci([5])
+    assert mean == 5
+    assert stderr == 0
+    assert ci == (5, 5)
+
+
+def test_mean_ci_symmetric_interval():
+    mean, stderr, (low, high) = mean_ci([1, 2, 3, 4])
+    assert mean == pytest.approx(2.5)
+    assert stderr == pytest.approx((5 / 3 / 4) ** 0.5)
+    assert mean - low == pytest.approx(high - mean)
+
+
+def test_duplicate_estimates_cancels_card_luck():
+    # the card luck swings each round by +-100, the edge is a constant +1
+    luck = [100, -100, 50, -50, 80, -80]
+    deltas = [1 + x for x in luck]
+    mirrored_deltas = [1 - x for x in luck]
+
+    estimates = duplicate_estimates(deltas, mirrored_deltas)
+
+    assert estimates['rounds'] == 6
+    assert estimates['paired']['mean'] == pytest.approx(1)
+    assert estimates['paired']['stderr'] == pytest.approx(0)
+    assert estimates['unpaired']['mean'] == pytest.approx(1)
+    assert estimates['unpaired']['stderr'] > 0
+
+
+def test_duplicate_estimates_requires_matching_lengths():
+    with pytest.raises(ValueError):
+        duplicate_estimates([1, 2], [1])
+
+
+def test_sprt_bounds_are_symmetric_for_equal_error_rates():
+    lower, upper = sprt_bounds(0.05, 0.05)
+    assert upper == pytest.approx(math.log(19))
+    assert lower == pytest.approx(-upper)
+
+
+def test_sprt_llr_sign_follows_the_mean():
+    assert sprt_llr([3, 1, 2, 4], margin=1) > 0
+    assert sprt_llr([-3, -1, -2, -4], margin=1) < 0
+    assert sprt_llr([5], margin=1) == 0
+
+
+def test_sprt_llr_accepts_a_clear_edge_quickly():
+    lower, upper = sprt_bounds()
+    samples = [10 + (-1) ** i for i in range(6)]
+    assert sprt_llr(samples, margin=1) >= upper
+
+
+def test_running_stats_matches_mean_ci():
+    samples = [12, -40, 7, 0, 85, -3, -19]
+    stats = RunningStats()
+    for x in samples:
+        stats.add(x)
+
+    mean, stderr, (low, high) = stats.mean_ci()
+    expected_mean, expected_stderr, (expected_low, expected_high) = mean_ci(samples)
+
+    assert stats.count == len(samples)
+    assert mean == pytest.approx(expected_mean)
+    assert stderr == pytest.approx(expected_stderr)
+    assert (low, high) == pytest.approx((expected_low, expected_high))
+
+
+def test_running_stats_empty_and_single_sample():
+    stats = RunningStats()
+    assert stats.mean_ci() == (0., 0., (0., 0.))
+    stats.add(4)
+    assert stats.mean_ci() == (4, 0., (4, 4))
+
+
+def test_repeated_z_widens_with_the_number_of_checks():
+    assert repeated_z(1) == pytest.approx(Z_95, abs=1e-5)
+    assert repeated_z(20) == pytest.approx(3.023, abs=1e-3)
+    assert repeated_z(0) == repeated_z(1)
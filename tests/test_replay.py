@@ -0,0 +1,116 @@
+import pytest
+
+import engine
+from replay import RecordedPlayer, ReplayGame, decode, encode, read_gamelog
+
+GAMELOG = '''6.9630 MIT Pokerbots - A vs B
+
+Round #1, A (0), B (0)
+Bounties reset to 5 for player A and 7 for player B
+A posts the blind of 1
+B posts the blind of 2
+A dealt [Jd Kh]
+B dealt [Qs 6d]
+A folds
+A awarded -1
+B awarded 1
+Winning counts at the end of the round: , A (-1), B (1)
+
+Round #2, B (1), A (-1)
+B posts the blind of 1
+A posts the blind of 2
+B dealt [9d 2c]
+A dealt [4d 6s]
+B calls
+A raises to 24
+B calls
+Flop [7d Ah 8s], B (24), A (24)
+Current stacks: 376, 376
+A bets 263
+B calls
+Turn [7d Ah 8s 5h], B (287), A (287)
+Current stacks: 113, 113
+A bets 53
+B calls
+River [7d Ah 8s 5h Qs], B (340), A (340)
+Current stacks: 60, 60
+A bets 32
+B calls
+B shows [9d 2c]
+A shows [4d 6s]
+B awarded -568
+A awarded 568
+Winning counts at the end of the round: , B (-567), A (567)
+
+Round #3, A (567), B (-567)
+A posts the blind of 1
+B posts the blind of 2
+A dealt [3c 6c]
+B dealt [Kd Kh]
+A calls
+'''
+
+
+@pytest.fixture
+def rounds(tmp_path):
+    filepath = tmp_path / 'gamelog.txt'
+    filepath.write_text(GAMELOG)
+    return read_gamelog(str(filepath))
+
+
+def test_read_gamelog_parses_each_complete_round(rounds):
+    assert [record['round'] for record in rounds] == [1, 2]  # round 3 is cut off mid-way
+    first, second = rounds
+    assert first['seats'] == ['A', 'B']
+    assert first['bounties'] == {'A': '5', 'B': '7'}
+    assert first['hands'] == {'A': ['Jd', 'Kh'], 'B': ['Qs', '6d']}
+    assert first['actions'] == [('A', 'F')]
+    assert first['deltas'] == {'A': -1, 'B': 1}
+    assert second['seats'] == ['B', 'A']
+    assert second['bounties'] == {'A': '5', 'B': '7'}
+    assert second['board'] == ['7d', 'Ah', '8s', '5h', 'Qs']
+    assert second['actions'] == [('B', 'C'), ('A', 'R24'), ('B', 'C'), ('A', 'R263'), ('B', 'C'),
+                                 ('A', 'R53'), ('B', 'C'), ('A', 'R32'), ('B', 'C')]
+    assert second['deltas'] == {'B': -568, 'A': 568}
+
+
+def test_action_codes_round_trip(rounds):
+    codes = [code for record in rounds for _, code in record['actions']] + ['K']
+    assert [encode(decode(code)) for code in codes] == codes
+    assert decode('R24') == engine.RaiseAction(24)
+    assert isinstance(decode('F'), engine.FoldAction)
+
+
+def replay_rounds(rounds, tmp_path):
+    game = ReplayGame(rounds, 'A', None, directory=str(tmp_path))
+    players = [RecordedPlayer(name, None, str(tmp_path / (name + '.txt'))) for name in rounds[0]['seats']]
+    for round_num in range(1, len(rounds) + 1):
+        bounties = game.start_round(round_num, players, [-1, -1])
+        game.run_round(players, bounties)
+        players = players[::-1]
+    game.log.close()
+    return game, players
+
+
+def test_replayed_rounds_match_the_log(rounds, tmp_path):
+    game, players = replay_rounds(rounds, tmp_path)
+    assert game.mismatched_rounds == []
+    assert {player.name: player.bankroll for player in players} == {'A': 567, 'B': -567}
+
+
+def test_wrong_actor_is_rejected(rounds, tmp_path):
+    rounds[1]['actions'][1] = ('B', 'R24')
+    with pytest.raises(ValueError, match='round 2: expected A to act, log has B'):
+        replay_rounds(rounds, tmp_path)
+
+
+def test_truncated_actions_are_rejected(rounds, tmp_path):
+    del rounds[1]['actions'][3:]
+    with pytest.raises(ValueError, match='round 2: expected A to act, log has no more actions'):
+        replay_rounds(rounds, tmp_path)
+
+
+def test_draw_bounties_keeps_the_engine_signature(rounds, tmp_path):
+    game, _ = replay_rounds(rounds, tmp_path)
+    assert game.draw_bounties() == ['7', '5']  # round 2 seats B first
+    assert game.draw_bounties(1) == ['5', '7']
@@ -0,0 +1,36 @@
+from argparse import Namespace
+
+import pytest
+
+import match_stats
+from round_robin import Pairing, interval_z, z_score
+
+
+def make_pairing(stop='ci'):
+    args = Namespace(stop=stop, alpha=0.05, beta=0.05, margin=1., min_matches=1, max_matches=20, duplicate=False)
+    return Pairing(['a', 'b'], [], '', {}, args)
+
+
+def samples_at(t):
+    # ten samples with a standard error of 1/3, so the mean is t standard errors above zero
+    return [t / 3 + (-1) ** i for i in range(10)]
+
+
+def test_ci_stop_uses_the_z_corrected_for_every_check():
+    assert interval_z(make_pairing().args) == pytest.approx(match_stats.repeated_z(20, 0.05))
+    assert interval_z(make_pairing('sprt').args) == pytest.approx(z_score(0.05))
+
+
+def test_ci_stop_waits_for_the_corrected_interval():
+    pairing = make_pairing()
+    pairing.samples = samples_at(2.5)  # past 1.96, short of the 3.02 of 20 checks
+    pairing.update_decision()
+    assert pairing.decision is None
+
+    pairing.samples = samples_at(3.5)
+    pairing.update_decision()
+    assert pairing.decision == 'a'
+    pairing.samples = [-sample for sample in samples_at(3.5)]
+    pairing.decision = None
+    pairing.update_decision()
+    assert pairing.decision == 'b'
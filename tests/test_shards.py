@@ -0,0 +1,72 @@
+import json
+import os
+
+import engine
+from shards import merge, split_rounds, strip_trailer
+
+BOTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmark_bots')
+PLAYERS = [('A', os.path.join(BOTS_DIR, 'fold')), ('B', os.path.join(BOTS_DIR, 'check_call'))]
+
+LAST_ROUND = [
+    'Round #3, A (-2), B (2)',
+    'A posts the blind of 1',
+    'B posts the blind of 2',
+    'A dealt [3c 6c]',
+    'B dealt [Kd Kh]',
+    'A folds',
+    'A awarded -1',
+    'B awarded 1',
+    'B ran out of time',  # an end-of-round ack, logged inside the round
+    'Winning counts at the end of the round: , A (-3), B (3)',
+]
+
+
+def test_split_rounds_spreads_the_remainder():
+    assert split_rounds(1, 10, 3) == [(1, 3), (4, 6), (7, 10)]
+    assert split_rounds(25001, 50000, 4) == [(25001, 31250), (31251, 37500), (37501, 43750), (43751, 50000)]
+
+
+def test_split_rounds_single_shard():
+    assert split_rounds(1, 1000, 1) == [(1, 1000)]
+
+
+def test_split_rounds_drops_empty_shards():
+    assert split_rounds(1, 2, 4) == [(1, 1), (2, 2)]
+
+
+def test_strip_trailer_keeps_the_last_round():
+    lines = LAST_ROUND + ['', 'Final, A (-3), B (3)']
+    assert strip_trailer(lines) == LAST_ROUND
+
+
+def test_strip_trailer_after_an_early_stop():
+    lines = LAST_ROUND + ['Match stopped after round 3: the confidence interval excludes zero', '',
+                          'Final, A (-3), B (3)']
+    assert strip_trailer(lines) == LAST_ROUND
+
+
+def test_strip_trailer_without_a_trailer():
+    assert strip_trailer(list(LAST_ROUND)) == LAST_ROUND
+
+
+def test_stateless_bots_merge_into_the_serial_match(tmp_path, monkeypatch):
+    monkeypatch.setattr(engine, 'IN_PROCESS', True)
+    serial = tmp_path / 'serial'
+    serial.mkdir()
+    expected = engine.Game(seed=1, players=PLAYERS, directory=str(serial), last_round=230).run()
+
+    directories = []
+    for first_round, last_round in split_rounds(1, 230, 3):
+        directory = tmp_path / '{}-{}'.format(first_round, last_round)
+        directory.mkdir()
+        game = engine.Game(seed=1, players=PLAYERS, directory=str(directory), first_round=first_round,
+                           last_round=last_round, keep_deltas=True)
+        bankrolls = game.run()
+        with open(directory / 'shard.json', 'w') as shard_file:
+            json.dump({'seed': 1, 'players': ['A', 'B'], 'first_round': first_round, 'last_round': last_round,
+                       'bankrolls': bankrolls, 'deltas': game.round_deltas}, shard_file)
+        directories.append(str(directory))
+    summary = merge(directories, str(tmp_path / 'merged'))
+
+    assert summary['bankrolls'] == expected
+    assert (tmp_path / 'merged' / 'gamelog.txt').read_bytes() == (serial / 'gamelog.txt').read_bytes()
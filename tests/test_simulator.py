@@ -0,0 +1,128 @@
+import random
+import pytest
+
+np = pytest.importorskip('numpy')
+
+import engine
+import simulator
+from engine import CallAction, CheckAction, FoldAction, RaiseAction, RoundState, TerminalState
+
+ACTIONS = {simulator.FOLD: FoldAction, simulator.CALL: CallAction, simulator.CHECK: CheckAction}
+
+
+class Board():
+    '''
+    The part of an eval7 deck that RoundState reads: the board cards in dealing order.
+    '''
+
+    def __init__(self, cards):
+        self.cards = cards
+
+    def peek(self, num_cards):
+        return self.cards[:num_cards]
+
+
+def random_policy(rng, history):
+    '''
+    Picks a uniformly random legal action per row and records what the seat saw next to it.
+    '''
+    def policy(observation):
+        codes, amounts = [], []
+        for i, row in enumerate(observation.rows.tolist()):
+            legal = [simulator.FOLD, simulator.CHECK if observation.continue_cost[i] == 0 else simulator.CALL]
+            if observation.can_raise[i]:
+                legal.append(simulator.RAISE)
+            code = rng.choice(legal)
+            amount = rng.randint(int(observation.min_raise[i]), int(observation.max_raise[i])) if code == simulator.RAISE else 0
+            seen = (int(observation.street[i]), int(observation.my_pip[i]), int(observation.opp_pip[i]),
+                    int(observation.my_stack[i]), int(observation.opp_stack[i]), bool(observation.can_raise[i]),
+                    (int(observation.min_raise[i]), int(observation.max_raise[i])) if observation.can_raise[i] else None)
+            history[row].append((seen, code, amount))
+            codes.append(code)
+            amounts.append(amount)
+        return codes, amounts
+    return policy
+
+
+def new_round_state(sim, row):
+    cards = [simulator.EVAL7_CARDS[card] for card in sim.cards[row].tolist()]
+    bounties = [simulator.RANKS[bounty] for bounty in sim.bounties[row].tolist()]
+    pips = [engine.SMALL_BLIND, engine.BIG_BLIND]
+    stacks = [engine.STARTING_STACK - engine.SMALL_BLIND, engine.STARTING_STACK - engine.BIG_BLIND]
+    return RoundState(0, 0, pips, stacks, [cards[0:2], cards[2:4]], Board(cards[4:9]), bounties, None)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_simulator_matches_round_state(seed):
+    rng = random.Random(seed)
+    sim = simulator.Simulator(200, rng=seed)
+    history = [[] for _ in range(sim.num_hands)]
+    deltas = sim.play([random_policy(rng, history), random_policy(rng, history)])
+    for row in range(sim.num_hands):
+        state = new_round_state(sim, row)
+        for seen, code, amount in history[row]:
+            assert not isinstance(state, TerminalState)
+            active = state.button % 2
+            can_raise = RaiseAction in state.legal_actions()
+            bounds = state.raise_bounds() if can_raise else None
+            assert seen == (state.street, state.pips[active], state.pips[1 - active],
+                            state.stacks[active], state.stacks[1 - active], can_raise, bounds)
+            state = state.proceed(RaiseAction(amount) if code == simulator.RAISE else ACTIONS[code]())
+        assert isinstance(state, TerminalState)
+        assert deltas[row].tolist() == state.deltas
+
+
+def test_legalize_checks_or_folds_like_the_engine():
+    sim = simulator.Simulator(4, rng=0)
+    observation = simulator.Observation(sim, np.arange(4))
+    # preflop the small blind faces a call: CHECK and out-of-bounds raises become folds
+    codes, _ = sim.legalize(observation, [simulator.CHECK, simulator.RAISE, simulator.RAISE, simulator.CALL],
+                            [0, 1, engine.STARTING_STACK + 1, 0])
+    assert codes.tolist() == [simulator.FOLD, simulator.FOLD, simulator.FOLD, simulator.CALL]
+
+
+def frijol_6_rule(strength, pot, cost, my_pip, can_raise, raise_threshold, odds_offset):
+    '''
+    frijol_6's postflop branch (player.py) for one hand, with every raise taken when it clears the threshold.
+    '''
+    check_call = simulator.CHECK if cost == 0 else simulator.CALL
+    if strength <= cost / (pot + cost) + odds_offset:
+        return simulator.CHECK if cost == 0 else simulator.FOLD
+    if my_pip == 0:
+        threshold = raise_threshold[0]
+    elif my_pip < 4 * pot:
+        threshold = raise_threshold[1]
+    else:
+        return check_call
+    if strength > 1 - (350 - pot) * (1 - threshold) / 325 and can_raise:
+        return simulator.RAISE
+    return check_call
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_threshold_policy_follows_frijol_6(seed):
+    rng = random.Random(seed)
+    sim = simulator.Simulator(200, rng=seed)
+    # known strengths instead of Monte Carlo ones, so the rule is the only thing under test
+    sim.strength_cache[:] = np.random.default_rng(seed).random(sim.strength_cache.shape)
+    raise_threshold, odds_offset = [0.75, 0.9], 0.05
+    policy = simulator.threshold_policy([1., 1.], raise_threshold, odds_offset)
+    history = [[] for _ in range(sim.num_hands)]
+    recorder = random_policy(rng, history)
+
+    def checked(observation):
+        codes, amounts = policy(observation)
+        for i in range(len(observation.rows)):
+            if observation.street[i] == 0:
+                expected = simulator.CHECK if observation.continue_cost[i] == 0 else simulator.CALL
+            else:
+                strength = sim.strength_cache[observation.rows[i], observation.active[i], observation.street[i]]
+                expected = frijol_6_rule(strength, observation.pot[i], observation.continue_cost[i],
+                                         observation.my_pip[i], observation.can_raise[i], raise_threshold, odds_offset)
+            assert codes[i] == expected
+            if expected == simulator.RAISE:
+                assert amounts[i] == min(max(3 * observation.pot[i], observation.min_raise[i]), observation.max_raise[i])
+        return codes, amounts
+
+    sim.play([checked, recorder])
+    assert not sim.live.any()
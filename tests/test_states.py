@@ -0,0 +1,67 @@
+import random
+import pytest
+from skeleton.actions import CallAction, CheckAction, RaiseAction
+from skeleton.states import RoundState, MutableRoundState, TerminalState
+from skeleton.states import STARTING_STACK, BIG_BLIND, SMALL_BLIND
+
+
+def new_round_state():
+    pips = [SMALL_BLIND, BIG_BLIND]
+    stacks = [STARTING_STACK - SMALL_BLIND, STARTING_STACK - BIG_BLIND]
+    hands = [["As", "Kd"], ["7c", "7h"]]
+    return RoundState(0, 0, pips, stacks, hands, ["A", "7"], [], None)
+
+
+def random_action(state, rng):
+    legal_actions = state.legal_actions()
+    action = rng.choice(sorted(legal_actions, key=lambda action: action.__name__))
+    if action is RaiseAction:
+        min_raise, max_raise = state.raise_bounds()
+        return RaiseAction(rng.randint(min_raise, max_raise))
+    return action()
+
+
+def snapshot(state):
+    return (state.button, state.street, list(state.pips), list(state.stacks))
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_mutable_round_state_matches_round_state(seed):
+    rng = random.Random(seed)
+    state = new_round_state()
+    mutable = MutableRoundState.from_round_state(state)
+    while not isinstance(state, TerminalState):
+        assert snapshot(mutable) == snapshot(state)
+        assert mutable.legal_actions() == state.legal_actions()
+        if RaiseAction in state.legal_actions():
+            assert mutable.raise_bounds() == state.raise_bounds()
+        action = random_action(state, rng)
+        state = state.proceed(action)
+        result = mutable.proceed(action)
+        assert isinstance(result, TerminalState) == isinstance(state, TerminalState)
+    assert result.deltas == state.deltas
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_mutable_round_state_undo_restores_every_state(seed):
+    rng = random.Random(seed)
+    mutable = MutableRoundState.from_round_state(new_round_state())
+    history = []
+    while True:
+        history.append(snapshot(mutable))
+        action = random_action(mutable, rng)
+        if isinstance(mutable.proceed(action), TerminalState):
+            break
+    while history:
+        mutable.undo()
+        assert snapshot(mutable) == history.pop()
+    assert mutable.undo_log == []
+
+
+def test_mutable_round_state_does_not_copy_on_proceed():
+    mutable = MutableRoundState.from_round_state(new_round_state())
+    pips = mutable.pips
+    assert mutable.proceed(CallAction()) is mutable
+    assert mutable.proceed(CheckAction()) is mutable
+    assert mutable.pips is pips
+    assert mutable.street == 3
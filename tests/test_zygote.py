@@ -0,0 +1,50 @@
+import json
+import os
+import shutil
+
+import engine
+import zygote
+
+BOTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmark_bots')
+
+
+def preloading_copy(bot, tmp_path):
+    '''
+    Copies a benchmark bot and has its commands.json preload eval7, so that the engine forks it from a zygote.
+    '''
+    path = str(tmp_path / 'bots' / bot)
+    shutil.copytree(os.path.join(BOTS_DIR, bot), path, ignore=shutil.ignore_patterns('__pycache__'))
+    with open(os.path.join(path, 'commands.json')) as commands_file:
+        commands = json.load(commands_file)
+    with open(os.path.join(path, 'commands.json'), 'w') as commands_file:
+        json.dump(dict(commands, preload=['eval7']), commands_file)
+    return path
+
+
+def test_forked_bots_play_the_match_of_started_ones(tmp_path, monkeypatch):
+    players = [('A', preloading_copy('fold', tmp_path)), ('B', preloading_copy('check_call', tmp_path))]
+    started, forked = tmp_path / 'started', tmp_path / 'forked'
+    started.mkdir()
+    forked.mkdir()
+    expected = engine.Game(seed=4, players=players, directory=str(started), last_round=100).run()
+
+    monkeypatch.setattr(engine, 'ZYGOTE', True)
+    launched = []
+    launch = engine.Player.launch
+
+    def record_launch(player, address, bot_socket=None):
+        proc = launch(player, address, bot_socket)
+        launched.append(proc)
+        return proc
+    monkeypatch.setattr(engine.Player, 'launch', record_launch)
+    try:
+        bankrolls = engine.Game(seed=4, players=players, directory=str(forked), last_round=100).run()
+        assert sorted(zygote.ZYGOTES) == sorted(path for _, path in players)
+    finally:
+        zygote.close_zygotes()
+
+    assert [type(proc) for proc in launched] == [zygote.ForkedBot, zygote.ForkedBot]
+    assert all(proc.poll() is not None for proc in launched)  # stopped with the match
+    assert bankrolls == expected
+    with open(forked / 'gamelog.txt', 'rb') as forked_log, open(started / 'gamelog.txt', 'rb') as started_log:
+        assert forked_log.read() == started_log.read()
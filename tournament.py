@@ -0,0 +1,213 @@
+'''
+Runs many independent engine matches in parallel and merges their results.
+
+Every match is a separate engine.Game in a worker process, with its own working directory
+(for the game log and the player logs), its own deal seed, and its own ephemeral ports
+(engine.Player binds port 0). Run it from the directory holding config.py, like engine.py:
+
+    python3 tournament.py --matches 200 --workers 8 --seed 1
+
+With --duplicate, every seed is played twice with the seats (and so the bounties) swapped,
+and the report pairs the two matches round by round to cancel out the card luck.
+
+With --pool, each worker keeps its bots running from one match to the next (see
+engine.PlayerPool), so bot startup is paid once per worker instead of once per match.
+'''
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stdout, redirect_stderr
+import argparse
+import json
+import os
+import random
+import time
+
+import engine
+import match_stats
+import zygote
+
+
+def run_match(job, pool=None):
+    '''
+    Runs one engine.Game inside a worker process.
+
+    Engine settings are module-level globals, so each job applies its own overrides before
+    starting the game. Workers never share a process with another running match.
+
+    Args:
+        job (dict): The match index, deal seed, working directory and engine setting overrides,
+            and optionally the range of rounds to play (see shards.py).
+        pool (engine.PlayerPool): Running bots to reuse, if any.
+
+    Returns:
+        dict: The job description plus the final bankrolls, the per-round deltas and the
+        wall-clock time.
+    '''
+    os.makedirs(job['directory'], exist_ok=True)
+    os.chdir(job['directory'])
+    for name, value in job['settings'].items():
+        setattr(engine, name, value)
+    start_time = time.perf_counter()
+    with open('engine.txt', 'w') as output, redirect_stdout(output), redirect_stderr(output):
+        game = engine.Game(seed=job['seed'], pool=pool, first_round=job.get('first_round', 1),
+                           last_round=job.get('last_round'), keep_deltas=True)
+        bankrolls = game.run()
+    end_time = time.perf_counter()
+    return {'match': job['match'], 'seed': job['seed'], 'mirrored': job['mirrored'],
+            'directory': job['directory'], 'bankrolls': bankrolls, 'deltas': game.round_deltas,
+            'seconds': end_time - start_time}
+
+
+def run_pooled(jobs):
+    '''
+    Runs a batch of jobs one after another on the same pooled bots, then stops the bots and
+    their zygotes, if any.
+    '''
+    pool = engine.PlayerPool()
+    try:
+        return [run_match(job, pool) for job in jobs]
+    finally:
+        pool.close()
+        zygote.close_zygotes()
+
+
+def mirror_settings(settings):
+    '''
+    Swaps the two seats. Bounties are drawn per seat, so they swap along with the players.
+    '''
+    mirrored = dict(settings)
+    for key in ('NAME', 'PATH'):
+        mirrored['PLAYER_1_' + key] = settings['PLAYER_2_' + key]
+        mirrored['PLAYER_2_' + key] = settings['PLAYER_1_' + key]
+    return mirrored
+
+
+def make_job(match, seed, out_dir, settings, mirrored=False):
+    '''
+    Builds the job for one match, or for its mirror with the seats swapped.
+    '''
+    if mirrored:
+        return {'match': match, 'seed': seed, 'mirrored': True, 'settings': mirror_settings(settings),
+                'directory': os.path.join(out_dir, 'match_{:04d}_mirrored'.format(match))}
+    return {'match': match, 'seed': seed, 'mirrored': False, 'settings': settings,
+            'directory': os.path.join(out_dir, 'match_{:04d}'.format(match))}
+
+
+def make_jobs(num_matches, seed, out_dir, settings, duplicate=False):
+    '''
+    Builds one job per match, with per-match seeds derived from the tournament seed.
+
+    In duplicate mode each seed yields a pair of jobs, the second with the seats swapped.
+    '''
+    rng = random.Random(seed)
+    jobs = []
+    for match in range(num_matches):
+        match_seed = rng.getrandbits(63)
+        jobs.append(make_job(match, match_seed, out_dir, settings))
+        if duplicate:
+            jobs.append(make_job(match, match_seed, out_dir, settings, mirrored=True))
+    return jobs
+
+
+def summarize(results, names):
+    '''
+    Merges per-match results into one summary.
+
+    Returns:
+        dict: Per-player totals, mean bankroll per match with a 95% confidence interval,
+        and match win counts. Duplicate tournaments also get the paired and unpaired
+        estimates of the first player's mean delta per round, over the rounds that both
+        matches of a pair played (with EARLY_STOP, one may end before the other).
+    '''
+    summary = {'matches': len(results), 'players': {}}
+    for name in names:
+        bankrolls = [result['bankrolls'][name] for result in results]
+        mean, _, ci95 = match_stats.mean_ci(bankrolls)
+        summary['players'][name] = {
+            'total': sum(bankrolls),
+            'mean': mean,
+            'ci95': list(ci95),
+            'wins': sum(bankroll > 0 for bankroll in bankrolls),
+            'losses': sum(bankroll < 0 for bankroll in bankrolls),
+            'ties': sum(bankroll == 0 for bankroll in bankrolls),
+        }
+    mirrored = {result['match']: result for result in results if result['mirrored']}
+    if mirrored:
+        deltas, mirrored_deltas = [], []
+        for result in results:
+            if not result['mirrored'] and result['match'] in mirrored:
+                pair = result['deltas'][names[0]], mirrored[result['match']]['deltas'][names[0]]
+                rounds = min(map(len, pair))
+                deltas += pair[0][:rounds]
+                mirrored_deltas += pair[1][:rounds]
+        summary['duplicate'] = match_stats.duplicate_estimates(deltas, mirrored_deltas)
+    return summary
+
+
+def run_tournament(jobs, workers, pooled=False):
+    '''
+    Runs the jobs across a process pool and returns the results ordered by match index.
+
+    Pooled tournaments split the jobs into one batch per worker up front, so that each worker
+    keeps the same bots for all of its matches.
+    '''
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        if pooled:
+            futures = [pool.submit(run_pooled, jobs[worker::workers]) for worker in range(workers)]
+        else:
+            futures = [pool.submit(run_match, job) for job in jobs]
+        for future in as_completed(futures):
+            for result in future.result() if pooled else [future.result()]:
+                results.append(result)
+                print('Match {}{} finished in {:.1f}s: {}'.format(result['match'], ' (mirrored)' if result['mirrored'] else '',
+                                                                result['seconds'], result['bankrolls']))
+    return sorted(results, key=lambda result: (result['match'], result['mirrored']))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(prog='python3 tournament.py')
+    parser.add_argument('--matches', type=int, default=10, help='Number of matches to play')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Number of worker processes')
+    parser.add_argument('--seed', type=int, default=None, help='Tournament seed, for reproducible deals')
+    parser.add_argument('--rounds', type=int, default=engine.NUM_ROUNDS, help='Rounds per match')
+    parser.add_argument('--bot1', default=engine.PLAYER_1_PATH, help='Path to the first pokerbot')
+    parser.add_argument('--bot2', default=engine.PLAYER_2_PATH, help='Path to the second pokerbot')
+    parser.add_argument('--in-process', action='store_true', help='Load the bots into the engine process')
+    parser.add_argument('--duplicate', action='store_true', help='Replay every seed with the seats swapped')
+    parser.add_argument('--pool', action='store_true', help='Keep the bots running between matches')
+    parser.add_argument('--out', default='tournament', help='Directory for match logs and the summary')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    out_dir = os.path.abspath(args.out)
+    settings = {
+        'PLAYER_1_NAME': engine.PLAYER_1_NAME,
+        'PLAYER_2_NAME': engine.PLAYER_2_NAME,
+        'PLAYER_1_PATH': os.path.abspath(args.bot1),
+        'PLAYER_2_PATH': os.path.abspath(args.bot2),
+        'NUM_ROUNDS': args.rounds,
+        'IN_PROCESS': args.in_process or engine.IN_PROCESS,
+    }
+    jobs = make_jobs(args.matches, args.seed, out_dir, settings, args.duplicate)
+    start_time = time.perf_counter()
+    results = run_tournament(jobs, args.workers, args.pool)
+    summary = summarize(results, [engine.PLAYER_1_NAME, engine.PLAYER_2_NAME])
+    summary['seconds'] = time.perf_counter() - start_time
+    summary['results'] = [{key: value for key, value in result.items() if key != 'deltas'} for result in results]
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, 'summary.json'), 'w') as summary_file:
+        json.dump(summary, summary_file, indent=2)
+    for name, stats in summary['players'].items():
+        print('{}: total {}, mean {:.1f} per match, 95% CI [{:.1f}, {:.1f}], W/L/T {}/{}/{}'.format(
+            name, stats['total'], stats['mean'], stats['ci95'][0], stats['ci95'][1],
+            stats['wins'], stats['losses'], stats['ties']))
+    if 'duplicate' in summary:
+        duplicate = summary['duplicate']
+        for estimate in ('paired', 'unpaired'):
+            print('{} per round ({}): {:.2f}, 95% CI [{:.2f}, {:.2f}]'.format(
+                engine.PLAYER_1_NAME, estimate, duplicate[estimate]['mean'], *duplicate[estimate]['ci']))
+        print('Duplicate pairing reduces the variance {:.1f}x over {} rounds'.format(
+            duplicate['variance_reduction'], duplicate['rounds']))
+    print('{} matches in {:.1f}s'.format(summary['matches'], summary['seconds']))
@@ -0,0 +1,297 @@
+'''
+A prefork launcher for Python pokerbots.
+
+Starting `python3 player.py` for every match pays for the interpreter and for the bot's
+imports (numpy, scipy, eval7, ...) each time. A zygote is a long-lived process that imports a
+bot's heavy modules once and then os.fork()s a child per match; the child runs the bot's
+script as __main__ with the match's address, exactly as the run command would, but starts in
+milliseconds and shares the preloaded modules copy-on-write with the other children.
+
+The engine uses a zygote for a bot when ZYGOTE is set in config.py and the bot's
+commands.json lists the modules to preload:
+
+    {
+        "build": [],
+        "run": ["python3", "player.py"],
+        "preload": ["numpy", "scipy.stats", "eval7", "helper_bot", "utils"]
+    }
+
+The engine and the zygote talk over a Unix socketpair. For each match the engine sends the
+address to connect to, with the core to pin the child to and its rlimits, together with the
+write end of a fresh pipe, which becomes the child's stdout and stderr (and, for the
+socketpair transport, the bot's end of the connection), and the zygote answers with the
+child's pid and, where os.pidfd_open works (Linux 5.3 and later), a pidfd for the child that
+stays bound to it even once its pid is reused. Linux (or any POSIX with fork) only.
+
+The zygotes started by an engine process are closed when it exits. A process that ends
+without running its atexit hooks, such as a tournament worker, closes its end of the control
+socket all the same, and a zygote exits as soon as that happens.
+'''
+import atexit
+import json
+import os
+import random
+import runpy
+import select
+import signal
+import socket
+import subprocess
+import sys
+import time
+import traceback
+from threading import Lock
+
+
+class ForkedBot():
+    '''
+    Stands in for the subprocess.Popen of a pokerbot forked by a zygote.
+
+    The child is not the engine's own child, so waiting means polling for it to exit: through
+    its pidfd if the zygote sent one, or else by checking whether its pid is still there, which
+    could in principle find another process that got the same pid.
+    '''
+
+    def __init__(self, pid, stdout, pidfd=None):
+        self.pid = pid
+        self.stdout = stdout
+        self.pidfd = pidfd
+        self.returncode = None  # the exit status is the zygote's to collect, so 0 once it exited
+
+    def poll(self):
+        if self.returncode is not None:
+            return self.returncode
+        if self.pidfd is not None:
+            readable, _, _ = select.select([self.pidfd], [], [], 0)
+            if readable:  # a pidfd turns readable when its process exits
+                os.close(self.pidfd)
+                self.pidfd = None
+                self.returncode = 0
+        else:
+            try:
+                os.kill(self.pid, 0)
+            except ProcessLookupError:
+                self.returncode = 0
+        return self.returncode
+
+    def communicate(self, timeout=None):
+        '''
+        Waits for the pokerbot to exit. Its output is read by the engine's reader thread.
+        '''
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.poll() is None:
+            if deadline is not None and time.monotonic() >= deadline:
+                raise subprocess.TimeoutExpired('zygote child {}'.format(self.pid), timeout)
+            if self.pidfd is not None:
+                select.select([self.pidfd], [], [], None if deadline is None else max(deadline - time.monotonic(), 0))
+            else:
+                time.sleep(0.01)
+        return b'', None
+
+    def kill(self):
+        if self.poll() is not None:
+            return
+        try:
+            if self.pidfd is not None:
+                signal.pidfd_send_signal(self.pidfd, signal.SIGKILL)
+            else:
+                os.kill(self.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+
+class Zygote():
+    '''
+    The engine's handle on one zygote process.
+    '''
+
+    def __init__(self, path, run_command, preload):
+        self.path = path
+        self.lock = Lock()
+        self.control, child_control = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+        with child_control:
+            command = [run_command[0], os.path.abspath(__file__), str(child_control.fileno()),
+                       ','.join(preload)] + run_command[1:]
+            self.proc = subprocess.Popen(command, cwd=path, pass_fds=[child_control.fileno()])
+
+    def spawn(self, address, bot_socket=None, cpu=None, limits=()):
+        '''
+        Forks a pokerbot for one match.
+
+        Args:
+            address: What the bot's run command would get as its last argument.
+            bot_socket: The bot's end of a socketpair, for an fd: address.
+            cpu: The core to pin the child to, or None.
+            limits: (resource.RLIMIT_*, value) pairs to set in the child.
+
+        Returns:
+            ForkedBot: The child, with its combined stdout and stderr as a readable pipe.
+        '''
+        read_fd, write_fd = os.pipe()
+        fds = [write_fd] + ([bot_socket.fileno()] if bot_socket is not None else [])
+        reply, pidfds = b'', []
+        try:
+            with self.lock:
+                socket.send_fds(self.control, [(json.dumps([address, cpu, limits]) + '\n').encode()], fds)
+                while not reply.endswith(b'\n'):
+                    message, received, _, _ = socket.recv_fds(self.control, 64, 1)
+                    if not message:
+                        break
+                    reply += message
+                    pidfds += received
+        finally:
+            os.close(write_fd)
+        if not reply.endswith(b'\n'):
+            os.close(read_fd)
+            for pidfd in pidfds:
+                os.close(pidfd)
+            raise OSError('zygote for ' + self.path + ' exited')
+        return ForkedBot(int(reply), os.fdopen(read_fd, 'rb'), pidfds[0] if pidfds else None)
+
+    def close(self):
+        self.control.close()  # the zygote exits when its control socket closes
+        try:
+            self.proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+
+
+ZYGOTES = {}  # bot path -> Zygote, one per engine process
+ZYGOTES_LOCK = Lock()
+
+
+def get_zygote(path, commands):
+    '''
+    Returns the zygote for a bot, starting it on first use.
+    '''
+    path = os.path.abspath(path)
+    with ZYGOTES_LOCK:
+        zygote = ZYGOTES.get(path)
+        if zygote is None or zygote.proc.poll() is not None:
+            zygote = ZYGOTES[path] = Zygote(path, commands['run'], commands['preload'])
+        return zygote
+
+
+@atexit.register
+def close_zygotes():
+    '''
+    Stops every zygote this process started. Their children, the running bots, are left alone.
+    '''
+    with ZYGOTES_LOCK:
+        for zygote in ZYGOTES.values():
+            zygote.close()
+        ZYGOTES.clear()
+
+
+def confine(cpu, limits):
+    '''
+    Pins the calling process to a core and sets its rlimits, before a pokerbot's code runs in it.
+
+    This is the preexec_fn of bots the engine starts itself, so it only makes system calls (the
+    engine imports resource before it forks) and leaves failures to the engine, which checks the
+    bot from outside once it has started.
+    '''
+    try:
+        if cpu is not None:
+            os.sched_setaffinity(0, {cpu})
+        if limits:
+            import resource  # POSIX only
+            for limit, value in limits:
+                resource.setrlimit(limit, (value, value))
+    except (AttributeError, OSError, ValueError):
+        pass
+
+
+def run_child(control, address, stdout_fd, script_args, cpu=None, limits=()):
+    '''
+    Turns a freshly forked zygote into the pokerbot for one match. Never returns.
+    '''
+    status = 0
+    try:
+        control.close()
+        os.dup2(stdout_fd, 1)
+        os.dup2(stdout_fd, 2)
+        os.close(stdout_fd)
+        confine(cpu, limits)
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        # forked children would otherwise all replay the zygote's random streams
+        random.seed()
+        if 'numpy' in sys.modules:
+            sys.modules['numpy'].random.seed()
+        sys.argv = script_args + [address]
+        runpy.run_path(script_args[0], run_name='__main__')
+    except SystemExit as system_exit:
+        status = system_exit.code if isinstance(system_exit.code, int) else 1
+    except BaseException:
+        traceback.print_exc()
+        status = 1
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(status)
+
+
+def can_open_pidfds():
+    '''
+    Returns True if this system has pidfds (os.pidfd_open needs Linux 5.3 and Python 3.9).
+    '''
+    try:
+        os.close(os.pidfd_open(os.getpid()))
+    except (AttributeError, OSError):
+        return False
+    return True
+
+
+def reap_children():
+    '''
+    Reaps the children that have exited. The engine holds a pidfd for each, so it does not
+    need their zombies to tell that they are gone.
+    '''
+    try:
+        while os.waitpid(-1, os.WNOHANG)[0] > 0:
+            pass
+    except ChildProcessError:
+        pass
+
+
+def serve(control_fd, preload, script_args):
+    '''
+    Preloads the bot's modules, then forks a child for every address the engine sends.
+    '''
+    sys.path[0] = os.getcwd()  # as if the bot's script had been run from its directory
+    for module in preload:
+        __import__(module)
+    use_pidfds = can_open_pidfds()
+    if not use_pidfds:
+        signal.signal(signal.SIGCHLD, signal.SIG_IGN)  # children are reaped automatically
+    control = socket.socket(fileno=control_fd)
+    while True:
+        try:
+            message, fds, _, _ = socket.recv_fds(control, 4096, 2)
+        except OSError:
+            break
+        if not message:
+            break
+        if use_pidfds:
+            reap_children()
+        address, cpu, limits = json.loads(message)
+        if len(fds) > 1:
+            address = 'fd:' + str(fds[1])  # the inherited connection's number in this process
+        sys.stdout.flush()
+        sys.stderr.flush()
+        pid = os.fork()
+        if pid == 0:
+            run_child(control, address, fds[0], script_args, cpu, limits)
+        for fd in fds:
+            os.close(fd)
+        reply = (str(pid) + '\n').encode()
+        if use_pidfds:
+            # the child is not reaped before the next message, so its pid is still its own here
+            pidfd = os.pidfd_open(pid)
+            socket.send_fds(control, [reply], [pidfd])
+            os.close(pidfd)
+        else:
+            control.sendall(reply)
+
+
+if __name__ == '__main__':
+    serve(int(sys.argv[1]), [module for module in sys.argv[2].split(',') if module], sys.argv[3:])